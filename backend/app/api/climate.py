@@ -1,8 +1,12 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List, Optional
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
 from pydantic import BaseModel
 from app.services.climate_service import ClimateDataService
-import asyncio
+from app.services.scoring import SCORE_FACTORS, parse_weights, weight_vector
+from app.core.config import settings
+from app.core.serialization import FastJSONResponse, dumps, loads
 
 router = APIRouter()
 
@@ -18,8 +22,17 @@ class LocationQuery(BaseModel):
     timezone: Optional[str] = None
 
 class ComparisonQuery(BaseModel):
-    current_location: str
-    target_location: str
+    # 2-N locations (coordinates or names), or the legacy current/target name pair
+    locations: Optional[List[LocationQuery]] = None
+    current_location: Optional[str] = None
+    target_location: Optional[str] = None
+    # Relative score weights per factor; scores are the standard ones without
+    weights: Optional[Dict[str, float]] = None
+
+class RescoreQuery(BaseModel):
+    # Locations with a cached analysis, found by coordinates; names only label missing ones
+    locations: List[LocationQuery]
+    weights: Optional[Dict[str, float]] = None
 
 @router.post("/climate/analyze")
 async def analyze_location(query: LocationQuery):
@@ -78,48 +91,209 @@ async def analyze_location(query: LocationQuery):
             detail=f"Error analyzing location: {str(e)}"
         )
 
+@router.get("/climate/analyze/stream")
+async def stream_location_analysis(
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    name: Optional[str] = None,
+    country: Optional[str] = None,
+    admin1: Optional[str] = None
+):
+    """Stream a comprehensive climate analysis as Server-Sent Events, one section at a time"""
+    if (latitude is None or longitude is None) and not name:
+        raise HTTPException(
+            status_code=400,
+            detail="Either coordinates (latitude/longitude) or location name must be provided"
+        )
+    
+    return StreamingResponse(
+        _analysis_events(latitude, longitude, name, country, admin1),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Stop nginx from buffering the stream
+        }
+    )
+
+async def _analysis_events(latitude: Optional[float], longitude: Optional[float], name: Optional[str], country: Optional[str], admin1: Optional[str]) -> AsyncIterator[bytes]:
+    """Generate SSE events for the sections of an analysis as they complete"""
+    service = ClimateDataService()
+    
+    try:
+        if latitude is None or longitude is None:
+            location_data = await service.get_location_coordinates(name)
+            if not location_data or location_data.get("latitude") is None or location_data.get("longitude") is None:
+                yield _sse_event("error", {"detail": f"Could not find climate data for location: {name}"})
+                return
+            latitude, longitude = location_data["latitude"], location_data["longitude"]
+            name = location_data.get("name", name)
+            country = location_data.get("country", country)
+            admin1 = location_data.get("admin1", admin1)
+        
+        async for section, payload in service.stream_comprehensive_climate_analysis_by_coords(
+            latitude, longitude, name=name, country=country, admin1=admin1
+        ):
+            yield _sse_event(section, payload)
+    except Exception as e:
+        yield _sse_event("error", {"detail": f"Error analyzing location: {str(e)}"})
+
+def _sse_event(event: str, payload: Dict) -> bytes:
+    """Format a single Server-Sent Event"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(payload) + b"\n\n"
+
 @router.post("/climate/compare")
 async def compare_locations(query: ComparisonQuery):
-    """Compare climate data between two locations"""
+    """Compare climate data across 2-N locations in a single pipeline"""
+    legacy = query.locations is None
+    if legacy:
+        entries = [{"name": name} for name in (query.current_location, query.target_location) if name]
+    else:
+        entries = [location.model_dump() for location in query.locations]
+    
+    if len(entries) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="At least two locations are required for a comparison"
+        )
+    if len(entries) > settings.max_comparison_locations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_comparison_locations} locations can be compared"
+        )
+    try:
+        weights = weight_vector(query.weights) if query.weights else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     service = ClimateDataService()
     
     try:
-        # Get analysis for both locations
-        current_analysis, target_analysis = await asyncio.gather(
-            service.get_comprehensive_climate_analysis(query.current_location),
-            service.get_comprehensive_climate_analysis(query.target_location)
-        )
+        # Geocoding and climate fetches are shared and deduplicated across locations
+        analyses = await service.get_comprehensive_climate_analyses(entries)
         
-        if not current_analysis:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Could not find data for current location: {query.current_location}"
-            )
-            
-        if not target_analysis:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Could not find data for target location: {query.target_location}"
-            )
+        for entry, analysis in zip(entries, analyses):
+            if not analysis:
+                location_display = entry.get("name") or entry.get("location") or "Unknown"
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Could not find data for location: {location_display}"
+                )
+        if weights is not None:
+            analyses = service.rescore_analyses(analyses, weights)
         
-        # Generate comparison insights
         comparison = {
-            "current_location": current_analysis,
-            "target_location": target_analysis,
-            "comparison_insights": _generate_comparison_insights(current_analysis, target_analysis)
+            "locations": analyses,
+            **_generate_ranking(analyses)
         }
+        if legacy:
+            comparison.update({
+                "current_location": analyses[0],
+                "target_location": analyses[1],
+                "comparison_insights": _generate_comparison_insights(analyses[0], analyses[1])
+            })
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": comparison
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error comparing locations: {str(e)}"
         )
 
+@router.post("/climate/rescore")
+async def rescore_locations(query: RescoreQuery):
+    """Recompute scores, risk levels and rankings of cached analyses under a weight profile, without refetching"""
+    if not query.locations:
+        raise HTTPException(status_code=400, detail="At least one location is required")
+    if len(query.locations) > settings.max_rescore_locations:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_rescore_locations} locations can be rescored"
+        )
+    if any(location.latitude is None or location.longitude is None for location in query.locations):
+        raise HTTPException(status_code=400, detail="Every location needs latitude and longitude")
+    try:
+        weights = weight_vector(query.weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    service = ClimateDataService()
+    cached = await asyncio.to_thread(
+        service.get_cached_analyses_by_coords, [(location.latitude, location.longitude) for location in query.locations]
+    )
+    analyses = [loads(encoded) for encoded in cached if encoded]
+    uncached = [
+        location.name or f"{location.latitude}, {location.longitude}"
+        for location, encoded in zip(query.locations, cached)
+        if not encoded
+    ]
+    if uncached:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No cached analysis for: {'; '.join(uncached)} (analyze them first)"
+        )
+    
+    rescored = service.rescore_analyses(analyses, weights)
+    return FastJSONResponse({
+        "success": True,
+        "data": {
+            "weights": dict(zip(SCORE_FACTORS, [round(weight, 2) for weight in weights])),
+            "locations": [
+                {
+                    "location": analysis.get("location"),
+                    "resilience_score": analysis["resilience_score"],
+                    "standard_score": original.get("resilience_score"),
+                    "score_factors": analysis["score_factors"],
+                    "risk_assessment": analysis["risk_assessment"],
+                    "recommendations": analysis["recommendations"]
+                }
+                for original, analysis in zip(analyses, rescored)
+            ],
+            **_generate_ranking(rescored)
+        }
+    })
+
+def _generate_ranking(analyses: List[Dict]) -> Dict:
+    """Rank locations by resilience and compute pairwise insights and score matrix"""
+    scores = [analysis.get("resilience_score", 0) for analysis in analyses]
+    order = sorted(range(len(analyses)), key=lambda i: scores[i], reverse=True)
+    
+    ranking = []
+    for rank, index in enumerate(order, start=1):
+        location = analyses[index].get("location", {})
+        ranking.append({
+            "rank": rank,
+            "index": index,
+            "name": location.get("name"),
+            "country": location.get("country"),
+            "resilience_score": scores[index],
+            "temperature_change_2050": analyses[index].get("projections", {}).get("temperature_change_2050", 0)
+        })
+    
+    # score_matrix[i][j] is how many points location j scores above location i
+    score_matrix = [[scores[j] - scores[i] for j in range(len(scores))] for i in range(len(scores))]
+    
+    pairwise_insights = [
+        {
+            "current": i,
+            "target": j,
+            "insights": _generate_comparison_insights(analyses[i], analyses[j])
+        }
+        for i in range(len(analyses))
+        for j in range(i + 1, len(analyses))
+    ]
+    
+    return {
+        "ranking": ranking,
+        "score_matrix": score_matrix,
+        "pairwise_insights": pairwise_insights
+    }
+
 def _generate_comparison_insights(current: Dict, target: Dict) -> Dict:
     """Generate insights comparing two locations"""
     current_score = current.get("resilience_score", 0)
@@ -156,6 +330,115 @@ def _get_comparison_recommendation(current_score: int, target_score: int, curren
     else:
         return "Both locations have similar climate resilience profiles"
 
+@router.get("/climate/rank")
+async def rank_places(
+    k: int = 20,
+    country: Optional[str] = None,
+    min_population: Optional[int] = None,
+    max_population: Optional[int] = None,
+    min_temp: Optional[float] = None,
+    max_temp: Optional[float] = None,
+    weights: Optional[str] = None
+):
+    """Best places by climate resilience from the precomputed places table, without upstream calls
+
+    country takes one or more comma-separated names; min_temp/max_temp filter
+    on the recent annual mean temperature; weights ("factor:weight,...")
+    ranks by a personalized score instead of the standard one.
+    """
+    # The table (and numpy) load on the first ranking request, off the event loop
+    from app.services.places import get_place_table
+
+    table = await asyncio.to_thread(get_place_table)
+    if table is None:
+        raise HTTPException(status_code=503, detail="Place ranking is not available")
+    if not 1 <= k <= settings.max_ranked_places:
+        raise HTTPException(
+            status_code=400,
+            detail=f"k must be between 1 and {settings.max_ranked_places}"
+        )
+    
+    countries = [name.strip() for name in country.split(",") if name.strip()] if country else []
+    try:
+        places, matched = table.top(
+            k,
+            countries=countries,
+            min_population=min_population,
+            max_population=max_population,
+            min_temp=min_temp,
+            max_temp=max_temp,
+            weights=parse_weights(weights)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({
+        "success": True,
+        "data": {
+            "places": places,
+            "matched": matched,
+            "total": table.size
+        }
+    })
+
+@router.get("/climate/analogs")
+async def find_climate_analogs(
+    lat: float,
+    lon: float,
+    k: int = 10,
+    mode: str = "future"
+):
+    """Places whose climate matches the reference's across the present and 2050
+
+    mode "future" finds places that will feel in 2050 like the reference does
+    today; "present" finds places that already feel like the reference will.
+    """
+    # The index (and numpy) load on the first analog search, off the event loop
+    from app.services.analogs import ANALOG_MODES, climate_vectors, get_analog_index
+
+    index = await asyncio.to_thread(get_analog_index)
+    if index is None:
+        raise HTTPException(status_code=503, detail="Analog search is not available")
+    if mode not in ANALOG_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"mode must be one of {', '.join(ANALOG_MODES)}"
+        )
+    if not 1 <= k <= settings.max_analogs:
+        raise HTTPException(
+            status_code=400,
+            detail=f"k must be between 1 and {settings.max_analogs}"
+        )
+    
+    # Answered from the climate grid or the cache for most references
+    service = ClimateDataService()
+    baseline, projections = await asyncio.gather(
+        service.get_historical_climate_baseline(lat, lon),
+        service.get_climate_projections(lat, lon)
+    )
+    vectors = climate_vectors(baseline, projections, lat) if baseline and projections else None
+    if vectors is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Could not find monthly climate data for coordinates: {lat}, {lon}"
+        )
+    present, future = vectors
+    
+    # Match the reference's present against places' 2050 climate, or the other way round
+    analogs = index.search(present, k, "future") if mode == "future" else index.search(future, k, "present")
+    return FastJSONResponse({
+        "success": True,
+        "data": {
+            "reference": {
+                "latitude": lat,
+                "longitude": lon,
+                "temperature_change_2050": projections.get("temperature_change_2050"),
+                "precipitation_change_percent": projections.get("precipitation_change_percent")
+            },
+            "mode": mode,
+            "analogs": analogs
+        }
+    })
+
 @router.get("/climate/health")
 async def health_check():
     """Health check endpoint"""
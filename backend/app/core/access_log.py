@@ -0,0 +1,78 @@
+"""
+Streaming-safe access logging middleware
+"""
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("app.access")
+
+class AccessLogMiddleware:
+    """Log method, path, status, latency and byte counts for every HTTP request.
+
+    Implemented as plain ASGI so bodies stream through untouched. Request and
+    response bodies are only captured for sampled requests on configured routes,
+    and never beyond max_body_bytes.
+    """
+
+    def __init__(self, app, body_routes: Optional[Dict[str, float]] = None, max_body_bytes: int = 2048):
+        self.app = app
+        # Path prefix -> body capture sample rate (0.0 - 1.0)
+        self.body_routes = body_routes or {}
+        self.max_body_bytes = max_body_bytes
+
+    def _body_sample_rate(self, path: str) -> float:
+        """Sample rate of the longest configured route prefix matching the path"""
+        matches = [prefix for prefix in self.body_routes if path.startswith(prefix)]
+        if not matches:
+            return 0.0
+        return self.body_routes[max(matches, key=len)]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        path = scope["path"]
+        sample_rate = self._body_sample_rate(path)
+        capture = sample_rate > 0 and random.random() < sample_rate
+        stats = {"status": 500, "bytes_in": 0, "bytes_out": 0}
+        request_body = bytearray()
+        response_body = bytearray()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                stats["bytes_in"] += len(chunk)
+                if capture and len(request_body) < self.max_body_bytes:
+                    request_body.extend(chunk[:self.max_body_bytes - len(request_body)])
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                stats["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                stats["bytes_out"] += len(chunk)
+                if capture and len(response_body) < self.max_body_bytes:
+                    response_body.extend(chunk[:self.max_body_bytes - len(response_body)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            logger.info(
+                "%s %s %s %.1fms in=%dB out=%dB",
+                scope["method"], path, stats["status"], latency_ms, stats["bytes_in"], stats["bytes_out"]
+            )
+            if capture:
+                logger.info(
+                    "%s %s request_body=%s response_body=%s",
+                    scope["method"], path,
+                    request_body.decode(errors="replace"),
+                    response_body.decode(errors="replace")
+                )
@@ -0,0 +1,125 @@
+"""
+Admission control: per-route concurrency limits, priorities and load shedding
+"""
+import asyncio
+import time
+from typing import Dict, Iterable, List
+
+from app.core.serialization import FastJSONResponse
+
+class RouteClass:
+    """A group of routes sharing a concurrency limit and an overload policy"""
+
+    def __init__(self, name: str, paths: Iterable[str], limit: int, max_wait: float, priority: int, on_overload: str = "shed"):
+        self.name = name
+        self.paths = tuple(paths)
+        self.limit = limit
+        # Longest time a request may queue for a slot before it is overloaded
+        self.max_wait = max_wait
+        # 0 is the highest priority; lower priorities are shed first under global pressure
+        self.priority = priority
+        # "shed" rejects with 503 + Retry-After; "degrade" runs the handler in degraded mode
+        self.on_overload = on_overload
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.admitted = 0
+        self.overloaded = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "priority": self.priority,
+            "on_overload": self.on_overload,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "overloaded": self.overloaded,
+            "queue_wait_ms": {
+                "avg": round(self.queue_wait_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+                "max": round(self.queue_wait_max * 1000, 1)
+            }
+        }
+
+class AdmissionController:
+    """Admit requests into their route class, or report them as overloaded"""
+
+    def __init__(self, route_classes: List[RouteClass], max_in_flight: int):
+        self.route_classes = {path: route_class for route_class in route_classes for path in route_class.paths}
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    def classify(self, path: str):
+        return self.route_classes.get(path)
+
+    async def admit(self, route_class: RouteClass) -> bool:
+        # Under global pressure only top-priority work may queue
+        if route_class.priority > 0 and self.in_flight >= self.max_in_flight:
+            route_class.overloaded += 1
+            return False
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(route_class.semaphore.acquire(), timeout=route_class.max_wait)
+        except asyncio.TimeoutError:
+            route_class.overloaded += 1
+            return False
+        wait = time.perf_counter() - start
+        route_class.queue_wait_total += wait
+        route_class.queue_wait_max = max(route_class.queue_wait_max, wait)
+        route_class.admitted += 1
+        route_class.in_flight += 1
+        self.in_flight += 1
+        return True
+
+    def release(self, route_class: RouteClass) -> None:
+        route_class.semaphore.release()
+        route_class.in_flight -= 1
+        self.in_flight -= 1
+
+    def snapshot(self) -> Dict:
+        classes = {route_class.name: route_class for route_class in self.route_classes.values()}
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "routes": {name: route_class.snapshot() for name, route_class in classes.items()}
+        }
+
+class AdmissionMiddleware:
+    """Apply admission control before any handler work starts
+
+    Degraded requests are marked with request.state.admission == "degraded";
+    handlers for "degrade" routes must then answer without upstream calls.
+    """
+
+    def __init__(self, app, controller: AdmissionController, retry_after: int = 5):
+        self.app = app
+        self.controller = controller
+        self.retry_after = retry_after
+
+    async def __call__(self, scope, receive, send):
+        route_class = self.controller.classify(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.admit(route_class):
+            if route_class.on_overload == "degrade":
+                scope.setdefault("state", {})["admission"] = "degraded"
+                await self.app(scope, receive, send)
+            else:
+                await overloaded_response(self.retry_after)(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
+
+def overloaded_response(retry_after: int) -> FastJSONResponse:
+    """503 telling the client when to retry"""
+    return FastJSONResponse(
+        {"success": False, "error": "Service is overloaded, please retry shortly"},
+        status_code=503,
+        headers={"Retry-After": str(retry_after)}
+    )
@@ -0,0 +1,69 @@
+"""
+In-process cache in front of Redis, kept coherent across workers by invalidation messages
+"""
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, List, Optional, Tuple
+
+from app.core.config import settings
+
+class LocalCache:
+    """Small TTL + LRU cache for hot entries within one worker process"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live entry, else None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def recent_keys(self, limit: int) -> List[str]:
+        """Most recently used keys first"""
+        return list(islice(reversed(self._entries), limit))
+
+    def delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+local_cache = LocalCache(max_entries=settings.local_cache_max_entries)
+
+# Analyses are cached under the scoring version that produced them, so bumping
+# the version retires every cached analysis in all workers at once
+_scoring_version = 0
+
+def get_scoring_version() -> int:
+    return _scoring_version
+
+def set_scoring_version(version: int) -> None:
+    global _scoring_version
+    if version != _scoring_version:
+        _scoring_version = version
+        local_cache.delete_prefix("full_analysis:")
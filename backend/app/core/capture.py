@@ -0,0 +1,122 @@
+"""
+Sampled traffic capture to rotating JSONL files, for replay with tools/replay.py
+"""
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl
+
+from app.core.serialization import dumps
+from app.core.timing import current_timings
+
+class TrafficCapture:
+    """Write one JSON line per sampled request to size-rotated files
+
+    Lines go through a queue to a listener thread, so disk writes never run
+    on the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.logger = logging.getLogger("app.capture")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._listener: Optional[QueueListener] = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+        self.logger.addHandler(QueueHandler(self._queue))
+
+    def stop(self) -> None:
+        if self._listener:
+            # Flushes whatever is still queued
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+        self.logger.handlers.clear()
+
+    def write(self, entry: dict) -> None:
+        # Capture is best effort: if the disk can't keep up, drop rather than
+        # slow requests down (only the event loop enqueues, so this can't race)
+        if self._queue.full():
+            self.dropped += 1
+            return
+        self.logger.info(dumps(entry).decode())
+
+class TrafficCaptureMiddleware:
+    """Record endpoint, parameters, body, status, timing and cache outcome for sampled requests
+
+    Added inside ServerTimingMiddleware so the request's stage timings and
+    cache statuses are still available when the response finishes.
+    """
+
+    def __init__(self, app, capture: TrafficCapture, path_prefixes: List[str], sample_rate: float, max_body_bytes: int = 4096):
+        self.app = app
+        self.capture = capture
+        self.path_prefixes = tuple(path_prefixes)
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.path_prefixes)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        start = time.perf_counter()
+        state = {"status": 500, "bytes_out": 0, "truncated": False}
+        body = bytearray()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                if len(body) + len(chunk) > self.max_body_bytes:
+                    state["truncated"] = True
+                body.extend(chunk[:self.max_body_bytes - len(body)])
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["ttfb_ms"] = (time.perf_counter() - start) * 1000
+            elif message["type"] == "http.response.body":
+                state["bytes_out"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            timings = current_timings()
+            self.capture.write({
+                "ts": round(arrived, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True),
+                "body": body.decode("utf-8", errors="replace") if body else None,
+                "body_truncated": state["truncated"],
+                "handler": getattr(scope.get("endpoint"), "__name__", None),
+                "status": state["status"],
+                "ttfb_ms": round(state.get("ttfb_ms", 0.0), 2),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "bytes_out": state["bytes_out"],
+                "cache": dict(timings.statuses) if timings else {},
+                "stages_ms": {name: round(ms, 2) for name, ms in timings.durations_ms.items()} if timings else {}
+            })
@@ -0,0 +1,61 @@
+"""
+Shared clients for external dependencies
+"""
+import time
+from typing import Optional
+
+import httpx
+import redis
+
+from app.core.config import settings
+from app.core.metrics import upstream_latency, upstream_requests
+
+_redis_client: Optional[redis.Redis] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_redis_client() -> redis.Redis:
+    """Process-wide Redis client; connections are pooled and opened on first use"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            socket_timeout=settings.redis_socket_timeout
+        )
+    return _redis_client
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """Record latency to response headers and status per upstream host"""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        start = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except Exception:
+            upstream_latency.observe(time.perf_counter() - start, host)
+            upstream_requests.inc(host, "error")
+            raise
+        upstream_latency.observe(time.perf_counter() - start, host)
+        upstream_requests.inc(host, str(response.status_code))
+        return response
+
+def get_http_client() -> httpx.AsyncClient:
+    """Process-wide HTTP client, so upstream connections (DNS, TCP, TLS) are reused across requests"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.http_timeout_seconds,
+            transport=_MeteredTransport(limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds
+            ))
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
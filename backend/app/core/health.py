@@ -0,0 +1,148 @@
+"""
+Background health monitoring of Redis and the Open-Meteo upstreams
+"""
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.core.clients import get_redis_client
+from app.core.config import settings
+
+class DependencyHealth:
+    """Rolling probe results for a single dependency"""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        self.latencies_ms = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.status = "unknown"
+        self.message = "Not probed yet"
+        self.last_checked: Optional[str] = None
+        self.consecutive_failures = 0
+
+    def record(self, ok: bool, latency_ms: float, message: str) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.outcomes.append(ok)
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        self.status = "healthy" if ok else "unhealthy"
+        self.message = message
+        self.last_checked = datetime.utcnow().isoformat()
+
+    def snapshot(self) -> Dict:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "status": self.status,
+            "message": self.message,
+            "last_checked": self.last_checked,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.outcomes.count(False) / len(self.outcomes), 3) if self.outcomes else None,
+            "latency_ms": {
+                "last": round(self.latencies_ms[-1], 1),
+                "p50": round(latencies[len(latencies) // 2], 1),
+                "max": round(latencies[-1], 1)
+            } if latencies else None,
+            "samples": len(self.outcomes)
+        }
+
+class HealthMonitor:
+    """Probe dependencies on a schedule so health endpoints answer from a snapshot"""
+
+    def __init__(self, interval: float, timeout: float, window: int):
+        self.interval = interval
+        self.timeout = timeout
+        self.dependencies = {
+            name: DependencyHealth(name, window)
+            for name in ("redis", "openmeteo_geocoding", "openmeteo_climate")
+        }
+        self.rounds = 0
+        self._task: Optional[asyncio.Task] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        self._http_client = httpx.AsyncClient(timeout=self.timeout)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._http_client:
+            await self._http_client.aclose()
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self) -> None:
+        """Run one round of probes concurrently"""
+        await asyncio.gather(
+            self._probe("redis", self._probe_redis),
+            self._probe("openmeteo_geocoding", self._probe_geocoding),
+            self._probe("openmeteo_climate", self._probe_climate)
+        )
+        self.rounds += 1
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[str]]) -> None:
+        start = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(check(), timeout=self.timeout)
+            ok = True
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+            ok = False
+        self.dependencies[name].record(ok, (time.perf_counter() - start) * 1000, message)
+
+    async def _probe_redis(self) -> str:
+        # The Redis client is synchronous; keep the ping off the event loop
+        await asyncio.to_thread(get_redis_client().ping)
+        return "Redis connection successful"
+
+    async def _probe_geocoding(self) -> str:
+        response = await self._http_client.get(
+            f"{settings.geocoding_api_url}/search",
+            params={"name": "London", "count": 1}
+        )
+        response.raise_for_status()
+        return "Open-Meteo Geocoding API responding"
+
+    async def _probe_climate(self) -> str:
+        response = await self._http_client.get(
+            f"{settings.open_meteo_api_url}/forecast",
+            params={"latitude": 51.5074, "longitude": -0.1278, "current": "temperature_2m"}
+        )
+        response.raise_for_status()
+        return "Open-Meteo Climate API responding"
+
+    def is_ready(self) -> bool:
+        """Ready once probed, with a healthy cache and (optionally) a healthy upstream"""
+        if self.rounds == 0:
+            return False
+        if self.dependencies["redis"].status != "healthy":
+            return False
+        if settings.health_ready_requires_upstream:
+            return self.dependencies["openmeteo_climate"].status == "healthy"
+        return True
+
+    def snapshot(self) -> Dict:
+        checks = {name: dependency.snapshot() for name, dependency in self.dependencies.items()}
+        degraded = any(check["status"] != "healthy" for check in checks.values())
+        return {
+            "status": "degraded" if degraded else "healthy",
+            "timestamp": datetime.utcnow().isoformat(),
+            "probe_interval_seconds": self.interval,
+            "checks": checks
+        }
+
+health_monitor = HealthMonitor(
+    interval=settings.health_probe_interval_seconds,
+    timeout=settings.health_probe_timeout_seconds,
+    window=settings.health_latency_window
+)
@@ -0,0 +1,130 @@
+"""
+Cross-worker cache invalidation over Redis pub/sub
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.cache import get_scoring_version, local_cache, set_scoring_version
+from app.core.clients import get_redis_client
+from app.core.config import settings
+from app.core.serialization import dumps, loads
+
+CHANNEL = "cache-invalidation"
+SCORING_VERSION_KEY = "scoring_version"
+
+# Cache key families and the key prefix each one is stored under
+CACHE_FAMILIES = {
+    "search": "location_search:",
+    "geocoding": "geocoding:",
+    "baseline": "historical_baseline:",
+    "current": "current_climate:",
+    "recent": "recent_climate:",
+    "projections": "climate_projections:",
+    "analysis": "full_analysis:"
+}
+
+class InvalidationBus:
+    """Publish invalidations to every worker and apply the ones it receives
+
+    Each worker keeps hot entries in its in-process cache; without this bus a
+    worker would keep serving an entry for up to local_cache_ttl_seconds after
+    another worker replaced or purged it in Redis.
+    """
+
+    def __init__(self, redis_url: str):
+        self.redis_url = redis_url
+        self.received = 0
+        self._client: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self._load_scoring_version()
+        self._client = aioredis.from_url(self.redis_url)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._client:
+            await self._client.close()
+
+    async def _load_scoring_version(self) -> None:
+        try:
+            version = await asyncio.to_thread(get_redis_client().get, SCORING_VERSION_KEY)
+        except redis.RedisError as e:
+            print(f"Scoring version load error: {e}")
+            return
+        if version:
+            set_scoring_version(int(version))
+
+    async def _listen(self) -> None:
+        # Reconnect with a delay so a Redis outage does not spin the loop
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(CHANNEL)
+                async for message in pubsub.listen():
+                    self.apply(loads(message["data"]))
+                    self.received += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Invalidation listener error: {e}")
+                await asyncio.sleep(5)
+
+    def apply(self, message: Dict) -> None:
+        """Drop the named keys and families from this worker's cache"""
+        for key in message.get("keys", []):
+            local_cache.delete(key)
+        for family in message.get("families", []):
+            prefix = CACHE_FAMILIES.get(family)
+            if prefix:
+                local_cache.delete_prefix(prefix)
+        if "scoring_version" in message:
+            set_scoring_version(int(message["scoring_version"]))
+
+    async def publish(self, message: Dict) -> int:
+        """Apply locally, then tell the other workers; returns the number of subscribers reached"""
+        self.apply(message)
+        return await asyncio.to_thread(get_redis_client().publish, CHANNEL, dumps(message))
+
+    async def invalidate(self, keys: Iterable[str] = (), families: Iterable[str] = (), purge: bool = False, bump_scoring_version: bool = False) -> Dict:
+        """Invalidate keys and families everywhere, optionally deleting them from Redis too"""
+        keys, families = list(keys), list(families)
+        message: Dict = {"keys": keys, "families": families}
+        purged = 0
+        if purge:
+            purged = await asyncio.to_thread(self._purge, keys, [CACHE_FAMILIES[family] for family in families])
+        if bump_scoring_version:
+            message["scoring_version"] = await asyncio.to_thread(get_redis_client().incr, SCORING_VERSION_KEY)
+        subscribers = await self.publish(message)
+        return {
+            "keys": keys,
+            "families": families,
+            "purged": purged,
+            "scoring_version": get_scoring_version(),
+            "subscribers": subscribers
+        }
+
+    def _purge(self, keys: List[str], prefixes: List[str]) -> int:
+        client = get_redis_client()
+        purged = client.delete(*keys) if keys else 0
+        for prefix in prefixes:
+            batch = []
+            for key in client.scan_iter(match=f"{prefix}*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    purged += client.delete(*batch)
+                    batch = []
+            if batch:
+                purged += client.delete(*batch)
+        return purged
+
+invalidation_bus = InvalidationBus(settings.redis_url)
@@ -0,0 +1,139 @@
+"""
+Event-loop lag monitoring and an opt-in watchdog for calls that block the loop
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger("app.watchdog")
+
+# Frames under this directory count as app code when naming a blocking function
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class LoopMonitor:
+    """Sleep for a fixed interval and record how much later than asked the loop woke us
+
+    Lag means something ran on the loop without yielding (blocking I/O, heavy
+    CPU work), delaying every other request by the same amount.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.histogram = registry.histogram(
+            "event_loop_lag_seconds", "Delay of a periodic event-loop timer beyond its interval",
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+        )
+        registry.gauge("event_loop_lag_last_seconds", "Most recent event-loop lag sample", lambda: self.last_lag)
+        registry.gauge("event_loop_lag_max_seconds", "Largest event-loop lag seen since start", lambda: self.max_lag)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.histogram.observe(lag)
+
+loop_monitor = LoopMonitor(interval=settings.loop_monitor_interval_seconds)
+
+class LoopWatchdog:
+    """Opt-in thread that notices when the event loop stops ticking and captures what blocks it
+
+    The loop bumps a heartbeat every interval; the watchdog thread checks it
+    and, once the heartbeat is late by more than the threshold, snapshots the
+    loop thread's stack. The innermost frame in app code is reported as the
+    offending function in the log and in event_loop_stalls_total.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self.stalls = registry.counter(
+            "event_loop_stalls_total", "Event-loop stalls past the watchdog threshold by blocking function", ["function"]
+        )
+        self.stall_duration = registry.histogram(
+            "event_loop_stall_seconds", "Duration of event-loop stalls past the watchdog threshold",
+            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+        )
+        self._heartbeat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._handle:
+            self._handle.cancel()
+        if self._thread:
+            await asyncio.to_thread(self._thread.join)
+
+    def _beat(self) -> None:
+        self._heartbeat = time.monotonic()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        stalled_since = None
+        function = None
+        while not self._stop.wait(self.interval):
+            late = time.monotonic() - self._heartbeat - self.interval
+            if late > self.threshold and stalled_since is None:
+                stalled_since = self._heartbeat + self.interval
+                function, stack = self._capture()
+                logger.warning(
+                    "Event loop blocked for over %.0fms in %s\n%s",
+                    self.threshold * 1000, function, "".join(stack)
+                )
+            elif late <= self.threshold and stalled_since is not None:
+                duration = self._heartbeat - stalled_since
+                self.stalls.inc(function)
+                self.stall_duration.observe(duration)
+                logger.warning("Event loop stall in %s lasted %.0fms", function, duration * 1000)
+                stalled_since = None
+
+    def _capture(self) -> Tuple[str, List[str]]:
+        """The loop thread's current stack and the innermost app function on it"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "unknown", []
+        stack = traceback.format_stack(frame)
+        function = None
+        while frame is not None:
+            if function is None and frame.f_code.co_filename.startswith(APP_ROOT):
+                function = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            frame = frame.f_back
+        return function or "outside app code", stack
+
+loop_watchdog = LoopWatchdog(threshold=settings.loop_watchdog_threshold_seconds)
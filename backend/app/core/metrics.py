@@ -0,0 +1,160 @@
+"""
+In-process metrics registry with a Prometheus text exposition
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, dense around the 500 ms search and 2 s analysis targets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value:g}")
+        return lines
+
+class Histogram:
+    """Bucketed distribution per label set"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Gauge:
+    """Current value read from a callback at scrape time"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def expose(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.read():g}"]
+
+class Registry:
+    """All metrics of this process; each worker exposes its own"""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help_text, labels, buckets))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        self.metrics[name] = Gauge(name, help_text, read)
+        return self.metrics[name]
+
+    def add_collector(self, collect: Callable[[], List[str]]) -> None:
+        """Register a callback producing exposition lines for metrics kept elsewhere"""
+        self.collectors.append(collect)
+
+    def expose(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.expose())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+cache_requests = registry.counter(
+    "cache_requests_total", "Cache lookups by key family and result (grid, local_hit, hit, interpolated, miss)", ["family", "result"]
+)
+upstream_requests = registry.counter(
+    "upstream_requests_total", "Upstream HTTP requests by host and status code (or error)", ["host", "status"]
+)
+upstream_latency = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream HTTP time to response headers by host", ["host"]
+)
+fallbacks_generated = registry.counter(
+    "fallback_generated_total", "Datasets generated by the fallback generators instead of fetched", ["dataset"]
+)
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by handler and status code", ["handler", "status"]
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency to response start by handler", ["handler"]
+)
+
+class MetricsMiddleware:
+    """Count requests, time them per handler and track how many are in flight"""
+
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        registry.gauge("http_requests_in_flight", "HTTP requests currently being served", lambda: self.in_flight)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = {"status": "500"}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = str(message["status"])
+                # Label by handler function rather than raw path, so the series count stays bounded
+                endpoint = scope.get("endpoint")
+                state["handler"] = getattr(endpoint, "__name__", "none")
+                http_latency.observe(time.perf_counter() - start, state["handler"])
+            await send(message)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight -= 1
+            http_requests.inc(state.get("handler", "none"), state["status"])
@@ -0,0 +1,239 @@
+"""
+On-demand sampling profiler for single requests, with flame-graph output
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from weakref import WeakSet
+
+from app.core.timing import current_timings
+
+# Caller-supplied request IDs are used as file names, so only plain ones are accepted
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+class ProfileSession:
+    """Folded stacks sampled while one request's tasks were running on the loop"""
+
+    def __init__(self, profile_id: str, method: str, path: str, query: str, reason: str):
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.query = query
+        self.reason = reason
+        self.started = time.time()
+        # The request's own task plus every task it spawns, so concurrent
+        # requests don't end up in each other's profiles
+        self.tasks: WeakSet = WeakSet()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # Stage durations from Server-Timing, filled in when the request ends
+        self.timings: Optional[Dict[str, float]] = None
+        self.token = None
+
+class RequestProfiler:
+    """Sample the event-loop thread's stack while profiled requests are in flight
+
+    Nothing runs unless a session is active: the sampler thread and the task
+    factory that tags the request's child tasks are installed for the first
+    session and removed after the last one. Work pushed to threads
+    (asyncio.to_thread) is not sampled.
+    """
+
+    def __init__(self, directory: str, interval: float, max_profiles: int):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.sessions: Dict[str, ProfileSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._previous_factory = None
+        self._stop = threading.Event()
+
+    def begin(self, profile_id: str, method: str, path: str, query: str, reason: str) -> ProfileSession:
+        session = ProfileSession(profile_id, method, path, query, reason)
+        task = asyncio.current_task()
+        if task is not None:
+            session.tasks.add(task)
+        if not self.sessions:
+            self._install()
+        self.sessions[profile_id] = session
+        session.token = _session.set(session)
+        return session
+
+    def end(self, session: ProfileSession) -> None:
+        _session.reset(session.token)
+        self.sessions.pop(session.profile_id, None)
+        if not self.sessions:
+            self._uninstall()
+
+    def _install(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._previous_factory = self._loop.get_task_factory()
+        previous = self._previous_factory
+
+        def task_factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            # Runs in the creating task's context, so this is the parent's session
+            session = _session.get()
+            if session is not None:
+                session.tasks.add(task)
+            return task
+
+        self._loop.set_task_factory(task_factory)
+        # A fresh event per thread, so a sampler still winding down can't be revived
+        self._stop = threading.Event()
+        threading.Thread(target=self._sample, args=(self._stop,), name="request-profiler", daemon=True).start()
+
+    def _uninstall(self) -> None:
+        self._stop.set()
+        if self._loop:
+            self._loop.set_task_factory(self._previous_factory)
+
+    def _sample(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            task = asyncio.current_task(self._loop)
+            if task is None:
+                # Loop is idle, waiting on I/O
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            for session in list(self.sessions.values()):
+                if task in session.tasks:
+                    session.stacks[_fold(frame)] += 1
+                    session.samples += 1
+                    break
+
+    def save(self, session: ProfileSession, duration_ms: float) -> None:
+        """Write the folded stacks (flamegraph.pl / speedscope input) and a metadata file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{session.profile_id}.folded", "w") as folded:
+            for stack, count in session.stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+        meta = {
+            "id": session.profile_id,
+            "created": datetime.utcfromtimestamp(session.started).isoformat(),
+            "method": session.method,
+            "path": session.path,
+            "query": session.query,
+            "reason": session.reason,
+            "duration_ms": round(duration_ms, 2),
+            "samples": session.samples,
+            "interval_ms": self.interval * 1000,
+            # CPU seen on the loop thread; the rest was spent waiting (upstreams, Redis) or in threads
+            "sampled_cpu_ms": round(session.samples * self.interval * 1000, 1),
+            "stages_ms": session.timings
+        }
+        with open(self.directory / f"{session.profile_id}.json", "w") as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        self._prune()
+
+    def _prune(self) -> None:
+        metas = sorted(self.directory.glob("*.json"), key=os.path.getmtime)
+        for stale in metas[:max(len(metas) - self.max_profiles, 0)]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".folded").unlink(missing_ok=True)
+
+    def list_profiles(self, limit: int = 50) -> List[Dict]:
+        if not self.directory.exists():
+            return []
+        metas = sorted(self.directory.glob("*.json"), key=os.path.getmtime, reverse=True)[:limit]
+        profiles = []
+        for meta_path in metas:
+            try:
+                profiles.append(json.loads(meta_path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def read(self, profile_id: str) -> Optional[str]:
+        """Folded stacks of a stored profile, or None if unknown"""
+        if not REQUEST_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            return (self.directory / f"{profile_id}.folded").read_text()
+        except OSError:
+            return None
+
+def _fold(frame) -> str:
+    """Stack from the outermost frame to the innermost, in the folded flame-graph format"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class ProfilingMiddleware:
+    """Profile requests asking for it with ?profile=1 and the admin token, and a sample of the rest
+
+    Sampled requests are only kept when they take longer than the slow
+    threshold. Requests that are neither pay one query-string check. Added
+    inside ServerTimingMiddleware so stage durations are stored alongside.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, admin_token: str, path_prefixes: List[str],
+                 slow_sample_rate: float = 0.0, slow_threshold_ms: float = 2000.0):
+        self.app = app
+        self.profiler = profiler
+        self.admin_token = admin_token.encode()
+        self.path_prefixes = tuple(path_prefixes)
+        self.slow_sample_rate = slow_sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+
+    def _reason(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            return None
+        query = scope.get("query_string", b"")
+        if b"profile=" in query and self.admin_token:
+            requested = parse_qs(query.decode("latin-1")).get("profile", [""])[0] in ("1", "true")
+            if requested and dict(scope["headers"]).get(b"x-admin-token") == self.admin_token:
+                return "requested"
+        if self.slow_sample_rate > 0 and random.random() < self.slow_sample_rate:
+            return "slow"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")
+        if not REQUEST_ID_PATTERN.match(request_id) or request_id in self.profiler.sessions:
+            request_id = uuid.uuid4().hex
+        profile_id = request_id
+        session = self.profiler.begin(
+            profile_id, scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"), reason
+        )
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and reason == "requested":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.end(session)
+            duration_ms = (time.perf_counter() - start) * 1000
+            if reason == "requested" or duration_ms >= self.slow_threshold_ms:
+                timings = current_timings()
+                session.timings = {name: round(ms, 2) for name, ms in timings.durations_ms.items()} if timings else None
+                await asyncio.to_thread(self.profiler.save, session, duration_ms)
@@ -0,0 +1,152 @@
+"""
+Per-client rate limiting with Redis sliding windows shared across workers
+"""
+import asyncio
+import hashlib
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from app.core.serialization import FastJSONResponse
+
+class RateLimiter:
+    """Sliding-window counters per client, kept in Redis with an in-process fast path
+
+    Each window uses the two-bucket approximation: the previous fixed window's
+    count, weighted by how much of it still overlaps the sliding window, plus
+    the current window's count. Every request is also counted in process
+    memory first: a client already over a limit there is over it globally,
+    so it is rejected without a Redis round trip, as are clients remembered
+    as blocked until their window rolls over. If Redis fails, the local
+    counts are used and Redis is left alone for redis_retry_seconds, so an
+    outage doesn't cost every request a socket timeout.
+    """
+
+    def __init__(self, limits: List[Tuple[int, int]], redis_client_factory: Callable[[], redis.Redis], key_prefix: str = "ratelimit",
+                 redis_retry_seconds: float = 10.0):
+        # (max requests, window seconds) pairs, e.g. per minute and per day
+        self.limits = limits
+        self.redis_client_factory = redis_client_factory
+        self.key_prefix = key_prefix
+        self.redis_retry_seconds = redis_retry_seconds
+        self._blocked_until: Dict[str, float] = {}
+        self._local_counts: Dict[Tuple[str, int, int], int] = {}
+        self._redis_down_until = 0.0
+
+    async def check(self, client_key: str) -> Optional[float]:
+        """Count a request; return seconds to wait if the client is over a limit, else None"""
+        now = time.time()
+        blocked_until = self._blocked_until.get(client_key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return blocked_until - now
+            del self._blocked_until[client_key]
+
+        retry_after = self._over_limit(client_key, self._local_hit(client_key, now), now)
+        if retry_after is not None or now < self._redis_down_until:
+            return retry_after
+        try:
+            counts = await asyncio.to_thread(self._redis_hit, client_key, now)
+        except redis.RedisError as e:
+            print(f"Rate limit counters unavailable, counting per process for {self.redis_retry_seconds}s: {e}")
+            self._redis_down_until = now + self.redis_retry_seconds
+            return None
+        return self._over_limit(client_key, counts, now)
+
+    def _over_limit(self, client_key: str, counts: List[Tuple[int, int]], now: float) -> Optional[float]:
+        for (limit, window), (previous, current) in zip(self.limits, counts):
+            elapsed = (now % window) / window
+            if previous * (1 - elapsed) + current > limit:
+                retry_after = window - (now % window)
+                self._blocked_until[client_key] = now + retry_after
+                if len(self._blocked_until) > 10000:
+                    self._prune(now)
+                return retry_after
+        return None
+
+    def _redis_hit(self, client_key: str, now: float) -> List[Tuple[int, int]]:
+        pipe = self.redis_client_factory().pipeline(transaction=False)
+        for _, window in self.limits:
+            index = int(now // window)
+            current_key = f"{self.key_prefix}:{client_key}:{window}:{index}"
+            pipe.incr(current_key)
+            pipe.expire(current_key, window * 2)
+            pipe.get(f"{self.key_prefix}:{client_key}:{window}:{index - 1}")
+        results = pipe.execute()
+        return [
+            (int(results[i * 3 + 2] or 0), int(results[i * 3]))
+            for i in range(len(self.limits))
+        ]
+
+    def _local_hit(self, client_key: str, now: float) -> List[Tuple[int, int]]:
+        counts = []
+        for _, window in self.limits:
+            index = int(now // window)
+            current = self._local_counts.get((client_key, window, index), 0) + 1
+            self._local_counts[(client_key, window, index)] = current
+            counts.append((self._local_counts.get((client_key, window, index - 1), 0), current))
+        if len(self._local_counts) > 100000:
+            self._prune(now)
+        return counts
+
+    def _prune(self, now: float) -> None:
+        """Drop expired blocks and buckets older than the previous window"""
+        self._blocked_until = {key: until for key, until in self._blocked_until.items() if until > now}
+        self._local_counts = {
+            (key, window, index): count
+            for (key, window, index), count in self._local_counts.items()
+            if index >= int(now // window) - 1
+        }
+
+def _key_digest(api_key: bytes) -> str:
+    return hashlib.blake2b(api_key, digest_size=12).hexdigest()
+
+class RateLimitMiddleware:
+    """Reject over-limit clients with 429 before any service work starts
+
+    Clients are keyed on their API key when it is one of the configured
+    keys, otherwise on their address. With trusted_proxy_hops reverse
+    proxies in front, that is the X-Forwarded-For entry the outermost of
+    them appended; entries to its left are client supplied and ignored. The
+    socket peer is used when there are no proxies or the header has fewer
+    entries than hops (a request that didn't come through them).
+    """
+
+    def __init__(self, app, limiter: RateLimiter, path_prefixes: List[str], api_keys: Iterable[str] = (), trusted_proxy_hops: int = 1):
+        self.app = app
+        self.limiter = limiter
+        self.path_prefixes = tuple(path_prefixes)
+        self.api_key_digests = {_key_digest(api_key.encode()) for api_key in api_keys}
+        self.trusted_proxy_hops = trusted_proxy_hops
+
+    def _client_key(self, scope) -> str:
+        headers = dict(scope["headers"])
+        api_key = headers.get(b"x-api-key")
+        if api_key and self.api_key_digests:
+            digest = _key_digest(api_key)
+            if digest in self.api_key_digests:
+                return "key:" + digest
+        if self.trusted_proxy_hops:
+            forwarded = [entry.strip() for entry in headers.get(b"x-forwarded-for", b"").split(b",") if entry.strip()]
+            if len(forwarded) >= self.trusted_proxy_hops:
+                return "ip:" + forwarded[-self.trusted_proxy_hops].decode(errors="replace")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.limiter.check(self._client_key(scope))
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = FastJSONResponse(
+            {"success": False, "error": "Rate limit exceeded, please slow down"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, int(retry_after + 0.5)))}
+        )
+        await response(scope, receive, send)
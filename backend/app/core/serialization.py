@@ -0,0 +1,44 @@
+"""
+Fast JSON encoding and responses, using orjson when it is installed
+"""
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+from app.core.timing import stage
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as _BaseJSONResponse
+except ImportError:
+    orjson = None
+    _BaseJSONResponse = JSONResponse
+
+class FastJSONResponse(_BaseJSONResponse):
+    """JSON response whose encoding is timed as the serialize stage"""
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            return super().render(content)
+
+def dumps(value: Any) -> bytes:
+    """Encode a value as JSON bytes"""
+    if orjson is not None:
+        # Monthly baselines are keyed by month number, so allow non-string keys
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def loads(data) -> Any:
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def encoded_success_response(encoded_data: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Wrap already-encoded JSON data in the success envelope without decoding it"""
+    return Response(
+        content=b'{"success":true,"data":' + encoded_data + b"}",
+        media_type="application/json",
+        headers=headers
+    )
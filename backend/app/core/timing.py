@@ -0,0 +1,165 @@
+"""
+Per-request stage timers, exposed as a Server-Timing header and per-stage histograms
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds in milliseconds; the last bucket is unbounded
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class StageHistogram:
+    """Distribution of one stage's durations across all requests"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, duration_ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99)
+        }
+
+stage_histograms: Dict[str, StageHistogram] = {}
+
+class RequestTimings:
+    """Stage durations and cache/fallback statuses collected while serving one request"""
+
+    def __init__(self):
+        self.durations_ms: Dict[str, float] = {}
+        self.statuses: Dict[str, str] = {}
+
+    def server_timing(self, total_ms: float) -> str:
+        entries: List[str] = []
+        for name in list(self.durations_ms) + [name for name in self.statuses if name not in self.durations_ms]:
+            entry = name
+            if name in self.statuses:
+                entry += f';desc="{self.statuses[name]}"'
+            if name in self.durations_ms:
+                entry += f";dur={self.durations_ms[name]:.1f}"
+            entries.append(entry)
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+# Child tasks and to_thread calls copy the context, so stages timed there land
+# in the same request's timings
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being served, if ServerTimingMiddleware wraps it"""
+    return _current.get()
+
+def record(name: str, duration_ms: float) -> None:
+    """Add a stage duration to the current request and the stage histogram"""
+    histogram = stage_histograms.get(name)
+    if histogram is None:
+        histogram = stage_histograms[name] = StageHistogram()
+    histogram.record(duration_ms)
+    timings = _current.get()
+    if timings is not None:
+        timings.durations_ms[name] = timings.durations_ms.get(name, 0.0) + duration_ms
+
+def mark(name: str, status: str) -> None:
+    """Note how a stage was served for the current request (hit, miss or fallback)
+
+    The first status sticks, so a later re-read of a freshly written entry
+    still reports the miss; a fallback overrides whatever came before.
+    """
+    timings = _current.get()
+    if timings is not None and (status == "fallback" or name not in timings.statuses):
+        timings.statuses[name] = status
+
+class stage:
+    """Time a block as a named stage; usable around awaits as well as sync code
+
+        with stage("forecast"):
+            response = await client.get(url, params=params)
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+def expose_stage_histograms() -> List[str]:
+    """Stage histograms in the Prometheus text format, in seconds"""
+    name = "stage_duration_seconds"
+    lines = [f"# HELP {name} Time spent per analysis stage", f"# TYPE {name} histogram"]
+    for stage_name, histogram in sorted(stage_histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS + (None,), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound is None else f"{bound / 1000:g}"
+            lines.append(f'{name}_bucket{{stage="{stage_name}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage_name}"}} {histogram.total_ms / 1000:.6f}')
+        lines.append(f'{name}_count{{stage="{stage_name}"}} {histogram.count}')
+    return lines
+
+def stage_snapshot() -> Dict:
+    return {name: histogram.snapshot() for name, histogram in sorted(stage_histograms.items())}
+
+class ServerTimingMiddleware:
+    """Collect stage timings per request and report them in a Server-Timing header"""
+
+    def __init__(self, app, allowed_origins: List[str]):
+        self.app = app
+        # Browsers only show Server-Timing on cross-origin responses to origins
+        # listed in Timing-Allow-Origin
+        self.allowed_origins = {origin.encode() for origin in allowed_origins}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        origin = dict(scope["headers"]).get(b"origin")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(total_ms).encode()))
+                if origin in self.allowed_origins:
+                    headers.append((b"timing-allow-origin", origin))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            record("total", (time.perf_counter() - start) * 1000)
+            _current.reset(token)
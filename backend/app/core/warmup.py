@@ -0,0 +1,173 @@
+"""
+Startup warmup: open upstream connections, connect Redis, load the configured climate grid and
+places and analog tables, and preload hot cache entries
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.cache import local_cache
+from app.core.clients import get_http_client, get_redis_client
+from app.core.config import settings
+
+HOT_KEYS_KEY = "warmup:hot_keys"
+
+class Warmup:
+    """Run the startup phase in the background and record hot keys for the next instance
+
+    Uvicorn only accepts traffic once the lifespan startup returns, so warmup
+    runs as a task and readiness is gated on it instead; liveness answers
+    immediately. Every step is attempted even if an earlier one fails, so a
+    slow upstream delays readiness by at most warmup_timeout_seconds.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.completed = False
+        self.started_at: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        self.steps: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._recorder: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._task = asyncio.create_task(self.run())
+        self._recorder = asyncio.create_task(self._record_hot_keys_loop())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._recorder):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        # Leave this worker's hot keys behind for instances started after it
+        try:
+            await asyncio.to_thread(self._record_hot_keys)
+        except Exception as e:
+            print(f"Hot key record error: {e}")
+
+    async def run(self) -> None:
+        try:
+            await asyncio.wait_for(self._run_steps(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Warmup did not finish within {self.timeout}s; continuing cold")
+        self.completed = True
+        self.duration_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+        print(f"Warmup finished in {self.duration_ms}ms: {self.steps}")
+
+    async def _run_steps(self) -> None:
+        await asyncio.gather(
+            self._step("http_pool", self._warm_http_pool),
+            self._step("redis", self._warm_redis),
+            self._step("climate_grid", self._load_climate_grid),
+            self._step("places_table", self._load_places_table),
+            self._step("analog_index", self._load_analog_index)
+        )
+        if settings.warmup_preload_enabled:
+            await self._step("preload", self._preload)
+
+    async def _step(self, name: str, action: Callable[[], Awaitable[str]]) -> None:
+        start = time.perf_counter()
+        try:
+            message = await action()
+            ok = True
+        except Exception as e:
+            message = f"{type(e).__name__}: {e}"
+            ok = False
+        self.steps[name] = {
+            "ok": ok,
+            "message": message,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+    async def _warm_http_pool(self) -> str:
+        # One cheap request per upstream host resolves DNS and leaves an open
+        # TLS connection in the shared pool for the first real request
+        client = get_http_client()
+        results = await asyncio.gather(
+            client.get(f"{settings.geocoding_api_url}/search", params={"name": "London", "count": 1}),
+            client.get(
+                f"{settings.open_meteo_api_url}/forecast",
+                params={"latitude": 51.5074, "longitude": -0.1278, "current": "temperature_2m"}
+            ),
+            return_exceptions=True
+        )
+        failures = [f"{type(result).__name__}: {result}" for result in results if isinstance(result, Exception)]
+        if failures:
+            raise ConnectionError("; ".join(failures))
+        return f"Connected to {len(results)} upstream hosts"
+
+    async def _warm_redis(self) -> str:
+        await asyncio.to_thread(get_redis_client().ping)
+        return "Redis connection pool open"
+
+    # Each table (and numpy) is imported only when configured, and loaded in a
+    # thread; requests arriving before the grid is loaded fetch live instead
+
+    async def _load_climate_grid(self) -> str:
+        if not settings.climate_grid_path:
+            return "No climate grid configured"
+        from app.services.climate_grid import get_climate_grid
+
+        grid = await asyncio.to_thread(get_climate_grid)
+        if grid is None:
+            raise OSError(f"Could not load {settings.climate_grid_path}")
+        return f"Mapped {grid.path}"
+
+    async def _load_places_table(self) -> str:
+        if not settings.places_table_path:
+            return "No places table configured"
+        from app.services.places import get_place_table
+
+        table = await asyncio.to_thread(get_place_table)
+        if table is None:
+            raise OSError(f"Could not load {settings.places_table_path}")
+        return f"Loaded {table.size} places"
+
+    async def _load_analog_index(self) -> str:
+        if not settings.analog_index_path:
+            return "No analog index configured"
+        from app.services.analogs import get_analog_index
+
+        index = await asyncio.to_thread(get_analog_index)
+        if index is None:
+            raise OSError(f"Could not load {settings.analog_index_path}")
+        return f"Loaded {index.size} places"
+
+    async def _preload(self) -> str:
+        from app.services.climate_service import ClimateDataService
+
+        keys = await asyncio.to_thread(get_redis_client().lrange, HOT_KEYS_KEY, 0, settings.warmup_preload_max_keys - 1)
+        keys = [key.decode() for key in keys]
+        loaded = await asyncio.to_thread(ClimateDataService().preload_local_cache, keys)
+        return f"Preloaded {loaded} of {len(keys)} hot keys"
+
+    async def _record_hot_keys_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.warmup_hot_keys_interval_seconds)
+            try:
+                await asyncio.to_thread(self._record_hot_keys)
+            except Exception as e:
+                print(f"Hot key record error: {e}")
+
+    def _record_hot_keys(self) -> None:
+        keys: List[str] = local_cache.recent_keys(settings.warmup_preload_max_keys)
+        if not keys:
+            return
+        pipe = get_redis_client().pipeline(transaction=True)
+        pipe.delete(HOT_KEYS_KEY)
+        pipe.rpush(HOT_KEYS_KEY, *keys)
+        pipe.expire(HOT_KEYS_KEY, settings.warmup_hot_keys_interval_seconds * 4)
+        pipe.execute()
+
+    def snapshot(self) -> Dict:
+        return {
+            "completed": self.completed,
+            "duration_ms": self.duration_ms,
+            "steps": self.steps
+        }
+
+warmup = Warmup(timeout=settings.warmup_timeout_seconds)
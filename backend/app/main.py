@@ -1,21 +1,110 @@
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 import asyncio
+from contextlib import asynccontextmanager
 from typing import Dict, Optional
-import os
-import redis
 from datetime import datetime
-import json
+from urllib.parse import urlencode
 from app.core.config import settings
-import logging
+from app.core.access_log import AccessLogMiddleware
+from app.core.capture import TrafficCapture, TrafficCaptureMiddleware
+from app.core.profiling import ProfilingMiddleware, RequestProfiler
+from app.core.admission import AdmissionController, AdmissionMiddleware, RouteClass, overloaded_response
+from app.core.cache import local_cache
+from app.core.clients import close_http_client, get_redis_client
+from app.core.health import health_monitor
+from app.core.invalidation import CACHE_FAMILIES, invalidation_bus
+from app.core.loop_monitor import loop_monitor, loop_watchdog
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware
+from app.core.serialization import FastJSONResponse, dumps, encoded_success_response, loads
+from app.core.timing import ServerTimingMiddleware, expose_stage_histograms, stage_snapshot
+from app.core.warmup import warmup
+from app.services.providers import coordinate_provider_chain, default_provider_chain
+from app.api.climate import router as climate_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up, then run background dependency probes and cache invalidation for the lifetime of the app"""
+    if traffic_capture:
+        traffic_capture.start()
+    await warmup.start()
+    await health_monitor.start()
+    await invalidation_bus.start()
+    if settings.metrics_enabled:
+        await loop_monitor.start()
+    if settings.loop_watchdog_enabled:
+        await loop_watchdog.start()
+    yield
+    await loop_watchdog.stop()
+    await loop_monitor.stop()
+    await invalidation_bus.stop()
+    await health_monitor.stop()
+    await warmup.stop()
+    await close_http_client()
+    if traffic_capture:
+        traffic_capture.stop()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="Climate Migration API",
     description="Real-time climate data analysis for migration decisions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Admission control: per-route concurrency limits and priorities, so cheap
+# autocomplete keeps flowing while expensive analyses are shed or degraded
+if settings.admission_enabled:
+    admission_controller = AdmissionController(
+        route_classes=[
+            RouteClass(
+                "search", ["/locations/search"],
+                limit=settings.admission_search_limit,
+                max_wait=settings.admission_search_max_wait,
+                priority=0
+            ),
+            RouteClass(
+                "analyze", ["/climate/analyze"],
+                limit=settings.admission_analyze_limit,
+                max_wait=settings.admission_analyze_max_wait,
+                priority=1,
+                on_overload="degrade"
+            ),
+            RouteClass(
+                "compare", ["/climate/compare", "/climate/analyze/stream"],
+                limit=settings.admission_compare_limit,
+                max_wait=settings.admission_analyze_max_wait,
+                priority=2
+            )
+        ],
+        max_in_flight=settings.admission_max_in_flight
+    )
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        retry_after=settings.admission_retry_after_seconds
+    )
+else:
+    admission_controller = None
+
+# Per-client rate limiting (client IP or a known X-API-Key), checked before admission
+# control so over-limit clients never take a slot or reach the services
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=RateLimiter(
+            limits=[(settings.requests_per_minute, 60), (settings.requests_per_day, 86400)],
+            redis_client_factory=get_redis_client,
+            redis_retry_seconds=settings.rate_limit_redis_retry_seconds
+        ),
+        path_prefixes=settings.rate_limit_path_prefixes_list,
+        api_keys=settings.api_keys_list,
+        trusted_proxy_hops=settings.rate_limit_trusted_proxy_hops
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -25,18 +114,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add logging middleware to log all requests and responses
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    body = await request.body()
-    logging.info(f"Request: {request.method} {request.url} Body: {body.decode(errors='replace')}")
-    response = await call_next(request)
-    response_body = b""
-    async for chunk in response.body_iterator:
-        response_body += chunk
-    logging.info(f"Response status: {response.status_code} Body: {response_body.decode(errors='replace')}")
-    # Rebuild the response for the client
-    return Response(content=response_body, status_code=response.status_code, headers=dict(response.headers), media_type=response.media_type)
+# On-demand request profiling (?profile=1 with the admin token) and sampling
+# of slow requests; added inside Server-Timing so stage durations are kept
+# with each profile
+request_profiler = RequestProfiler(
+    settings.profiling_directory,
+    interval=settings.profiling_interval_ms / 1000,
+    max_profiles=settings.profiling_max_profiles
+)
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=request_profiler,
+        admin_token=settings.admin_token,
+        path_prefixes=settings.profiling_path_prefixes_list,
+        slow_sample_rate=settings.profiling_slow_sample_rate,
+        slow_threshold_ms=settings.profiling_slow_threshold_ms
+    )
+
+# Sampled traffic capture for replay; added inside Server-Timing so the
+# request's cache outcome and stage timings are recorded with it
+if settings.traffic_capture_enabled:
+    traffic_capture = TrafficCapture(
+        settings.traffic_capture_file,
+        max_bytes=settings.traffic_capture_max_bytes,
+        backup_count=settings.traffic_capture_backup_count
+    )
+    app.add_middleware(
+        TrafficCaptureMiddleware,
+        capture=traffic_capture,
+        path_prefixes=settings.traffic_capture_path_prefixes_list,
+        sample_rate=settings.traffic_capture_sample_rate,
+        max_body_bytes=settings.traffic_capture_body_max_bytes
+    )
+else:
+    traffic_capture = None
+
+# Per-stage timings (upstreams, Redis, aggregation, serialization) with
+# cache/fallback status, visible in the browser devtools
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware, allowed_origins=settings.cors_origins_list)
+
+# Request counts, latency per handler and in-flight requests for /metrics
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    registry.add_collector(expose_stage_histograms)
+    registry.gauge("local_cache_entries", "Entries in this worker's in-process cache", lambda: len(local_cache))
+    if admission_controller:
+        registry.gauge(
+            "admission_in_flight", "Requests holding an admission slot",
+            lambda: admission_controller.in_flight
+        )
+
+# Access logging: method, path, status, latency and byte counts without
+# buffering bodies; bodies are only captured for sampled, configured routes
+if settings.access_log_enabled:
+    app.add_middleware(
+        AccessLogMiddleware,
+        body_routes=settings.access_log_body_routes_map,
+        max_body_bytes=settings.access_log_body_max_bytes
+    )
+
+# Marks responses served without upstream calls because of overload
+DEGRADED_HEADERS = {"X-Service-Degraded": "overload"}
+# Set when the real analysis missed its soft deadline and a fallback provider answered
+DEADLINE_HEADERS = {"X-Service-Degraded": "deadline"}
+
+# Real analyses raced against cheaper fallbacks, so a hung upstream can't hold a request past the soft deadline
+coordinate_chain = coordinate_provider_chain()
+location_chain = default_provider_chain()
+
+def chain_response(result, headers: Optional[Dict[str, str]] = None) -> FastJSONResponse:
+    """A provider chain's analysis, saying which provider answered and flagging fallbacks in body and headers"""
+    if result.fallback:
+        headers = {**DEADLINE_HEADERS, **(headers or {})}
+    return FastJSONResponse(
+        {"success": True, "data": result.analysis, "provider": result.provider, "fallback": result.fallback},
+        headers=headers
+    )
 
 @app.get("/")
 async def root():
@@ -54,68 +209,27 @@ async def health():
 
 @app.get("/health/comprehensive")
 async def comprehensive_health():
-    """Comprehensive health check for all services"""
-    health_status = {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "checks": {},
-        "version": "1.0.0"
-    }
-    
-    # Check Redis
-    try:
-        from app.core.config import settings
-        r = redis.from_url(settings.redis_url)
-        r.ping()
-        health_status["checks"]["redis"] = {
-            "status": "healthy",
-            "message": "Redis connection successful"
-        }
-    except Exception as e:
-        health_status["checks"]["redis"] = {
-            "status": "degraded",
-            "message": f"Redis unavailable: {str(e)}"
-        }
-        health_status["status"] = "degraded"
-    
-    # Check external APIs
-    try:
-        async with httpx.AsyncClient() as client:
-            # Test Open-Meteo Geocoding API
-            response = await client.get(
-                "https://geocoding-api.open-meteo.com/v1/search?name=London&count=1",
-                timeout=5.0
-            )
-            response.raise_for_status()
-            health_status["checks"]["openmeteo_geocoding"] = {
-                "status": "healthy",
-                "message": "Open-Meteo Geocoding API responding"
-            }
-    except Exception as e:
-        health_status["checks"]["openmeteo_geocoding"] = {
-            "status": "unhealthy",
-            "message": f"Open-Meteo Geocoding API error: {str(e)}"
-        }
-        health_status["status"] = "degraded"
-    
-    # Check climate API
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.open-meteo.com/v1/forecast?latitude=51.5074&longitude=-0.1278&current=temperature_2m",
-                timeout=5.0
-            )
-            response.raise_for_status()
-            health_status["checks"]["openmeteo_climate"] = {
-                "status": "healthy",
-                "message": "Open-Meteo Climate API responding"
-            }
-    except Exception as e:
-        health_status["checks"]["openmeteo_climate"] = {
-            "status": "unhealthy",
-            "message": f"Open-Meteo Climate API error: {str(e)}"
-        }
-        health_status["status"] = "degraded"
+    """Comprehensive health check for all services, answered from the background probe snapshot"""
+    health_status = health_monitor.snapshot()
+    health_status["version"] = "1.0.0"
+    health_status["warmup"] = warmup.snapshot()
+    health_status["stage_timings"] = stage_snapshot()
+    # Only tables warmup has already loaded are reported; a health check never loads one
+    health_status["climate_grid"] = health_status["places_table"] = health_status["analog_index"] = None
+    if settings.climate_grid_path:
+        from app.services.climate_grid import loaded_climate_grid
+        climate_grid = loaded_climate_grid()
+        health_status["climate_grid"] = climate_grid.snapshot() if climate_grid else None
+    if settings.places_table_path:
+        from app.services.places import loaded_place_table
+        place_table = loaded_place_table()
+        health_status["places_table"] = place_table.snapshot() if place_table else None
+    if settings.analog_index_path:
+        from app.services.analogs import loaded_analog_index
+        analog_index = loaded_analog_index()
+        health_status["analog_index"] = analog_index.snapshot() if analog_index else None
+    if admission_controller:
+        health_status["admission"] = admission_controller.snapshot()
     
     # Check internal services
     try:
@@ -141,15 +255,20 @@ async def liveness_check():
 
 @app.get("/health/ready")
 async def readiness_check():
-    """Readiness check for Kubernetes"""
-    try:
-        # Quick Redis check
-        from app.core.config import settings
-        r = redis.from_url(settings.redis_url)
-        r.ping()
+    """Readiness check for Kubernetes, gated on startup warmup and the latest cache and upstream probes"""
+    if warmup.completed and health_monitor.is_ready():
         return {"status": "ready", "timestamp": datetime.utcnow().isoformat()}
-    except Exception:
-        return {"status": "not ready", "timestamp": datetime.utcnow().isoformat()}
+    return FastJSONResponse(
+        {"status": "not ready", "timestamp": datetime.utcnow().isoformat()},
+        status_code=503
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
 
 @app.get("/test")
 async def test():
@@ -162,7 +281,7 @@ async def test_climate(city: str):
     try:
         async with httpx.AsyncClient() as client:
             # Simple geocoding request
-            geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+            geocoding_url = f"{settings.geocoding_api_url}/search"
             params = {
                 "name": city,
                 "count": 1,
@@ -228,44 +347,216 @@ async def search_locations(q: str, limit: int = 10):
 @app.post("/climate/analyze")
 async def analyze_location(request: Request):
     """Get comprehensive climate analysis using real data"""
-    data = await request.json()
+    data = loads(await request.body())
     lat = data.get("latitude")
     lon = data.get("longitude")
     name = data.get("name")
     country = data.get("country")
     admin1 = data.get("admin1")
+    from app.services.climate_service import ClimateDataService, parse_sections, trim_analysis
+    try:
+        sections = parse_sections(data.get("sections", data.get("fields")))
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    # Set by admission control when the analyze routes are over their limits
+    degraded = getattr(request.state, "admission", None) == "degraded"
 
     print(f"Received request for: name={name}, country={country}, admin1={admin1}, lat={lat}, lon={lon}")
 
     if lat is not None and lon is not None:
         # Use coordinates directly
         location_str = f"{name}, {admin1}, {country}" if admin1 else f"{name}, {country}"
-        from app.services.climate_service import ClimateDataService
         service = ClimateDataService()
-        analysis = await service.get_comprehensive_climate_analysis_by_coords(lat, lon, name, country, admin1)
-        if not analysis:
+        # Warm path: pass the cached, already-encoded analysis straight through
+        cached = await asyncio.to_thread(service.get_cached_analysis, lat, lon, name, country, admin1) if sections is None else None
+        if cached:
+            return encoded_success_response(cached[0])
+        if degraded:
+            analysis = await service.get_degraded_analysis_by_coords(lat, lon, name, country, admin1, sections=sections)
+            return FastJSONResponse({"success": True, "data": analysis}, headers=DEGRADED_HEADERS)
+        result = await coordinate_chain.analyze(
+            location_str, latitude=lat, longitude=lon, name=name, country=country, admin1=admin1, sections=sections
+        )
+        if not result:
             return {"success": False, "error": f"Could not find climate data for coordinates: {lat}, {lon}"}
-        return {"success": True, "data": analysis}
+        return chain_response(result)
     elif name:
+        if degraded:
+            # Geocoding needs the upstream, which overloaded requests must not reach
+            return overloaded_response(settings.admission_retry_after_seconds)
         # Geocode to get lat/lon if not provided
         location_str = f"{name}, {admin1}, {country}" if admin1 else f"{name}, {country}"
-        from app.services.climate_service import ClimateDataService
         service = ClimateDataService()
         location_data = await service.get_location_coordinates(location_str)
         if location_data and location_data.get("latitude") is not None and location_data.get("longitude") is not None:
             print(f"Geocoding successful: {location_data}")
-            analysis = await service.get_comprehensive_climate_analysis_by_coords(
-                location_data["latitude"],
-                location_data["longitude"],
+            location_args = dict(
                 name=location_data.get("name", "Unknown"),
                 country=location_data.get("country", "Unknown"),
                 admin1=location_data.get("admin1", "Unknown")
             )
+            if sections is None:
+                cached = await asyncio.to_thread(
+                    service.get_cached_analysis, location_data["latitude"], location_data["longitude"], **location_args
+                )
+                if cached:
+                    return encoded_success_response(cached[0])
+            result = await coordinate_chain.analyze(
+                location_str,
+                latitude=location_data["latitude"],
+                longitude=location_data["longitude"],
+                sections=sections,
+                **location_args
+            )
         else:
             print(f"Geocoding failed, falling back to name-based analysis for: {location_str}")
-            analysis = await service.get_comprehensive_climate_analysis(location_str)
-        if not analysis:
+            result = await location_chain.analyze(location_str)
+            if result:
+                result.analysis = trim_analysis(result.analysis, sections)
+        if not result:
             return {"success": False, "error": f"Could not find climate data for location: {location_str}"}
-        return {"success": True, "data": analysis}
+        return chain_response(result)
     else:
         return {"success": False, "error": "Location parameter required"}
+
+@app.get("/climate/analyze")
+async def analyze_location_cacheable(
+    request: Request,
+    lat: float,
+    lon: float,
+    name: Optional[str] = None,
+    country: Optional[str] = None,
+    admin1: Optional[str] = None,
+    sections: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Cacheable climate analysis by grid-snapped coordinates, with ETag and Cache-Control"""
+    from app.services.climate_service import (
+        ClimateDataService, analysis_etag, analysis_uses_fallback, parse_sections, sections_cache_ttl, snap_coordinates
+    )
+    
+    try:
+        requested_sections = parse_sections(sections if sections is not None else fields)
+    except ValueError as e:
+        return FastJSONResponse({"success": False, "error": str(e)}, status_code=400)
+    
+    snapped_lat, snapped_lon = snap_coordinates(lat, lon)
+    if (snapped_lat, snapped_lon) != (lat, lon):
+        # Redirect to the canonical grid URL so browsers and edge caches share one entry per cell
+        params = {
+            "lat": snapped_lat,
+            "lon": snapped_lon,
+            "name": name,
+            "country": country,
+            "admin1": admin1,
+            "sections": ",".join(requested_sections) if requested_sections else None
+        }
+        query = urlencode({key: value for key, value in params.items() if value is not None})
+        return RedirectResponse(f"?{query}", status_code=301)
+    
+    service = ClimateDataService()
+    degraded = getattr(request.state, "admission", None) == "degraded"
+    if requested_sections is None:
+        cached = await asyncio.to_thread(service.get_cached_analysis, lat, lon, name, country, admin1)
+        if not cached and degraded:
+            analysis = await service.get_degraded_analysis_by_coords(lat, lon, name, country, admin1)
+            return FastJSONResponse({"success": True, "data": analysis}, headers={**DEGRADED_HEADERS, "Cache-Control": "no-store"})
+        if not cached:
+            result = await coordinate_chain.analyze(f"{lat}, {lon}", latitude=lat, longitude=lon, name=name, country=country, admin1=admin1)
+            if not result:
+                return FastJSONResponse({"success": False, "error": f"Could not find climate data for coordinates: {lat}, {lon}"}, status_code=502)
+            if result.fallback:
+                return chain_response(result, {"Cache-Control": "no-store"})
+            cached = await asyncio.to_thread(service.get_cached_analysis, lat, lon, name, country, admin1)
+            if not cached:
+                # Fallback data (or no cache): serve it, but keep it out of shared caches
+                return FastJSONResponse({"success": True, "data": result.analysis}, headers={"Cache-Control": "no-store"})
+        encoded, etag, ttl = cached
+        etag = f'"{etag}"' if etag else None
+    else:
+        # Partial analyses are not cached server-side, so version them by content
+        if degraded:
+            analysis = await service.get_degraded_analysis_by_coords(
+                lat, lon, name, country, admin1, sections=requested_sections
+            )
+        else:
+            result = await coordinate_chain.analyze(
+                f"{lat}, {lon}", latitude=lat, longitude=lon, name=name, country=country, admin1=admin1, sections=requested_sections
+            )
+            if not result:
+                return FastJSONResponse({"success": False, "error": f"Could not find climate data for coordinates: {lat}, {lon}"}, status_code=502)
+            if result.fallback:
+                return chain_response(result, {"Cache-Control": "no-store"})
+            analysis = result.analysis
+        if analysis_uses_fallback(analysis):
+            return FastJSONResponse({"success": True, "data": analysis}, headers={"Cache-Control": "no-store"})
+        encoded = dumps(analysis)
+        # Weak tag: equivalent content apart from the compile timestamp
+        unstamped = {key: value for key, value in analysis.items() if key != "last_updated"}
+        etag, ttl = f'W/"{analysis_etag(dumps(unstamped))}"', sections_cache_ttl(requested_sections)
+    
+    headers = {"Cache-Control": f"public, max-age={ttl}"}
+    if etag:
+        headers["ETag"] = etag
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    return encoded_success_response(encoded, headers=headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 specifies)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates
+    )
+
+@app.post("/admin/cache/invalidate")
+async def invalidate_cache(request: Request, x_admin_token: Optional[str] = Header(None)):
+    """Drop cache keys or whole families in every worker, optionally purging Redis and bumping the scoring version"""
+    if not settings.admin_token or x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    
+    body = await request.body()
+    data = loads(body) if body else {}
+    families = data.get("families", [])
+    unknown = [family for family in families if family not in CACHE_FAMILIES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown cache families: {', '.join(unknown)} (expected any of {', '.join(CACHE_FAMILIES)})"
+        )
+    
+    try:
+        result = await invalidation_bus.invalidate(
+            keys=data.get("keys", []),
+            families=families,
+            purge=bool(data.get("purge", False)),
+            bump_scoring_version=bool(data.get("bump_scoring_version", False))
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Cache invalidation failed: {e}")
+    return {"success": True, "data": result}
+
+@app.get("/admin/profiles")
+async def list_profiles(limit: int = 50, x_admin_token: Optional[str] = Header(None)):
+    """Most recent stored request profiles with their timing metadata"""
+    if not settings.admin_token or x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    profiles = await asyncio.to_thread(request_profiler.list_profiles, limit)
+    return {"success": True, "data": profiles}
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Folded stacks of one profile, for flamegraph.pl or speedscope"""
+    if not settings.admin_token or x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    folded = await asyncio.to_thread(request_profiler.read, profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    return PlainTextResponse(folded)
+
+# Structured climate routes (comparison etc.); registered last so the
+# endpoints defined above take precedence on shared paths
+app.include_router(climate_router)
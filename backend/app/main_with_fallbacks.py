@@ -7,7 +7,8 @@ import httpx
 import asyncio
 from typing import Dict, Optional
 import os
-import traceback
+from app.core.config import settings
+from app.services.providers import default_provider_chain
 
 app = FastAPI(
     title="Climate Migration API",
@@ -15,6 +16,8 @@ app = FastAPI(
     version="1.0.0"
 )
 
+provider_chain = default_provider_chain()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -43,7 +46,7 @@ async def test():
 
 @app.post("/climate/analyze")
 async def analyze_location_with_fallback(request: dict):
-    """Get comprehensive climate analysis with multiple fallbacks"""
+    """Get comprehensive climate analysis, racing fallbacks against a slow upstream"""
     location = request.get("location", "")
     
     print(f"🔍 Received request for location: {location}")
@@ -51,90 +54,15 @@ async def analyze_location_with_fallback(request: dict):
     if not location:
         return {"success": False, "error": "Location parameter required"}
     
-    # Try Method 1: Full climate service
-    try:
-        print("🚀 Attempting full climate service...")
-        from app.services.climate_service import ClimateDataService
-        
-        service = ClimateDataService()
-        analysis = await service.get_comprehensive_climate_analysis(location)
-        
-        if analysis:
-            print(f"✅ Full climate service successful for {location}")
-            return {"success": True, "data": analysis}
-        else:
-            print("⚠️  Full climate service returned None")
-            
-    except Exception as e:
-        print(f"❌ Full climate service failed: {str(e)}")
-        print("📋 Full traceback:")
-        traceback.print_exc()
-    
-    # Try Method 2: Simple climate service
-    try:
-        print("🔄 Attempting simple climate service...")
-        from app.services.simple_climate_service import SimpleClimateService
-        
-        simple_service = SimpleClimateService()
-        analysis = await simple_service.get_simple_analysis(location)
-        
-        if analysis:
-            print(f"✅ Simple climate service successful for {location}")
-            return {"success": True, "data": analysis}
-        else:
-            print("⚠️  Simple climate service returned None")
-            
-    except Exception as e:
-        print(f"❌ Simple climate service failed: {str(e)}")
-        traceback.print_exc()
-    
-    # Method 3: Hardcoded fallback
-    print("🆘 Using hardcoded fallback...")
-    try:
-        hardcoded_analysis = {
-            "location": {
-                "name": location.split(",")[0].strip(),
-                "country": "Unknown",
-                "latitude": 50.0,
-                "longitude": 2.0,
-                "population": 100000
-            },
-            "current_climate": {
-                "current_temperature": 15.0,
-                "current_humidity": 65,
-                "avg_temp_max": 20.0,
-                "avg_temp_min": 10.0,
-                "total_precipitation": 80
-            },
-            "projections": {
-                "temperature_change_2050": 1.8,
-                "current_avg_temp": 15.0,
-                "future_avg_temp": 16.8,
-                "extreme_heat_days_current": 5,
-                "extreme_heat_days_future": 12,
-                "precipitation_change_percent": 8.5
-            },
-            "resilience_score": 75,
-            "risk_assessment": {
-                "risk_level": "Moderate",
-                "description": "Climate analysis temporarily unavailable - using fallback data.",
-                "temperature_impact": "+1.8°C by 2050",
-                "key_concerns": ["Rising temperatures"]
-            },
-            "recommendations": [
-                "Monitor local climate adaptation plans",
-                "Consider energy-efficient systems"
-            ],
-            "last_updated": "2025-07-05T12:00:00Z",
-            "data_source": "hardcoded-fallback"
+    result = await provider_chain.analyze(location)
+    if result:
+        print(f"✅ {result.provider} answered for {location}")
+        return {
+            "success": True,
+            "data": result.analysis,
+            "provider": result.provider,
+            "fallback": result.fallback
         }
-        
-        print(f"✅ Hardcoded fallback successful for {location}")
-        return {"success": True, "data": hardcoded_analysis}
-        
-    except Exception as e:
-        print(f"❌ Even hardcoded fallback failed: {str(e)}")
-        traceback.print_exc()
     
     # Final fallback
     return {
@@ -149,7 +77,7 @@ async def test_climate(city: str):
     """Test endpoint to fetch real climate data"""
     try:
         async with httpx.AsyncClient() as client:
-            geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+            geocoding_url = f"{settings.geocoding_api_url}/search"
             params = {
                 "name": city,
                 "count": 1,
@@ -0,0 +1,125 @@
+"""
+Climate-analog search: places whose climate in one period matches a reference's in another
+
+Each place is described by two vectors of monthly mean maximum and minimum
+temperature and precipitation: its 1990-2020 baseline, and that baseline
+shifted by its projected 2050 temperature and precipitation change.
+Features are standardized with the spread of the baseline vectors, so a
+degree of temperature and a millimetre of rain count in proportion to how
+much they vary between places. tools/build_analog_index.py writes the
+index; a search is one matrix-vector product and a partial sort.
+"""
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# Monthly baseline fields making up a vector, each as 12 consecutive values
+ANALOG_FEATURES = ("avg_temp_max", "avg_temp_min", "avg_precipitation")
+VECTOR_SIZE = 12 * len(ANALOG_FEATURES)
+
+# "future": places whose 2050 climate matches the reference's present one;
+# "present": places whose present climate matches the reference's 2050 one
+ANALOG_MODES = ("future", "present")
+
+PLACE_FIELDS = ("name", "country", "admin1", "latitude", "longitude", "population")
+
+def climate_vectors(baseline: Dict, projections: Dict, latitude: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Present and 2050 vectors of a location from its baseline and projections, or None without monthly data"""
+    months = baseline.get("monthly_baselines") or {}
+    rows = []
+    for month in range(1, 13):
+        values = months.get(str(month))
+        if not values or any(values.get(feature) is None for feature in ANALOG_FEATURES):
+            return None
+        rows.append([values[feature] for feature in ANALOG_FEATURES])
+    present = np.array(rows, dtype=np.float32)
+    if latitude < 0:
+        # Align seasons, so a southern July is compared with a northern January
+        present = np.roll(present, 6, axis=0)
+    future = present.copy()
+    future[:, :2] += projections.get("temperature_change_2050", 0)
+    future[:, 2] *= max(1 + projections.get("precipitation_change_percent", 0) / 100, 0)
+    return present.T.ravel(), future.T.ravel()
+
+class AnalogIndex:
+    """Standardized present and 2050 vectors of a set of places, searched by brute-force nearest neighbours
+
+    Exact search over tens of thousands of 36-value vectors takes about a
+    millisecond, so no approximate structure is needed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with np.load(path, allow_pickle=False) as stored:
+            self.places = {field: stored[field] for field in PLACE_FIELDS}
+            self.vectors = {"present": stored["present"], "future": stored["future"]}
+            self.mean = stored["mean"]
+            self.scale = stored["scale"]
+            self.meta = json.loads(str(stored["meta"])) if "meta" in stored.files else {}
+        if self.vectors["present"].shape[1:] != (VECTOR_SIZE,):
+            raise ValueError(f"{path} has vectors of shape {self.vectors['present'].shape}, expected (n, {VECTOR_SIZE})")
+        self.size = len(self.places["name"])
+        # Squared norms, so distances are one matrix-vector product
+        self.norms = {period: np.einsum("ij,ij->i", vectors, vectors) for period, vectors in self.vectors.items()}
+
+    def standardize(self, vector: np.ndarray) -> np.ndarray:
+        return ((vector - self.mean) / self.scale).astype(np.float32)
+
+    def search(self, vector: np.ndarray, k: int, period: str) -> List[Dict]:
+        """The k places whose vectors for the period ("present" or "future") are nearest to a raw vector"""
+        query = self.standardize(vector)
+        vectors = self.vectors[period]
+        squared = self.norms[period] - 2 * (vectors @ query) + query @ query
+        k = min(k, self.size)
+        nearest = np.argpartition(squared, k - 1)[:k] if k < self.size else np.arange(self.size)
+        nearest = nearest[np.argsort(squared[nearest])]
+        # Root-mean-square difference per feature, in standard deviations
+        distances = np.sqrt(np.maximum(squared[nearest], 0) / VECTOR_SIZE).tolist()
+        places = {field: column[nearest].tolist() for field, column in self.places.items()}
+        return [
+            {
+                "rank": i + 1,
+                **{field: places[field][i] for field in PLACE_FIELDS},
+                "admin1": places["admin1"][i] or None,
+                "distance": round(distances[i], 4)
+            }
+            for i in range(len(nearest))
+        ]
+
+    def snapshot(self) -> Dict:
+        return {"path": self.path, "places": self.size, **self.meta}
+
+def standardization(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-feature mean and spread to standardize vectors with"""
+    mean = vectors.mean(axis=0)
+    scale = vectors.std(axis=0)
+    # A feature that doesn't vary (e.g. a rainless month everywhere) must not divide by zero
+    scale[scale < 1e-6] = 1.0
+    return mean.astype(np.float32), scale.astype(np.float32)
+
+_index: Optional[AnalogIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+def get_analog_index() -> Optional[AnalogIndex]:
+    """Process-wide index loaded from ANALOG_INDEX_PATH, or None when not configured or unreadable"""
+    global _index, _index_loaded
+    if not _index_loaded:
+        # Concurrent first callers wait for the load instead of seeing None
+        with _index_lock:
+            if not _index_loaded:
+                if settings.analog_index_path:
+                    try:
+                        _index = AnalogIndex(settings.analog_index_path)
+                    except (OSError, ValueError, KeyError) as e:
+                        print(f"Analog index not available, analog search disabled: {e}")
+                _index_loaded = True
+    return _index
+
+def loaded_analog_index() -> Optional[AnalogIndex]:
+    """The index if get_analog_index has already loaded it; never loads"""
+    return _index
@@ -0,0 +1,298 @@
+"""
+Precomputed climate summaries per grid cell, served from a memory-mapped file
+
+The file holds a JSON header followed by one fixed-size record per cell of a
+regular latitude/longitude grid. Workers map it read-only, so every process
+shares the same page-cache copy and a lookup is an index computation plus a
+record read. tools/build_climate_grid.py writes it offline from the same
+upstream series the live pipeline fetches, aggregated the same way.
+"""
+import json
+import math
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+MAGIC = b"CLIMGRID"
+FORMAT_VERSION = 1
+# Records start on this boundary so they stay aligned when mapped
+DATA_ALIGNMENT = 64
+
+# Temperatures and precipitation are stored in hundredths, the precipitation change in tenths of a percent
+VALUE_SCALE = 100
+CHANGE_SCALE = 10
+
+CELL_DTYPE = np.dtype([
+    ("present", "u1"),
+    ("baseline_temp_max", "<i2", (12,)),
+    ("baseline_temp_min", "<i2", (12,)),
+    ("baseline_precipitation", "<i2", (12,)),
+    ("baseline_points", "<u2", (12,)),
+    ("recent_temp_max", "<i2", (12,)),
+    ("recent_temp_min", "<i2", (12,)),
+    ("recent_precipitation", "<i2", (12,)),
+    ("recent_points", "<u2", (12,)),
+    ("recent_annual_temp", "<i2"),
+    ("projection_current_temp", "<i2"),
+    ("projection_future_temp", "<i2"),
+    ("projection_temp_change", "<i2"),
+    ("projection_heat_days_current", "<u2"),
+    ("projection_heat_days_future", "<u2"),
+    ("projection_precipitation_change", "<i2")
+])
+
+# Same windows the live projection summary uses: 2024-2030 against 2045-2050
+PROJECTION_CURRENT_DAYS = 365 * 7
+PROJECTION_FUTURE_DAYS = 365 * 6
+EXTREME_HEAT_THRESHOLD = 35
+
+class ClimateGrid:
+    """A grid file mapped into memory; cells without a record fall back to live fetches"""
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        with open(path, "rb") as grid_file:
+            if grid_file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a climate grid file")
+            header_length = int.from_bytes(grid_file.read(4), "little")
+            self.header = json.loads(grid_file.read(header_length))
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has grid format {self.header.get('format_version')}, expected {FORMAT_VERSION}")
+        self.resolution = self.header["resolution"]
+        self.lat_min = self.header["lat_min"]
+        self.lon_min = self.header["lon_min"]
+        self.rows = self.header["rows"]
+        self.cols = self.header["cols"]
+        # A global grid's last column would repeat its first (-180° and 180° are the same meridian)
+        self.wraps = self.header.get("wraps_longitude", False)
+        self.cells = np.memmap(
+            path, dtype=CELL_DTYPE, mode="r+" if writable else "r",
+            offset=_data_offset(header_length), shape=(self.rows, self.cols)
+        )
+
+    @classmethod
+    def create(cls, path: str, resolution: float, bounds: Tuple[float, float, float, float], metadata: Dict) -> "ClimateGrid":
+        """Write an empty grid file (no cell present) covering bounds = (lat_min, lat_max, lon_min, lon_max)"""
+        lat_min, lat_max, lon_min, lon_max = bounds
+        rows = int(round((lat_max - lat_min) / resolution)) + 1
+        wraps = lon_max - lon_min >= 360
+        cols = int(round(360 / resolution)) if wraps else int(round((lon_max - lon_min) / resolution)) + 1
+        header = {
+            "format_version": FORMAT_VERSION,
+            "resolution": resolution,
+            "lat_min": lat_min,
+            "lon_min": lon_min,
+            "rows": rows,
+            "cols": cols,
+            "wraps_longitude": wraps,
+            "created": datetime.utcnow().isoformat(),
+            **metadata
+        }
+        encoded = json.dumps(header).encode()
+        offset = _data_offset(len(encoded))
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as grid_file:
+            grid_file.write(MAGIC + len(encoded).to_bytes(4, "little") + encoded)
+            grid_file.write(b"\0" * (offset - grid_file.tell()))
+            # Sparse on most filesystems until cells are written
+            grid_file.truncate(offset + rows * cols * CELL_DTYPE.itemsize)
+        return cls(path, writable=True)
+
+    def cell_index(self, latitude: float, longitude: float) -> Optional[Tuple[int, int]]:
+        """Row and column of the cell nearest to a point, or None outside the grid"""
+        row = int(math.floor((latitude - self.lat_min) / self.resolution + 0.5))
+        col = int(math.floor((longitude - self.lon_min) / self.resolution + 0.5))
+        if self.wraps:
+            col %= self.cols
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def cell_center(self, row: int, col: int) -> Tuple[float, float]:
+        return round(self.lat_min + row * self.resolution, 6), round(self.lon_min + col * self.resolution, 6)
+
+    def cell(self, latitude: float, longitude: float):
+        """The record of the cell containing a point, or None if that cell wasn't built"""
+        index = self.cell_index(latitude, longitude)
+        if index is None:
+            return None
+        record = self.cells[index]
+        return record if record["present"] else None
+
+    def dataset(self, dataset: str, latitude: float, longitude: float) -> Optional[Dict]:
+        """A dataset ("baseline", "recent" or "projections") in the shape the live pipeline returns"""
+        record = self.cell(latitude, longitude)
+        if record is None:
+            return None
+        if dataset == "baseline":
+            return self._baseline(record)
+        if dataset == "recent":
+            return self._recent(record)
+        if dataset == "projections":
+            return self._projections(record)
+        return None
+
+    def _baseline(self, record) -> Dict:
+        return {
+            "monthly_baselines": _monthly(record, "baseline"),
+            "baseline_period": self.header["baseline_period"],
+            "data_source": "open-meteo-archive",
+            "last_updated": self.header["created"]
+        }
+
+    def _recent(self, record) -> Dict:
+        month = datetime.now().month
+        return {
+            "current_month": month,
+            "current_month_data": _monthly(record, "recent")[str(month)],
+            "annual_avg_temp": int(record["recent_annual_temp"]) / VALUE_SCALE,
+            "period": self.header["recent_period"],
+            "data_source": "open-meteo-archive",
+            "last_updated": self.header["created"]
+        }
+
+    def _projections(self, record) -> Dict:
+        return {
+            "temperature_change_2050": int(record["projection_temp_change"]) / VALUE_SCALE,
+            "current_avg_temp": round(int(record["projection_current_temp"]) / VALUE_SCALE, 1),
+            "future_avg_temp": round(int(record["projection_future_temp"]) / VALUE_SCALE, 1),
+            "extreme_heat_days_current": int(record["projection_heat_days_current"]),
+            "extreme_heat_days_future": int(record["projection_heat_days_future"]),
+            "precipitation_change_percent": int(record["projection_precipitation_change"]) / CHANGE_SCALE,
+            "last_updated": self.header["created"],
+            "data_source": "open-meteo-climate",
+            "model": self.header["projection_model"]
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "path": self.path,
+            "resolution": self.resolution,
+            "rows": self.rows,
+            "cols": self.cols,
+            "lat_min": self.lat_min,
+            "lon_min": self.lon_min,
+            "baseline_period": self.header["baseline_period"],
+            "recent_period": self.header["recent_period"],
+            "created": self.header["created"]
+        }
+
+def _data_offset(header_length: int) -> int:
+    unaligned = len(MAGIC) + 4 + header_length
+    return (unaligned + DATA_ALIGNMENT - 1) // DATA_ALIGNMENT * DATA_ALIGNMENT
+
+def _monthly(record, prefix: str) -> Dict[str, Dict]:
+    # String month keys, as monthly data has after a round trip through the cache
+    temp_max = record[f"{prefix}_temp_max"].tolist()
+    temp_min = record[f"{prefix}_temp_min"].tolist()
+    precipitation = record[f"{prefix}_precipitation"].tolist()
+    points = record[f"{prefix}_points"].tolist()
+    return {
+        str(month + 1): {
+            "avg_temp_max": temp_max[month] / VALUE_SCALE,
+            "avg_temp_min": temp_min[month] / VALUE_SCALE,
+            "avg_precipitation": precipitation[month] / VALUE_SCALE,
+            "data_points": points[month]
+        }
+        for month in range(12)
+    }
+
+def _series(daily: Dict, variable: str) -> np.ndarray:
+    """A daily variable as floats, with missing values as NaN"""
+    return np.array([np.nan if value is None else value for value in daily.get(variable, [])], dtype=float)
+
+def _monthly_means(daily: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per-month means of max/min temperature and precipitation, and the number of max-temperature values
+
+    Mirrors ClimateDataService._calculate_monthly_baselines: only days for which
+    all three series have an entry count, missing values are skipped and empty
+    months get the same defaults.
+    """
+    temp_max, temp_min, precipitation = (_series(daily, variable) for variable in ("temperature_2m_max", "temperature_2m_min", "precipitation_sum"))
+    days = min(len(daily.get("time", [])), len(temp_max), len(temp_min), len(precipitation))
+    months = np.array([int(day[5:7]) for day in daily.get("time", [])[:days]], dtype=int)
+    results = []
+    for values, default in ((temp_max[:days], 15.0), (temp_min[:days], 5.0), (precipitation[:days], 50.0)):
+        results.append(np.array([_mean(values[months == month], default) for month in range(1, 13)]))
+    points = np.array([np.count_nonzero((months == month) & ~np.isnan(temp_max[:days])) for month in range(1, 13)])
+    return results[0], results[1], results[2], points
+
+def fill_baseline(record, daily: Dict) -> None:
+    """Store monthly baselines computed from the 1990-2020 daily archive"""
+    temp_max, temp_min, precipitation, points = _monthly_means(daily)
+    record["baseline_temp_max"] = _scaled(temp_max)
+    record["baseline_temp_min"] = _scaled(temp_min)
+    record["baseline_precipitation"] = _scaled(precipitation)
+    record["baseline_points"] = points
+
+def fill_recent(record, daily: Dict) -> None:
+    """Store per-month and annual averages from the recent 5-year archive"""
+    temp_max, temp_min, precipitation, points = _monthly_means(daily)
+    record["recent_temp_max"] = _scaled(temp_max)
+    record["recent_temp_min"] = _scaled(temp_min)
+    record["recent_precipitation"] = _scaled(precipitation)
+    record["recent_points"] = points
+    daily_max, daily_min = _series(daily, "temperature_2m_max"), _series(daily, "temperature_2m_min")
+    days = min(len(daily_max), len(daily_min))
+    record["recent_annual_temp"] = _scaled(_mean((daily_max[:days] + daily_min[:days]) / 2, 15.0))
+
+def fill_projections(record, daily: Dict) -> None:
+    """Store the warming, heat-day and precipitation summary of the 2024-2050 model run
+
+    Mirrors ClimateDataService._summarize_projections.
+    """
+    temp_max = _series(daily, "temperature_2m_max")
+    current = temp_max[:PROJECTION_CURRENT_DAYS]
+    future = temp_max[-PROJECTION_FUTURE_DAYS:] if temp_max.size else temp_max
+    current_avg = _mean(current, 0.0)
+    future_avg = _mean(future, 0.0)
+    record["projection_current_temp"] = _scaled(current_avg)
+    record["projection_future_temp"] = _scaled(future_avg)
+    record["projection_temp_change"] = _scaled(round(future_avg - current_avg, 2))
+    record["projection_heat_days_current"] = int(np.count_nonzero(current > EXTREME_HEAT_THRESHOLD))
+    record["projection_heat_days_future"] = int(np.count_nonzero(future > EXTREME_HEAT_THRESHOLD))
+
+    precipitation = _series(daily, "precipitation_sum")
+    change = 0.0
+    if precipitation.size >= 365 * 10:
+        current_precipitation = _mean(precipitation[:PROJECTION_CURRENT_DAYS], 0.0)
+        future_precipitation = _mean(precipitation[-PROJECTION_FUTURE_DAYS:], 0.0)
+        if current_precipitation != 0:
+            change = round((future_precipitation - current_precipitation) / current_precipitation * 100, 1)
+    record["projection_precipitation_change"] = int(np.clip(round(change * CHANGE_SCALE), -32768, 32767))
+
+def _mean(values: np.ndarray, default: float) -> float:
+    """Mean of the non-missing values, or the default when there are none"""
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else default
+
+def _scaled(values):
+    return np.clip(np.round(np.asarray(values, dtype=float) * VALUE_SCALE), -32768, 32767).astype("<i2")
+
+_grid: Optional[ClimateGrid] = None
+_grid_loaded = False
+_grid_lock = threading.Lock()
+
+def get_climate_grid() -> Optional[ClimateGrid]:
+    """Process-wide grid mapped from CLIMATE_GRID_PATH, or None when not configured or unreadable"""
+    global _grid, _grid_loaded
+    if not _grid_loaded:
+        # Concurrent first callers wait for the load instead of seeing None
+        with _grid_lock:
+            if not _grid_loaded:
+                if settings.climate_grid_path:
+                    try:
+                        _grid = ClimateGrid(settings.climate_grid_path)
+                    except (OSError, ValueError) as e:
+                        print(f"Climate grid not available, using live fetches: {e}")
+                _grid_loaded = True
+    return _grid
+
+def loaded_climate_grid() -> Optional[ClimateGrid]:
+    """The grid if get_climate_grid has already loaded it; never loads, so safe on the event loop"""
+    return _grid
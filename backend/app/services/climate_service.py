@@ -1,19 +1,142 @@
-import httpx
 import asyncio
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import json
-import redis
 import calendar
+import contextvars
+import hashlib
 import math
+import time
+from app.core.cache import get_scoring_version, local_cache
+from app.core.clients import get_http_client, get_redis_client
 from app.core.config import settings
+from app.core.metrics import cache_requests, fallbacks_generated
+from app.core.serialization import dumps, loads
+from app.core.timing import mark, stage
+from app.services.interpolation import GEO_MAX_LATITUDE, geo_index_key, idw, parse_cell, surrounds
+from app.services.scoring import resilience_score, score_factors, weighted_score
 import re
 
+# Timing stage reported for each cache key family
+CACHE_STAGES = {
+    "location_search": "geocoding",
+    "geocoding": "geocoding",
+    "historical_baseline": "archive",
+    "current_climate": "forecast",
+    "recent_climate": "recent",
+    "climate_projections": "projections",
+    "full_analysis": "analysis"
+}
+
+# Timing stage reported for each dataset
+DATASET_STAGES = {"current": "forecast", "recent": "recent", "baseline": "archive", "projections": "projections"}
+
+# Cache key family of each dataset the climate grid can answer
+GRID_CACHE_FAMILIES = {"recent": "recent_climate", "baseline": "historical_baseline", "projections": "climate_projections"}
+
+# Cache key family of each dataset that can be interpolated from neighbouring cells
+INTERPOLATED_CACHE_FAMILIES = {"current": "current_climate", **GRID_CACHE_FAMILIES}
+
+# Exact analyses being fetched in the background after an interpolated answer, by cache key
+_exact_fetches: Dict[str, asyncio.Task] = {}
+
+# Full analyses are cached for 6 hours
+ANALYSIS_CACHE_TTL = 21600
+
+def snap_coordinates(latitude: float, longitude: float) -> Tuple[float, float]:
+    """Snap coordinates to the configured analysis grid"""
+    grid = settings.coordinate_grid_degrees
+    return round(round(latitude / grid) * grid, 6), round(round(longitude / grid) * grid, 6)
+
+def coordinate_key(latitude: float, longitude: float) -> str:
+    """Grid-snapped "lat:lon" fragment for cache keys, so nearby points share entries"""
+    latitude, longitude = snap_coordinates(latitude, longitude)
+    return f"{latitude}:{longitude}"
+
+# Sections of a comprehensive analysis, in the order they are compiled
+ANALYSIS_SECTIONS = (
+    "location",
+    "current_climate",
+    "climate_variations",
+    "annual_temp_increase",
+    "projections",
+    "resilience_score",
+    "score_factors",
+    "risk_assessment",
+    "recommendations"
+)
+
+# Upstream datasets each analysis section is computed from
+SECTION_DATASETS = {
+    "location": (),
+    "current_climate": ("current",),
+    "climate_variations": ("recent", "baseline"),
+    "annual_temp_increase": ("recent", "baseline"),
+    "projections": ("projections",),
+    "resilience_score": ("projections",),
+    "score_factors": ("projections",),
+    "risk_assessment": ("projections",),
+    "recommendations": ("projections",)
+}
+
+DATASETS = ("current", "recent", "baseline", "projections")
+
+# How long each upstream dataset is cached, in seconds
+DATASET_CACHE_TTLS = {
+    "current": 3600,
+    "recent": 86400,
+    "baseline": 2592000,
+    "projections": 86400
+}
+
+def parse_sections(value) -> Optional[Tuple[str, ...]]:
+    """Parse a sections/fields parameter (list or comma-separated string); None means everything"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    sections = tuple(dict.fromkeys(section.strip() for section in value if section and section.strip()))
+    unknown = [section for section in sections if section not in SECTION_DATASETS]
+    if unknown:
+        raise ValueError(f"Unknown analysis sections: {', '.join(unknown)}")
+    if not sections or set(sections) == set(ANALYSIS_SECTIONS):
+        return None
+    return sections
+
+def plan_datasets(sections: Optional[Tuple[str, ...]]) -> Tuple[str, ...]:
+    """Upstream datasets needed to compute the requested sections"""
+    if sections is None:
+        return DATASETS
+    needed = {dataset for section in sections for dataset in SECTION_DATASETS[section]}
+    return tuple(dataset for dataset in DATASETS if dataset in needed)
+
+def sections_cache_ttl(sections: Optional[Tuple[str, ...]]) -> int:
+    """How long an analysis of the given sections stays fresh: the shortest TTL of its datasets"""
+    return min((DATASET_CACHE_TTLS[dataset] for dataset in plan_datasets(sections)), default=ANALYSIS_CACHE_TTL)
+
+def analysis_etag(encoded: bytes) -> str:
+    """Version tag for an encoded analysis"""
+    return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+def analysis_uses_fallback(analysis: Dict) -> bool:
+    """Whether any section of an analysis was built from generated fallback data"""
+    return any(
+        isinstance(section, dict) and section.get("data_source") == "fallback-realistic"
+        for section in analysis.values()
+    )
+
+def trim_analysis(analysis: Dict, sections: Optional[Tuple[str, ...]]) -> Dict:
+    """Keep only the requested sections of an analysis"""
+    if sections is None:
+        return analysis
+    trimmed = {section: analysis[section] for section in ANALYSIS_SECTIONS if section in sections and section in analysis}
+    trimmed["last_updated"] = analysis.get("last_updated")
+    return trimmed
+
 class ClimateDataService:
     def __init__(self):
         # Try to initialize Redis, but fall back to no caching if it fails
         try:
-            self.redis_client = redis.from_url(settings.redis_url)
+            self.redis_client = get_redis_client()
             self.use_cache = True
         except Exception as e:
             print(f"Redis not available, running without cache: {e}")
@@ -26,161 +149,148 @@ class ClimateDataService:
         cache_key = f"location_search:{query.lower()}"
         
         # Check cache first (if available)
-        if self.use_cache and self.redis_client:
-            cached_data = self.redis_client.get(cache_key)
-            if cached_data:
-                return json.loads(cached_data)
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{settings.geocoding_api_url}/search"
-                params = {
-                    "name": query,
-                    "count": limit,
-                    "language": "en",
-                    "format": "json"
-                }
+        client = get_http_client()
+        try:
+            url = f"{settings.geocoding_api_url}/search"
+            params = {
+                "name": query,
+                "count": limit,
+                "language": "en",
+                "format": "json"
+            }
                 
+            with stage("geocoding"):
                 response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                locations = []
-                
-                if data.get("results"):
-                    for result in data["results"]:
-                        location = {
-                            "name": result.get("name"),
-                            "country": result.get("country"),
-                            "admin1": result.get("admin1"),
-                            "latitude": result.get("latitude"),
-                            "longitude": result.get("longitude"),
-                            "population": result.get("population"),
-                            "timezone": result.get("timezone"),
-                            "display_name": f"{result.get('name')}, {result.get('admin1', '')}, {result.get('country', '')}".strip(", ")
-                        }
-                        locations.append(location)
-                
-                # Cache the results (if available)
-                if self.use_cache and self.redis_client:
-                    self.redis_client.setex(cache_key, 3600, json.dumps(locations))
-                
-                return locations
+            response.raise_for_status()
                 
-            except Exception as e:
-                print(f"Location search error for {query}: {e}")
-                return []
+            data = loads(response.content)
+            locations = []
+                
+            if data.get("results"):
+                for result in data["results"]:
+                    location = {
+                        "name": result.get("name"),
+                        "country": result.get("country"),
+                        "admin1": result.get("admin1"),
+                        "latitude": result.get("latitude"),
+                        "longitude": result.get("longitude"),
+                        "population": result.get("population"),
+                        "timezone": result.get("timezone"),
+                        "display_name": f"{result.get('name')}, {result.get('admin1', '')}, {result.get('country', '')}".strip(", ")
+                    }
+                    locations.append(location)
+                
+            # Cache the results (if available)
+            self._cache_set(cache_key, 3600, locations)
+                
+            return locations
+                
+        except Exception as e:
+            print(f"Location search error for {query}: {e}")
+            return []
     
     async def get_location_coordinates(self, location_name: str) -> Optional[Dict]:
         """Get coordinates for a location using geocoding API"""
         cache_key = f"geocoding:{location_name.lower()}"
 
         # Check cache first (if available)
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
 
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                url = f"{settings.geocoding_api_url}/search"
-                params = {
-                    "name": location_name,
-                    "count": 1,
-                    "language": "en",
-                    "format": "json"
+        client = get_http_client()
+        try:
+            url = f"{settings.geocoding_api_url}/search"
+            params = {
+                "name": location_name,
+                "count": 1,
+                "language": "en",
+                "format": "json"
+            }
+            print(f"Making geocoding request to: {url}")
+            print(f"Parameters: {params}")
+            with stage("geocoding"):
+                response = await client.get(url, params=params, timeout=10.0)
+            print(f"Geocoding response status: {response.status_code}")
+            response.raise_for_status()
+            data = loads(response.content)
+            print(f"Geocoding response data: {data}")
+            if data.get("results") and len(data["results"]) > 0:
+                result = data["results"][0]
+                location_data = {
+                    "name": result.get("name"),
+                    "country": result.get("country"),
+                    "latitude": result.get("latitude"),
+                    "longitude": result.get("longitude"),
+                    "population": result.get("population"),
+                    "timezone": result.get("timezone")
                 }
-                print(f"Making geocoding request to: {url}")
-                print(f"Parameters: {params}")
-                response = await client.get(url, params=params)
-                print(f"Geocoding response status: {response.status_code}")
-                response.raise_for_status()
-                data = response.json()
-                print(f"Geocoding response data: {data}")
-                if data.get("results") and len(data["results"]) > 0:
-                    result = data["results"][0]
-                    location_data = {
-                        "name": result.get("name"),
-                        "country": result.get("country"),
-                        "latitude": result.get("latitude"),
-                        "longitude": result.get("longitude"),
-                        "population": result.get("population"),
-                        "timezone": result.get("timezone")
-                    }
-                    print(f"Found location data: {location_data}")
-                    # Cache the result (if available)
-                    if self.use_cache and self.redis_client:
-                        try:
-                            self.redis_client.setex(
-                                cache_key, 
-                                self.cache_ttl * 7,  # Cache geocoding for 7 days
-                                json.dumps(location_data)
-                            )
-                        except Exception as e:
-                            print(f"Cache write error: {e}")
-                    return location_data
-                else:
-                    print(f"No results found for location: {location_name}")
-                    return None
-            except Exception as e:
-                print(f"Geocoding error for {location_name}: {e}")
+                print(f"Found location data: {location_data}")
+                # Cache the result (if available)
+                self._cache_set(cache_key, self.cache_ttl * 7, location_data)  # Cache geocoding for 7 days
+                return location_data
+            else:
+                print(f"No results found for location: {location_name}")
                 return None
+        except Exception as e:
+            print(f"Geocoding error for {location_name}: {e}")
+            return None
     
     async def get_historical_climate_baseline(self, latitude: float, longitude: float) -> Optional[Dict]:
         """Get historical climate baseline (1990 or earliest available)"""
-        cache_key = f"historical_baseline:{latitude}:{longitude}"
+        cache_key = f"historical_baseline:{coordinate_key(latitude, longitude)}"
+        
+        # Precomputed grid cell, if the grid covers this point
+        grid_data = self._grid_dataset("baseline", latitude, longitude)
+        if grid_data is not None:
+            return grid_data
         
         # Check cache (if available) - cache historical data for 30 days
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Get historical data from Open-Meteo Archive API (1990-2020 for baseline)
-                url = "https://archive-api.open-meteo.com/v1/archive"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "start_date": "1990-01-01",
-                    "end_date": "2020-12-31",
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "timezone": "auto"
-                }
+        client = get_http_client()
+        try:
+            # Get historical data from Open-Meteo Archive API (1990-2020 for baseline)
+            url = f"{settings.archive_api_url}/archive"
+            params = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "start_date": "1990-01-01",
+                "end_date": "2020-12-31",
+                "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
+                "timezone": "auto"
+            }
                 
+            with stage("archive"):
                 response = await client.get(url, params=params)
-                response.raise_for_status()
+            response.raise_for_status()
                 
-                data = response.json()
-                daily = data.get("daily", {})
+            data = loads(response.content)
+            daily = data.get("daily", {})
                 
-                if not daily:
-                    print("No historical data available from Open-Meteo")
-                    return await self._get_worldbank_baseline(latitude, longitude)
+            if not daily:
+                print("No historical data available from Open-Meteo")
+                return await self._get_worldbank_baseline(latitude, longitude)
                 
-                # Calculate monthly averages for the baseline period (1990-2020)
+            # Calculate monthly averages for the baseline period (1990-2020)
+            with stage("aggregation"):
                 baseline_data = self._calculate_monthly_baselines(daily)
                 
-                # Cache for 30 days (historical data doesn't change)
-                if self.use_cache and self.redis_client:
-                    try:
-                        self.redis_client.setex(cache_key, 2592000, json.dumps(baseline_data))
-                    except Exception as e:
-                        print(f"Cache write error: {e}")
+            # Cache for 30 days (historical data doesn't change)
+            self._cache_set(cache_key, DATASET_CACHE_TTLS["baseline"], baseline_data)
                 
-                return baseline_data
+            return baseline_data
                 
-            except Exception as e:
-                print(f"Open-Meteo historical data error: {e}")
-                # Fallback to World Bank data
-                return await self._get_worldbank_baseline(latitude, longitude)
+        except Exception as e:
+            print(f"Open-Meteo historical data error: {e}")
+            # Fallback to World Bank data
+            return await self._get_worldbank_baseline(latitude, longitude)
     
     def _calculate_monthly_baselines(self, daily_data: Dict) -> Dict:
         """Calculate monthly baseline averages from daily historical data"""
@@ -208,7 +318,8 @@ class ClimateDataService:
                         if precip_data[i] is not None:
                             month_precip.append(precip_data[i])
             
-            monthly_baselines[month] = {
+            # String month keys, as they come back from the cache
+            monthly_baselines[str(month)] = {
                 "avg_temp_max": sum(month_temp_max) / len(month_temp_max) if month_temp_max else 15.0,
                 "avg_temp_min": sum(month_temp_min) / len(month_temp_min) if month_temp_min else 5.0,
                 "avg_precipitation": sum(month_precip) / len(month_precip) if month_precip else 50.0,
@@ -234,7 +345,7 @@ class ClimateDataService:
                 # Seasonal variation: colder in winter months
                 seasonal_adjustment = 5 * math.cos((month - 7) * math.pi / 6)
                 
-                monthly_baselines[month] = {
+                monthly_baselines[str(month)] = {
                     "avg_temp_max": round(base_temp + 8 + seasonal_adjustment, 1),
                     "avg_temp_min": round(base_temp - 2 + seasonal_adjustment, 1),
                     "avg_precipitation": 60 + (20 * math.sin(month * math.pi / 6)),
@@ -253,116 +364,114 @@ class ClimateDataService:
             return None
     
     async def get_current_climate_data(self, latitude: float, longitude: float) -> Optional[Dict]:
-        cache_key = f"current_climate:{latitude}:{longitude}"
+        cache_key = f"current_climate:{coordinate_key(latitude, longitude)}"
         
         # Check cache (if available)
-        if self.use_cache and self.redis_client:
-            cached_data = self.redis_client.get(cache_key)
-            if cached_data:
-                return json.loads(cached_data)
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{settings.open_meteo_api_url}/forecast"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "weather_code"],
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "timezone": "auto",
-                    "forecast_days": 7
-                }
+        client = get_http_client()
+        try:
+            url = f"{settings.open_meteo_api_url}/forecast"
+            params = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "weather_code"],
+                "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
+                "timezone": "auto",
+                "forecast_days": 7
+            }
                 
+            with stage("forecast"):
                 response = await client.get(url, params=params)
-                response.raise_for_status()
+            response.raise_for_status()
                 
-                data = response.json()
+            data = loads(response.content)
                 
-                # Process current data
-                current = data.get("current", {})
-                daily = data.get("daily", {})
+            # Process current data
+            current = data.get("current", {})
+            daily = data.get("daily", {})
                 
-                climate_data = {
-                    "current_temperature": current.get("temperature_2m"),
-                    "current_humidity": current.get("relative_humidity_2m"),
-                    "current_precipitation": current.get("precipitation"),
-                    "weather_code": current.get("weather_code"),
+            climate_data = {
+                "current_temperature": current.get("temperature_2m"),
+                "current_humidity": current.get("relative_humidity_2m"),
+                "current_precipitation": current.get("precipitation"),
+                "weather_code": current.get("weather_code"),
                     
-                    "weekly_temp_max": daily.get("temperature_2m_max", []),
-                    "weekly_temp_min": daily.get("temperature_2m_min", []),
-                    "weekly_precipitation": daily.get("precipitation_sum", []),
+                "weekly_temp_max": daily.get("temperature_2m_max", []),
+                "weekly_temp_min": daily.get("temperature_2m_min", []),
+                "weekly_precipitation": daily.get("precipitation_sum", []),
                     
-                    "avg_temp_max": sum(daily.get("temperature_2m_max", [])) / len(daily.get("temperature_2m_max", [])) if daily.get("temperature_2m_max") else None,
-                    "avg_temp_min": sum(daily.get("temperature_2m_min", [])) / len(daily.get("temperature_2m_min", [])) if daily.get("temperature_2m_min") else None,
-                    "total_precipitation": sum(daily.get("precipitation_sum", [])),
+                "avg_temp_max": sum(daily.get("temperature_2m_max", [])) / len(daily.get("temperature_2m_max", [])) if daily.get("temperature_2m_max") else None,
+                "avg_temp_min": sum(daily.get("temperature_2m_min", [])) / len(daily.get("temperature_2m_min", [])) if daily.get("temperature_2m_min") else None,
+                "total_precipitation": sum(daily.get("precipitation_sum", [])),
                     
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "data_source": "open-meteo"
-                }
+                "last_updated": datetime.utcnow().isoformat(),
+                "data_source": "open-meteo"
+            }
                 
-                # Cache for 1 hour (if available)
-                if self.use_cache and self.redis_client:
-                    self.redis_client.setex(cache_key, 3600, json.dumps(climate_data))
+            # Cache for 1 hour (if available)
+            self._cache_set(cache_key, DATASET_CACHE_TTLS["current"], climate_data)
                 
-                return climate_data
+            return climate_data
                 
-            except Exception as e:
-                print(f"Current climate data error for {latitude}, {longitude}: {e}")
-                return None
+        except Exception as e:
+            print(f"Current climate data error for {latitude}, {longitude}: {e}")
+            return None
     
     async def get_recent_climate_averages(self, latitude: float, longitude: float) -> Optional[Dict]:
         """Get recent 5-year climate averages (2020-2024) for comparison"""
-        cache_key = f"recent_climate:{latitude}:{longitude}"
+        cache_key = f"recent_climate:{coordinate_key(latitude, longitude)}"
+        
+        # Precomputed grid cell, if the grid covers this point
+        grid_data = self._grid_dataset("recent", latitude, longitude)
+        if grid_data is not None:
+            return grid_data
         
         # Check cache (if available)
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Get recent 5 years of data
-                current_year = datetime.now().year
-                start_year = current_year - 5
-                
-                url = "https://archive-api.open-meteo.com/v1/archive"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "start_date": f"{start_year}-01-01",
-                    "end_date": f"{current_year - 1}-12-31",
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "timezone": "auto"
-                }
+        client = get_http_client()
+        try:
+            # Get recent 5 years of data
+            current_year = datetime.now().year
+            start_year = current_year - 5
                 
+            url = f"{settings.archive_api_url}/archive"
+            params = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "start_date": f"{start_year}-01-01",
+                "end_date": f"{current_year - 1}-12-31",
+                "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
+                "timezone": "auto"
+            }
+                
+            with stage("recent"):
                 response = await client.get(url, params=params)
-                response.raise_for_status()
+            response.raise_for_status()
                 
-                data = response.json()
-                daily = data.get("daily", {})
+            data = loads(response.content)
+            daily = data.get("daily", {})
                 
-                if not daily:
-                    return None
+            if not daily:
+                return None
                 
-                # Calculate recent averages
+            # Calculate recent averages
+            with stage("aggregation"):
                 recent_data = self._calculate_recent_averages(daily)
                 
-                # Cache for 24 hours
-                if self.use_cache and self.redis_client:
-                    try:
-                        self.redis_client.setex(cache_key, 86400, json.dumps(recent_data))
-                    except Exception as e:
-                        print(f"Cache write error: {e}")
+            # Cache for 24 hours
+            self._cache_set(cache_key, DATASET_CACHE_TTLS["recent"], recent_data)
                 
-                return recent_data
+            return recent_data
                 
-            except Exception as e:
-                print(f"Recent climate data error: {e}")
-                return None
+        except Exception as e:
+            print(f"Recent climate data error: {e}")
+            return None
     
     def _calculate_recent_averages(self, daily_data: Dict) -> Dict:
         """Calculate recent 5-year averages"""
@@ -416,69 +525,76 @@ class ClimateDataService:
     
     async def get_climate_projections(self, latitude: float, longitude: float) -> Optional[Dict]:
         """Get climate projections from Open-Meteo Climate API"""
-        cache_key = f"climate_projections:{latitude}:{longitude}"
+        cache_key = f"climate_projections:{coordinate_key(latitude, longitude)}"
+        
+        # Precomputed grid cell, if the grid covers this point
+        grid_data = self._grid_dataset("projections", latitude, longitude)
+        if grid_data is not None:
+            return grid_data
         
         # Check cache (if available)
-        if self.use_cache and self.redis_client:
-            cached_data = self.redis_client.get(cache_key)
-            if cached_data:
-                return json.loads(cached_data)
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"https://climate-api.open-meteo.com/v1/climate"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "models": "CMCC_CM2_VHR4",
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "start_date": "2024-01-01",
-                    "end_date": "2050-12-31"
-                }
+        client = get_http_client()
+        try:
+            url = f"{settings.climate_api_url}/climate"
+            params = {
+                "latitude": latitude,
+                "longitude": longitude,
+                "models": "CMCC_CM2_VHR4",
+                "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
+                "start_date": "2024-01-01",
+                "end_date": "2050-12-31"
+            }
                 
+            with stage("projections"):
                 response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                daily = data.get("daily", {})
+            response.raise_for_status()
                 
-                # Calculate climate change projections
-                temp_max_data = daily.get("temperature_2m_max", [])
-                temp_min_data = daily.get("temperature_2m_min", [])
-                precipitation_data = daily.get("precipitation_sum", [])
+            data = loads(response.content)
+            with stage("aggregation"):
+                projections = self._summarize_projections(data.get("daily", {}))
                 
-                # Split data into current period (2024-2030) and future period (2045-2050)
-                current_period_temp_max = temp_max_data[:365*7] if temp_max_data else []
-                future_period_temp_max = temp_max_data[-365*6:] if temp_max_data else []
+            # Cache for 24 hours (climate projections don't change often)
+            self._cache_set(cache_key, DATASET_CACHE_TTLS["projections"], projections)
                 
-                current_avg_temp = sum(current_period_temp_max) / len(current_period_temp_max) if current_period_temp_max else 0
-                future_avg_temp = sum(future_period_temp_max) / len(future_period_temp_max) if future_period_temp_max else 0
+            return projections
                 
-                projections = {
-                    "temperature_change_2050": round(future_avg_temp - current_avg_temp, 2),
-                    "current_avg_temp": round(current_avg_temp, 1),
-                    "future_avg_temp": round(future_avg_temp, 1),
-                    
-                    "extreme_heat_days_current": len([t for t in current_period_temp_max if t > 35]) if current_period_temp_max else 0,
-                    "extreme_heat_days_future": len([t for t in future_period_temp_max if t > 35]) if future_period_temp_max else 0,
-                    
-                    "precipitation_change_percent": self._calculate_precipitation_change(precipitation_data),
-                    
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "data_source": "open-meteo-climate",
-                    "model": "CMCC_CM2_VHR4"
-                }
-                
-                # Cache for 24 hours (climate projections don't change often)
-                if self.use_cache and self.redis_client:
-                    self.redis_client.setex(cache_key, self.cache_ttl, json.dumps(projections))
-                
-                return projections
-                
-            except Exception as e:
-                print(f"Climate projections error for {latitude}, {longitude}: {e}")
-                return None
+        except Exception as e:
+            print(f"Climate projections error for {latitude}, {longitude}: {e}")
+            return None
     
+    def _summarize_projections(self, daily: Dict) -> Dict:
+        """Summarize daily 2024-2050 model output into warming, heat-day and precipitation changes"""
+        temp_max_data = daily.get("temperature_2m_max", [])
+        precipitation_data = daily.get("precipitation_sum", [])
+        
+        # Split data into current period (2024-2030) and future period (2045-2050)
+        current_period_temp_max = temp_max_data[:365*7] if temp_max_data else []
+        future_period_temp_max = temp_max_data[-365*6:] if temp_max_data else []
+        
+        current_avg_temp = sum(current_period_temp_max) / len(current_period_temp_max) if current_period_temp_max else 0
+        future_avg_temp = sum(future_period_temp_max) / len(future_period_temp_max) if future_period_temp_max else 0
+        
+        projections = {
+            "temperature_change_2050": round(future_avg_temp - current_avg_temp, 2),
+            "current_avg_temp": round(current_avg_temp, 1),
+            "future_avg_temp": round(future_avg_temp, 1),
+            
+            "extreme_heat_days_current": len([t for t in current_period_temp_max if t > 35]) if current_period_temp_max else 0,
+            "extreme_heat_days_future": len([t for t in future_period_temp_max if t > 35]) if future_period_temp_max else 0,
+            
+            "precipitation_change_percent": self._calculate_precipitation_change(precipitation_data),
+            
+            "last_updated": datetime.utcnow().isoformat(),
+            "data_source": "open-meteo-climate",
+            "model": "CMCC_CM2_VHR4"
+        }
+        
+        return projections
+
     def _calculate_precipitation_change(self, precipitation_data: List[float]) -> float:
         """Calculate percentage change in precipitation"""
         if not precipitation_data or len(precipitation_data) < 365*10:
@@ -499,53 +615,18 @@ class ClimateDataService:
     
     async def calculate_climate_resilience_score(self, climate_data: Dict, projections: Dict) -> int:
         """Calculate a climate resilience score (0-100)"""
-        score = 100
-        
-        # Penalize for temperature increases
-        temp_change = projections.get("temperature_change_2050", 0)
-        if temp_change > 3:
-            score -= 40
-        elif temp_change > 2:
-            score -= 25
-        elif temp_change > 1.5:
-            score -= 15
-        elif temp_change > 1:
-            score -= 10
-        
-        # Penalize for extreme heat days
-        extreme_heat_increase = projections.get("extreme_heat_days_future", 0) - projections.get("extreme_heat_days_current", 0)
-        if extreme_heat_increase > 30:
-            score -= 20
-        elif extreme_heat_increase > 15:
-            score -= 10
-        elif extreme_heat_increase > 5:
-            score -= 5
-        
-        # Penalize for extreme precipitation changes
-        precip_change = abs(projections.get("precipitation_change_percent", 0))
-        if precip_change > 30:
-            score -= 15
-        elif precip_change > 20:
-            score -= 10
-        elif precip_change > 10:
-            score -= 5
-        
-        return max(0, min(100, score))
+        return resilience_score(projections)
     
     async def get_comprehensive_climate_analysis(self, location_name: str) -> Optional[Dict]:
         """Get complete climate analysis for a location"""
         # Create a cache key for the entire analysis
-        cache_key = f"full_analysis:{location_name.lower()}"
+        cache_key = f"full_analysis:v{get_scoring_version()}:{location_name.lower()}"
         
         # Check cache first (if available) - cache full analysis for 6 hours
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    print(f"Returning cached analysis for {location_name}")
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
+        cached_data = self._cache_get(cache_key)
+        if cached_data is not None:
+            print(f"Returning cached analysis for {location_name}")
+            return cached_data
         
         # Step 1: Get coordinates
         location_data = await self.get_location_coordinates(location_name)
@@ -559,58 +640,14 @@ class ClimateDataService:
         print(f"Got coordinates for {location_name}: {latitude}, {longitude}")
         
         # Step 2: Get current climate data, recent averages, historical baseline, and projections
-        try:
-            current_data, recent_data, baseline_data, projections = await asyncio.gather(
-                self.get_current_climate_data(latitude, longitude),
-                self.get_recent_climate_averages(latitude, longitude),
-                self.get_historical_climate_baseline(latitude, longitude),
-                self.get_climate_projections(latitude, longitude)
-            )
-        except Exception as e:
-            print(f"Error getting climate data: {e}")
-            current_data, recent_data, baseline_data, projections = None, None, None, None
+        datasets = await self._get_climate_datasets(latitude, longitude, location_name)
         
-        # If API calls fail, create realistic fallback data based on location
-        if not current_data or not recent_data or not baseline_data or not projections:
-            print(f"API calls failed, using fallback data for {location_name}")
-            current_data = current_data or self._generate_realistic_current_data(location_name, latitude, longitude)
-            recent_data = recent_data or self._generate_realistic_recent_data(location_name, latitude, longitude)
-            baseline_data = baseline_data or self._generate_realistic_baseline_data(location_name, latitude, longitude)
-            projections = projections or self._generate_realistic_projections(location_name, latitude, longitude)
-        
-        # Calculate climate variations
-        climate_variations = self._calculate_climate_variations(recent_data, baseline_data)
-        
-        # Calculate annual temperature increase
-        annual_temp_increase = self._calculate_annual_temp_increase(recent_data, baseline_data)
-        
-        # Step 3: Calculate resilience score
-        resilience_score = await self.calculate_climate_resilience_score(current_data, projections)
-        
-        # Step 4: Compile comprehensive analysis
-        analysis = {
-            "location": location_data,
-            "current_climate": current_data,
-            "climate_variations": climate_variations,
-            "annual_temp_increase": annual_temp_increase,
-            "projections": projections,
-            "resilience_score": resilience_score,
-            "risk_assessment": self._generate_risk_assessment(projections, resilience_score),
-            "recommendations": self._generate_recommendations(projections, resilience_score),
-            "last_updated": datetime.utcnow().isoformat()
-        }
+        # Step 3: Calculate variations and resilience score, compile the analysis
+        with stage("compile"):
+            analysis = await self._compile_analysis(location_data, *datasets)
         
-        # Cache the full analysis for 6 hours (if available)
-        if self.use_cache and self.redis_client:
-            try:
-                self.redis_client.setex(
-                    cache_key, 
-                    21600,  # 6 hours
-                    json.dumps(analysis)
-                )
-                print(f"Cached analysis for {location_name}")
-            except Exception as e:
-                print(f"Cache write error: {e}")
+        # Cache the full analysis for 6 hours
+        self._cache_set(cache_key, ANALYSIS_CACHE_TTL, analysis)
         
         return analysis
     
@@ -801,6 +838,26 @@ class ClimateDataService:
             "data_source": "fallback-realistic"
         }
     
+    def rescore_analyses(self, analyses: List[Dict], weights: List[float]) -> List[Dict]:
+        """Copies of full analyses with the score, risk assessment and recommendations redone under a weight vector
+
+        Uses the stored score factors, derived from the projections for
+        analyses cached before factors were stored; nothing is refetched.
+        """
+        factors = [analysis.get("score_factors") or score_factors(analysis.get("projections") or {}) for analysis in analyses]
+        scores = [weighted_score(row, weights) for row in factors]
+        rescored = []
+        for analysis, row, score in zip(analyses, factors, scores):
+            projections = analysis.get("projections") or {}
+            rescored.append({
+                **analysis,
+                "resilience_score": score,
+                "score_factors": row,
+                "risk_assessment": self._generate_risk_assessment(projections, score),
+                "recommendations": self._generate_recommendations(projections, score)
+            })
+        return rescored
+
     def _generate_risk_assessment(self, projections: Dict, resilience_score: int) -> Dict:
         """Generate human-readable risk assessment"""
         temp_change = projections.get("temperature_change_2050", 0)
@@ -871,8 +928,14 @@ class ClimateDataService:
         
         return recommendations
 
-    async def get_comprehensive_climate_analysis_by_coords(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> Optional[Dict]:
-        """Get comprehensive climate analysis using provided coordinates and metadata"""
+    async def get_comprehensive_climate_analysis_by_coords(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None, sections: Optional[Tuple[str, ...]] = None, interpolate: bool = True) -> Optional[Dict]:
+        """Get comprehensive climate analysis using provided coordinates and metadata
+
+        When sections is given, only the upstream fetches those sections need are
+        made and only those sections are returned. With interpolation enabled, an
+        uncached point surrounded by cached cells gets an estimate flagged as
+        "interpolated" while the exact analysis is fetched in the background.
+        """
         # Build location_data dict
         location_data = {
             "name": name or "Unknown",
@@ -881,37 +944,549 @@ class ClimateDataService:
             "latitude": latitude,
             "longitude": longitude
         }
+        if sections is not None:
+            # A cached full analysis already has every section; otherwise fetch only what is needed
+            cached = await asyncio.to_thread(self.get_cached_analysis, latitude, longitude, name, country, admin1)
+            if cached:
+                return trim_analysis(loads(cached[0]), sections)
+        
+        if interpolate and settings.interpolation_enabled:
+            interpolated = await self._interpolated_datasets(latitude, longitude, name or "Unknown", plan_datasets(sections))
+            if interpolated:
+                datasets, neighbors = interpolated
+                self._schedule_exact_analysis(latitude, longitude, name, country, admin1)
+                with stage("compile"):
+                    analysis = await self._compile_analysis(location_data, *datasets, sections=sections)
+                # Not cached: the exact analysis replaces it once fetched
+                analysis["interpolated"] = {"neighbors": neighbors, "exact_pending": True}
+                return analysis
+        
+        if sections is not None:
+            datasets = await self._get_climate_datasets(latitude, longitude, name or "Unknown", plan_datasets(sections))
+            with stage("compile"):
+                return await self._compile_analysis(location_data, *datasets, sections=sections)
+        
+        datasets = await self._get_climate_datasets(latitude, longitude, name or "Unknown")
+        with stage("compile"):
+            analysis = await self._compile_analysis(location_data, *datasets)
+        
+        # Cache the encoded analysis so warm requests can pass the bytes straight
+        # through; never pin generated fallback data in the cache
+        if not any(dataset.get("data_source") == "fallback-realistic" for dataset in datasets):
+            self._cache_analysis(self._analysis_cache_key(latitude, longitude, name, country, admin1), analysis)
+        
+        return analysis
+
+    async def get_degraded_analysis_by_coords(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None, sections: Optional[Tuple[str, ...]] = None) -> Dict:
+        """Analysis without upstream calls: the cached analysis if there is one, otherwise fallback data"""
+        cached = await asyncio.to_thread(self.get_cached_analysis, latitude, longitude, name, country, admin1)
+        if cached:
+            return trim_analysis(loads(cached[0]), sections)
+        location_data = {
+            "name": name or "Unknown",
+            "country": country or "Unknown",
+            "admin1": admin1 or None,
+            "latitude": latitude,
+            "longitude": longitude
+        }
+        fallbacks = self._dataset_fallbacks()
+        for dataset in DATASETS:
+            fallbacks_generated.inc(dataset)
+        datasets = [fallbacks[dataset](name or "Unknown", latitude, longitude) for dataset in DATASETS]
+        return await self._compile_analysis(location_data, *datasets, sections=sections)
+
+    def get_cached_analysis(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> Optional[Tuple[bytes, Optional[str], int]]:
+        """Get the encoded cached analysis for coordinates with its ETag and remaining TTL, without decoding it"""
+        cache_key = self._analysis_cache_key(latitude, longitude, name, country, admin1)
+        entry = local_cache.get(cache_key)
+        if entry:
+            cache_requests.inc("full_analysis", "local_hit")
+            mark("analysis", "local-hit")
+            # Report the time left in Redis, not the local entry's shorter expiry
+            (encoded, etag, redis_expires_at), _ = entry
+            return encoded, etag, max(int(redis_expires_at - time.time()), 0)
+        if not (self.use_cache and self.redis_client):
+            cache_requests.inc("full_analysis", "miss")
+            mark("analysis", "miss")
+            return None
+        try:
+            with stage("redis"):
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(cache_key)
+                pipe.get(f"{cache_key}:etag")
+                pipe.ttl(cache_key)
+                encoded, etag, ttl = pipe.execute()
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            cache_requests.inc("full_analysis", "miss")
+            mark("analysis", "miss")
+            return None
+        if not encoded:
+            cache_requests.inc("full_analysis", "miss")
+            mark("analysis", "miss")
+            return None
+        cache_requests.inc("full_analysis", "hit")
+        mark("analysis", "hit")
+        etag = etag.decode() if etag else None
+        ttl = max(ttl, 0)
+        local_cache.set(cache_key, (encoded, etag, time.time() + ttl), min(ttl, settings.local_cache_ttl_seconds))
+        local_cache.set(self._analysis_cell_key(cache_key), cache_key, min(ttl, settings.local_cache_ttl_seconds))
+        return encoded, etag, ttl
+
+    def _cache_analysis(self, cache_key: str, analysis: Dict) -> None:
+        """Cache an encoded analysis together with its version tag (a hash of the encoded bytes)"""
+        with stage("serialize"):
+            encoded = dumps(analysis)
+            etag = analysis_etag(encoded)
+        local_cache.set(cache_key, (encoded, etag, time.time() + ANALYSIS_CACHE_TTL), min(ANALYSIS_CACHE_TTL, settings.local_cache_ttl_seconds))
+        local_cache.set(self._analysis_cell_key(cache_key), cache_key, min(ANALYSIS_CACHE_TTL, settings.local_cache_ttl_seconds))
+        if not (self.use_cache and self.redis_client):
+            return
+        try:
+            with stage("redis"):
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(cache_key, ANALYSIS_CACHE_TTL, encoded)
+                pipe.setex(f"{cache_key}:etag", ANALYSIS_CACHE_TTL, etag)
+                # The cell's latest analysis, found by coordinates whatever label it was cached under
+                pipe.setex(self._analysis_cell_key(cache_key), ANALYSIS_CACHE_TTL, cache_key)
+                pipe.execute()
+        except Exception as e:
+            print(f"Cache write error: {e}")
+
+    def _analysis_cell_key(self, cache_key: str) -> str:
+        """full_analysis:v{version}:{lat}:{lon} part of an analysis cache key, without the location label"""
+        return ":".join(cache_key.split(":", 4)[:4])
+
+    def get_cached_analyses_by_coords(self, coordinates: List[Tuple[float, float]]) -> List[Optional[bytes]]:
+        """Encoded cached analyses of the grid cells of several points: the in-process cache first, then two Redis round trips
+
+        Matches on coordinates only, so an analysis cached under a different
+        name, country or admin1 is still found.
+        """
+        version = get_scoring_version()
+        cell_keys = [f"full_analysis:v{version}:{coordinate_key(lat, lon)}" for lat, lon in coordinates]
+        analyses = [self._local_cell_analysis(cell_key) for cell_key in cell_keys]
+        for analysis in analyses:
+            if analysis:
+                cache_requests.inc("full_analysis", "local_hit")
+        missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+        if missing and self.use_cache and self.redis_client:
+            try:
+                with stage("redis"):
+                    cache_keys = self.redis_client.mget([cell_keys[i] for i in missing])
+                    found = [cache_key for cache_key in cache_keys if cache_key]
+                    encoded = iter(self.redis_client.mget(found) if found else [])
+                for i, cache_key in zip(missing, cache_keys):
+                    analyses[i] = next(encoded) if cache_key else None
+            except Exception as e:
+                print(f"Cache read error: {e}")
+        for i in missing:
+            cache_requests.inc("full_analysis", "hit" if analyses[i] else "miss")
+        return analyses
+
+    def _local_cell_analysis(self, cell_key: str) -> Optional[bytes]:
+        """Encoded analysis this worker last cached for a grid cell, if still held locally"""
+        entry = local_cache.get(cell_key)
+        if not entry:
+            return None
+        cache_key = entry[0].decode() if isinstance(entry[0], bytes) else entry[0]
+        analysis = local_cache.get(cache_key)
+        return analysis[0][0] if analysis else None
+
+    async def _interpolated_datasets(self, latitude: float, longitude: float, location_name: str, datasets: Tuple[str, ...] = DATASETS) -> Optional[Tuple[Tuple[Optional[Dict], ...], Dict[str, Dict]]]:
+        """Estimate datasets at an uncached point from the cached cells around it
+
+        Returns the datasets in _get_climate_datasets order with the neighbours
+        used per dataset, or None when the point's own cell is cached, the
+        climate grid covers it, or it isn't surrounded by enough cached cells.
+        Current conditions are fetched as usual when no neighbours have them.
+        """
+        if not (self.use_cache and self.redis_client) or abs(latitude) > GEO_MAX_LATITUDE:
+            return None
+        grid = self._climate_grid()
+        if grid is not None and grid.cell(latitude, longitude) is not None:
+            return None
+        own_cell = coordinate_key(latitude, longitude)
+        try:
+            with stage("redis"):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for dataset in datasets:
+                    pipe.geosearch(
+                        geo_index_key(INTERPOLATED_CACHE_FAMILIES[dataset]), longitude=longitude, latitude=latitude,
+                        radius=settings.interpolation_radius_km, unit="km", withdist=True, sort="ASC",
+                        count=settings.interpolation_max_neighbors
+                    )
+                found = {
+                    dataset: [(member.decode() if isinstance(member, bytes) else member, float(distance)) for member, distance in results]
+                    for dataset, results in zip(datasets, pipe.execute())
+                }
+        except Exception as e:
+            print(f"Interpolation index error: {e}")
+            return None
+        if all(any(cell == own_cell for cell, _ in found[dataset]) for dataset in datasets):
+            # Cached at this very cell; the normal path answers from the cache
+            return None
+        
+        keys = list(dict.fromkeys(f"{INTERPOLATED_CACHE_FAMILIES[dataset]}:{cell}" for dataset in datasets for cell, _ in found[dataset]))
+        if not keys:
+            return None
+        try:
+            with stage("redis"):
+                values = dict(zip(keys, self.redis_client.mget(keys)))
+                # Cells whose entries expired since they were indexed
+                stale = [key for key, value in values.items() if value is None]
+                if stale:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for key in stale:
+                        family, cell = key.split(":", 1)
+                        pipe.zrem(geo_index_key(family), cell)
+                    pipe.execute()
+        except Exception as e:
+            print(f"Interpolation read error: {e}")
+            return None
+        
+        estimates: Dict[str, Optional[Dict]] = {}
+        neighbors: Dict[str, Dict] = {}
+        for dataset in datasets:
+            family = INTERPOLATED_CACHE_FAMILIES[dataset]
+            cells = [(cell, distance) for cell, distance in found[dataset] if values.get(f"{family}:{cell}") is not None]
+            own = next((cell for cell, _ in cells if cell == own_cell), None)
+            if own is not None:
+                estimates[dataset] = loads(values[f"{family}:{own}"])
+                continue
+            coordinates = [parse_cell(cell) for cell, _ in cells]
+            if len(cells) >= settings.interpolation_min_neighbors and all(coordinates) and surrounds(latitude, longitude, coordinates):
+                estimates[dataset] = idw([loads(values[f"{family}:{cell}"]) for cell, _ in cells], [distance for _, distance in cells])
+                neighbors[dataset] = {"cells": len(cells), "max_distance_km": round(cells[-1][1], 2)}
+                cache_requests.inc(family, "interpolated")
+                mark(DATASET_STAGES[dataset], "interpolated")
+            elif dataset != "current":
+                return None
+        
+        if "current" in datasets and "current" not in estimates:
+            estimates["current"] = await self.get_current_climate_data(latitude, longitude)
+            if not estimates["current"]:
+                fallbacks_generated.inc("current")
+                mark(DATASET_STAGES["current"], "fallback")
+                estimates["current"] = self._generate_realistic_current_data(location_name, latitude, longitude)
+        return tuple(estimates.get(dataset) for dataset in DATASETS), neighbors
+
+    def _schedule_exact_analysis(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> None:
+        """Fetch and cache the exact analysis in the background, once per analysis key"""
+        cache_key = self._analysis_cache_key(latitude, longitude, name, country, admin1)
+        if cache_key in _exact_fetches:
+            return
+        # A fresh context, so the request's timings and profile don't pick up the background work
+        task = asyncio.create_task(
+            self._fetch_exact_analysis(latitude, longitude, name, country, admin1), context=contextvars.Context()
+        )
+        _exact_fetches[cache_key] = task
+        task.add_done_callback(lambda _: _exact_fetches.pop(cache_key, None))
+
+    async def _fetch_exact_analysis(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> None:
+        try:
+            await self.get_comprehensive_climate_analysis_by_coords(latitude, longitude, name, country, admin1, interpolate=False)
+        except Exception as e:
+            print(f"Background analysis error: {e}")
+
+    def _climate_grid(self):
+        """The precomputed climate grid once warmup has loaded it, or None; lookups never load it on the event loop"""
+        if not settings.climate_grid_path:
+            return None
+        from app.services.climate_grid import loaded_climate_grid
+
+        return loaded_climate_grid()
+
+    def _grid_dataset(self, dataset: str, latitude: float, longitude: float) -> Optional[Dict]:
+        """A dataset read from the precomputed climate grid, or None when it has no cell for the point"""
+        grid = self._climate_grid()
+        if grid is None:
+            return None
+        with stage("grid"):
+            data = grid.dataset(dataset, latitude, longitude)
+        if data is not None:
+            cache_requests.inc(GRID_CACHE_FAMILIES[dataset], "grid")
+            mark(DATASET_STAGES[dataset], "grid")
+        return data
+
+    def _cache_get(self, cache_key: str):
+        """Read a cached value: the in-process cache first, then Redis"""
+        family = cache_key.split(":", 1)[0]
+        stage_name = CACHE_STAGES.get(family, "cache")
+        entry = local_cache.get(cache_key)
+        if entry:
+            cache_requests.inc(family, "local_hit")
+            mark(stage_name, "local-hit")
+            # Stored encoded, so every hit is a fresh value shaped exactly like a Redis hit
+            return loads(entry[0])
+        cached_data = None
+        if self.use_cache and self.redis_client:
+            try:
+                with stage("redis"):
+                    cached_data = self.redis_client.get(cache_key)
+            except Exception as e:
+                print(f"Cache read error: {e}")
+        if not cached_data:
+            cache_requests.inc(family, "miss")
+            mark(stage_name, "miss")
+            return None
+        cache_requests.inc(family, "hit")
+        mark(stage_name, "hit")
+        local_cache.set(cache_key, cached_data, settings.local_cache_ttl_seconds)
+        return loads(cached_data)
+
+    def preload_local_cache(self, keys: List[str]) -> int:
+        """Copy entries from Redis into the in-process cache; returns how many were found"""
+        if not (keys and self.use_cache and self.redis_client):
+            return 0
+        pipe = self.redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+            # Coordinate analyses are kept with their ETag and Redis expiry
+            pipe.get(f"{key}:etag")
+        results = pipe.execute()
+        loaded = 0
+        for i, key in enumerate(keys):
+            cached_data, ttl, etag = results[i * 3:i * 3 + 3]
+            if not cached_data or ttl <= 0:
+                continue
+            value = (cached_data, etag.decode(), time.time() + ttl) if etag else cached_data
+            local_cache.set(key, value, min(ttl, settings.local_cache_ttl_seconds))
+            loaded += 1
+        return loaded
+
+    def _cache_set(self, cache_key: str, ttl: int, value) -> None:
+        """Write a value to the in-process cache and Redis, encoded in both"""
+        encoded = dumps(value)
+        local_cache.set(cache_key, encoded, min(ttl, settings.local_cache_ttl_seconds))
+        if not (self.use_cache and self.redis_client):
+            return
+        family, _, cell = cache_key.partition(":")
+        coordinates = parse_cell(cell) if family in INTERPOLATED_CACHE_FAMILIES.values() else None
+        try:
+            with stage("redis"):
+                if coordinates and abs(coordinates[0]) <= GEO_MAX_LATITUDE:
+                    # Index the cell so uncached points nearby can be interpolated from it
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    pipe.setex(cache_key, ttl, encoded)
+                    pipe.geoadd(geo_index_key(family), (coordinates[1], coordinates[0], cell))
+                    pipe.execute()
+                else:
+                    self.redis_client.setex(cache_key, ttl, encoded)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+
+    def _analysis_cache_key(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> str:
+        """Cache key for a coordinate analysis, including the location metadata it echoes"""
+        label = "|".join((name or "Unknown", country or "Unknown", admin1 or "")).lower()
+        return f"full_analysis:v{get_scoring_version()}:{coordinate_key(latitude, longitude)}:{label}"
+
+    async def stream_comprehensive_climate_analysis_by_coords(self, latitude: float, longitude: float, name: str = None, country: str = None, admin1: str = None) -> AsyncIterator[Tuple[str, Dict]]:
+        """Yield (section, payload) pairs as soon as the data behind each section is ready.
+
+        Payloads carry a status of "pending", "ready" or "fallback"; a final
+        "complete" section holds the full analysis. A cached analysis is
+        emitted whole, without fetching.
+        """
+        cached = await asyncio.to_thread(self.get_cached_analysis, latitude, longitude, name, country, admin1)
+        if cached:
+            analysis = loads(cached[0])
+            for section in ANALYSIS_SECTIONS:
+                yield section, {"status": "ready", "data": analysis.get(section)}
+            yield "complete", {"status": "ready", "data": analysis}
+            return
+        
+        location_data = {
+            "name": name or "Unknown",
+            "country": country or "Unknown",
+            "admin1": admin1 or None,
+            "latitude": latitude,
+            "longitude": longitude
+        }
+        safe_name = name or "Unknown"
+        yield "location", {"status": "ready", "data": location_data}
+        for section in ANALYSIS_SECTIONS[1:]:
+            yield section, {"status": "pending"}
+        
+        tasks = {
+            asyncio.create_task(fetch(latitude, longitude)): dataset
+            for dataset, fetch in self._dataset_fetchers().items()
+        }
+        fallbacks = self._dataset_fallbacks()
+        datasets = {}
+        fell_back = set()
+        pending = set(tasks)
         try:
-            current_data, recent_data, baseline_data, projections = await asyncio.gather(
-                self.get_current_climate_data(latitude, longitude),
-                self.get_recent_climate_averages(latitude, longitude),
-                self.get_historical_climate_baseline(latitude, longitude),
-                self.get_climate_projections(latitude, longitude)
-            )
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    dataset = tasks[task]
+                    try:
+                        datasets[dataset] = task.result()
+                    except Exception as e:
+                        print(f"Error getting {dataset} climate data: {e}")
+                        datasets[dataset] = None
+                    if not datasets[dataset]:
+                        print(f"API call failed, using fallback {dataset} data for {safe_name}")
+                        fallbacks_generated.inc(dataset)
+                        datasets[dataset] = fallbacks[dataset](safe_name, latitude, longitude)
+                        fell_back.add(dataset)
+                    
+                    if dataset == "current":
+                        yield "current_climate", {"status": "fallback" if "current" in fell_back else "ready", "data": datasets["current"]}
+                    elif dataset == "projections":
+                        yield "projections", {"status": "fallback" if "projections" in fell_back else "ready", "data": datasets["projections"]}
+                    elif "recent" in datasets and "baseline" in datasets:
+                        status = "fallback" if fell_back & {"recent", "baseline"} else "ready"
+                        yield "climate_variations", {"status": status, "data": self._calculate_climate_variations(datasets["recent"], datasets["baseline"])}
+                        yield "annual_temp_increase", {"status": status, "data": self._calculate_annual_temp_increase(datasets["recent"], datasets["baseline"])}
+        finally:
+            # The client may disconnect mid-stream; don't leave fetches running unobserved
+            for task in pending:
+                task.cancel()
+        
+        analysis = await self._compile_analysis(
+            location_data, datasets["current"], datasets["recent"], datasets["baseline"], datasets["projections"]
+        )
+        if not fell_back:
+            # The next request for this location, streamed or not, is served from the cache
+            self._cache_analysis(self._analysis_cache_key(latitude, longitude, name, country, admin1), analysis)
+        status = "fallback" if "projections" in fell_back else "ready"
+        for section in ("resilience_score", "score_factors", "risk_assessment", "recommendations"):
+            yield section, {"status": status, "data": analysis[section]}
+        yield "complete", {"status": "fallback" if fell_back else "ready", "data": analysis}
+
+    async def get_comprehensive_climate_analyses(self, locations: List[Dict]) -> List[Optional[Dict]]:
+        """Get climate analyses for several locations, sharing geocoding and data fetches.
+
+        Entries carry coordinates or a name to geocode. Distinct names and coordinates
+        are resolved once and fetched concurrently; results keep input order, with
+        None for entries that could not be resolved.
+        """
+        # Step 1: Geocode name-only entries, once per distinct name
+        names = {}
+        for entry in locations:
+            if entry.get("latitude") is None or entry.get("longitude") is None:
+                location_name = entry.get("name") or entry.get("location")
+                if location_name:
+                    names.setdefault(location_name.lower(), location_name)
+        geocoded = dict(zip(
+            names.keys(),
+            await asyncio.gather(*(self.get_location_coordinates(name) for name in names.values()))
+        ))
+        
+        # Step 2: Resolve every entry to coordinates and location metadata
+        resolved = []
+        for entry in locations:
+            if entry.get("latitude") is not None and entry.get("longitude") is not None:
+                resolved.append({
+                    "name": entry.get("name") or "Unknown",
+                    "country": entry.get("country") or "Unknown",
+                    "admin1": entry.get("admin1") or None,
+                    "latitude": entry["latitude"],
+                    "longitude": entry["longitude"]
+                })
+                continue
+            location_name = entry.get("name") or entry.get("location")
+            location_data = geocoded.get(location_name.lower()) if location_name else None
+            if location_data and location_data.get("latitude") is not None and location_data.get("longitude") is not None:
+                resolved.append(location_data)
+            else:
+                print(f"Could not get coordinates for {location_name}")
+                resolved.append(None)
+        
+        # Step 3: Fetch climate datasets once per distinct coordinate pair
+        coordinates = {}
+        for location_data in resolved:
+            if location_data:
+                key = (location_data["latitude"], location_data["longitude"])
+                coordinates.setdefault(key, location_data.get("name") or "Unknown")
+        datasets = dict(zip(
+            coordinates.keys(),
+            await asyncio.gather(*(
+                self._get_climate_datasets(latitude, longitude, name)
+                for (latitude, longitude), name in coordinates.items()
+            ))
+        ))
+        
+        # Step 4: Compile one analysis per entry from the shared datasets
+        analyses = []
+        for location_data in resolved:
+            if not location_data:
+                analyses.append(None)
+                continue
+            key = (location_data["latitude"], location_data["longitude"])
+            analyses.append(await self._compile_analysis(location_data, *datasets[key]))
+        return analyses
+
+    async def _get_climate_datasets(self, latitude: float, longitude: float, location_name: str, datasets: Tuple[str, ...] = DATASETS) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict], Optional[Dict]]:
+        """Fetch current, recent, baseline and projection data, filling gaps with fallbacks
+
+        Only the named datasets are fetched; the others come back as None.
+        """
+        fetchers = self._dataset_fetchers()
+        try:
+            results = await asyncio.gather(*(fetchers[dataset](latitude, longitude) for dataset in datasets))
         except Exception as e:
             print(f"Error getting climate data: {e}")
-            current_data, recent_data, baseline_data, projections = None, None, None, None
-        if not current_data or not recent_data or not baseline_data or not projections:
-            print(f"API calls failed, using fallback data for {name}")
-            safe_name = name or "Unknown"
-            safe_country = country or "Unknown"
-            safe_admin1 = admin1 or "Unknown"
-            current_data = current_data or self._generate_realistic_current_data(safe_name, latitude, longitude)
-            recent_data = recent_data or self._generate_realistic_recent_data(safe_name, latitude, longitude)
-            baseline_data = baseline_data or self._generate_realistic_baseline_data(safe_name, latitude, longitude)
-            projections = projections or self._generate_realistic_projections(safe_name, latitude, longitude)
-        climate_variations = self._calculate_climate_variations(recent_data, baseline_data)
-        annual_temp_increase = self._calculate_annual_temp_increase(recent_data, baseline_data)
-        resilience_score = await self.calculate_climate_resilience_score(current_data, projections)
-        analysis = {
-            "location": location_data,
-            "current_climate": current_data,
-            "climate_variations": climate_variations,
-            "annual_temp_increase": annual_temp_increase,
-            "projections": projections,
-            "resilience_score": resilience_score,
-            "risk_assessment": self._generate_risk_assessment(projections, resilience_score),
-            "recommendations": self._generate_recommendations(projections, resilience_score),
-            "last_updated": datetime.utcnow().isoformat()
+            results = [None] * len(datasets)
+        fetched = dict(zip(datasets, results))
+        
+        # If API calls fail, create realistic fallback data based on location
+        if not all(fetched.values()):
+            print(f"API calls failed, using fallback data for {location_name}")
+            fallbacks = self._dataset_fallbacks()
+            for dataset in datasets:
+                if not fetched[dataset]:
+                    fallbacks_generated.inc(dataset)
+                    mark(DATASET_STAGES[dataset], "fallback")
+                    fetched[dataset] = fallbacks[dataset](location_name, latitude, longitude)
+        
+        return tuple(fetched.get(dataset) for dataset in DATASETS)
+
+    def _dataset_fetchers(self) -> Dict:
+        """Upstream fetch method for each dataset"""
+        return {
+            "current": self.get_current_climate_data,
+            "recent": self.get_recent_climate_averages,
+            "baseline": self.get_historical_climate_baseline,
+            "projections": self.get_climate_projections
         }
+
+    def _dataset_fallbacks(self) -> Dict:
+        """Realistic fallback generator for each dataset"""
+        return {
+            "current": self._generate_realistic_current_data,
+            "recent": self._generate_realistic_recent_data,
+            "baseline": self._generate_realistic_baseline_data,
+            "projections": self._generate_realistic_projections
+        }
+
+    async def _compile_analysis(self, location_data: Dict, current_data: Optional[Dict], recent_data: Optional[Dict], baseline_data: Optional[Dict], projections: Optional[Dict], sections: Optional[Tuple[str, ...]] = None) -> Dict:
+        """Compile the comprehensive analysis (or just the requested sections) from fetched climate datasets"""
+        wanted = set(ANALYSIS_SECTIONS if sections is None else sections)
+        analysis = {}
+        if "location" in wanted:
+            analysis["location"] = location_data
+        if "current_climate" in wanted:
+            analysis["current_climate"] = current_data
+        if "climate_variations" in wanted:
+            analysis["climate_variations"] = self._calculate_climate_variations(recent_data, baseline_data)
+        if "annual_temp_increase" in wanted:
+            analysis["annual_temp_increase"] = self._calculate_annual_temp_increase(recent_data, baseline_data)
+        if "projections" in wanted:
+            analysis["projections"] = projections
+        if wanted & {"resilience_score", "score_factors", "risk_assessment", "recommendations"}:
+            resilience_score = await self.calculate_climate_resilience_score(current_data, projections)
+            if "resilience_score" in wanted:
+                analysis["resilience_score"] = resilience_score
+            if "score_factors" in wanted:
+                # Kept apart from the score, so it can be reweighted without recompiling
+                analysis["score_factors"] = score_factors(projections)
+            if "risk_assessment" in wanted:
+                analysis["risk_assessment"] = self._generate_risk_assessment(projections, resilience_score)
+            if "recommendations" in wanted:
+                analysis["recommendations"] = self._generate_recommendations(projections, resilience_score)
+        analysis["last_updated"] = datetime.utcnow().isoformat()
         return analysis
@@ -1,535 +0,0 @@
-"""
-Enhanced climate service with real API integration and smart fallbacks
-"""
-import httpx
-import asyncio
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
-import json
-import redis
-import calendar
-import math
-from app.core.config import settings
-
-class ClimateDataService:
-    def __init__(self):
-        try:
-            self.redis_client = redis.from_url(settings.redis_url)
-            self.use_cache = True
-        except Exception as e:
-            print(f"Redis not available: {e}")
-            self.redis_client = None
-            self.use_cache = False
-        self.cache_ttl = 3600 * 24
-
-    async def search_locations(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search for locations using Open-Meteo Geocoding API"""
-        if len(query) < 2:
-            return []
-        
-        cache_key = f"search:{query.lower()}:{limit}"
-        
-        # Check cache
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception:
-                pass
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{settings.geocoding_api_url}/search"
-                params = {
-                    "name": query,
-                    "count": limit,
-                    "language": "en",
-                    "format": "json"
-                }
-                
-                response = await client.get(url, params=params, timeout=10.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                locations = []
-                
-                if data.get("results"):
-                    for result in data["results"]:
-                        location = {
-                            "name": result.get("name"),
-                            "country": result.get("country"),
-                            "admin1": result.get("admin1", ""),
-                            "latitude": result.get("latitude"),
-                            "longitude": result.get("longitude"),
-                            "population": result.get("population"),
-                            "timezone": result.get("timezone"),
-                            "display_name": self._format_display_name(result)
-                        }
-                        locations.append(location)
-                
-                # Cache results for 1 hour
-                if self.use_cache and self.redis_client:
-                    try:
-                        self.redis_client.setex(cache_key, 3600, json.dumps(locations))
-                    except Exception:
-                        pass
-                
-                return locations
-                
-            except Exception as e:
-                print(f"Geocoding search error: {e}")
-                return []
-
-    def _format_display_name(self, result: Dict) -> str:
-        """Format location for display in dropdown"""
-        name = result.get("name", "")
-        admin1 = result.get("admin1", "")
-        country = result.get("country", "")
-        
-        if admin1 and admin1 != name:
-            return f"{name}, {admin1}, {country}"
-        else:
-            return f"{name}, {country}"
-
-    async def get_location_by_coords(self, latitude: float, longitude: float) -> Optional[Dict]:
-        """Get location data by coordinates"""
-        cache_key = f"coords:{latitude}:{longitude}"
-        
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception:
-                pass
-        
-        # Create location object from coordinates
-        location_data = {
-            "name": f"Location {latitude:.2f},{longitude:.2f}",
-            "country": "Unknown",
-            "latitude": latitude,
-            "longitude": longitude,
-            "population": None,
-            "timezone": None
-        }
-        
-        if self.use_cache and self.redis_client:
-            try:
-                self.redis_client.setex(cache_key, self.cache_ttl, json.dumps(location_data))
-            except Exception:
-                pass
-        
-        return location_data
-
-    async def get_current_weather(self, latitude: float, longitude: float) -> Optional[Dict]:
-        """Get current weather from Open-Meteo"""
-        cache_key = f"current_weather:{latitude}:{longitude}"
-        
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    data = json.loads(cached_data)
-                    # Check if data is less than 1 hour old
-                    if datetime.fromisoformat(data["last_updated"]) > datetime.utcnow() - timedelta(hours=1):
-                        return data
-            except Exception:
-                pass
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{settings.open_meteo_api_url}/forecast"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "weather_code"],
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "timezone": "auto",
-                    "forecast_days": 7
-                }
-                
-                response = await client.get(url, params=params, timeout=15.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                current = data.get("current", {})
-                daily = data.get("daily", {})
-                
-                weather_data = {
-                    "current_temperature": current.get("temperature_2m"),
-                    "current_humidity": current.get("relative_humidity_2m"),
-                    "current_precipitation": current.get("precipitation"),
-                    "weather_code": current.get("weather_code"),
-                    "weekly_temp_max": daily.get("temperature_2m_max", []),
-                    "weekly_temp_min": daily.get("temperature_2m_min", []),
-                    "weekly_precipitation": daily.get("precipitation_sum", []),
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "data_source": "open-meteo-current",
-                    "data_available": True
-                }
-                
-                # Cache for 1 hour
-                if self.use_cache and self.redis_client:
-                    try:
-                        self.redis_client.setex(cache_key, 3600, json.dumps(weather_data))
-                    except Exception:
-                        pass
-                
-                return weather_data
-                
-            except Exception as e:
-                print(f"Current weather error for {latitude}, {longitude}: {e}")
-                return None
-
-    async def get_historical_climate_data(self, latitude: float, longitude: float) -> Optional[Dict]:
-        """Get historical climate data for comparison"""
-        cache_key = f"historical:{latitude}:{longitude}"
-        
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception:
-                pass
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                # Get recent 5 years for comparison
-                current_year = datetime.now().year
-                start_year = current_year - 5
-                
-                url = "https://archive-api.open-meteo.com/v1/archive"
-                params = {
-                    "latitude": latitude,
-                    "longitude": longitude,
-                    "start_date": f"{start_year}-01-01",
-                    "end_date": f"{current_year - 1}-12-31",
-                    "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"],
-                    "timezone": "auto"
-                }
-                
-                response = await client.get(url, params=params, timeout=30.0)
-                response.raise_for_status()
-                
-                data = response.json()
-                daily = data.get("daily", {})
-                
-                if not daily:
-                    return None
-                
-                # Calculate climate variations
-                historical_data = self._calculate_climate_variations(daily, latitude)
-                
-                # Cache for 24 hours
-                if self.use_cache and self.redis_client:
-                    try:
-                        self.redis_client.setex(cache_key, 86400, json.dumps(historical_data))
-                    except Exception:
-                        pass
-                
-                return historical_data
-                
-            except Exception as e:
-                print(f"Historical climate data error: {e}")
-                return None
-
-    def _calculate_climate_variations(self, daily_data: Dict, latitude: float) -> Dict:
-        """Calculate climate variations from historical data"""
-        temp_max_data = daily_data.get("temperature_2m_max", [])
-        temp_min_data = daily_data.get("temperature_2m_min", [])
-        precip_data = daily_data.get("precipitation_sum", [])
-        dates = daily_data.get("time", [])
-        
-        current_month = datetime.now().month
-        month_name = calendar.month_name[current_month]
-        
-        # Calculate monthly averages
-        current_month_temp_max = []
-        current_month_temp_min = []
-        current_month_precip = []
-        annual_temps = []
-        
-        for i, date_str in enumerate(dates):
-            if i < len(temp_max_data) and i < len(temp_min_data):
-                try:
-                    date_obj = datetime.fromisoformat(date_str)
-                    
-                    # Current month data
-                    if date_obj.month == current_month:
-                        if temp_max_data[i] is not None:
-                            current_month_temp_max.append(temp_max_data[i])
-                        if temp_min_data[i] is not None:
-                            current_month_temp_min.append(temp_min_data[i])
-                        if i < len(precip_data) and precip_data[i] is not None:
-                            current_month_precip.append(precip_data[i])
-                    
-                    # Annual averages
-                    if temp_max_data[i] is not None and temp_min_data[i] is not None:
-                        annual_temps.append((temp_max_data[i] + temp_min_data[i]) / 2)
-                        
-                except Exception:
-                    continue
-        
-        # Calculate variations (assuming first 2 years are baseline, last 3 are recent)
-        if len(annual_temps) >= 365 * 4:  # At least 4 years of data
-            mid_point = len(annual_temps) // 2
-            baseline_temps = annual_temps[:mid_point]
-            recent_temps = annual_temps[mid_point:]
-            
-            baseline_avg = sum(baseline_temps) / len(baseline_temps)
-            recent_avg = sum(recent_temps) / len(recent_temps)
-            temp_increase = recent_avg - baseline_avg
-        else:
-            temp_increase = 1.2  # Default estimate
-            recent_avg = 15.0
-            baseline_avg = recent_avg - temp_increase
-        
-        # Monthly variations
-        if current_month_temp_max and current_month_temp_min:
-            recent_month_max = sum(current_month_temp_max) / len(current_month_temp_max)
-            recent_month_min = sum(current_month_temp_min) / len(current_month_temp_min)
-            recent_month_precip = sum(current_month_precip) / len(current_month_precip) if current_month_precip else 50
-            
-            # Estimate baseline (assume 1.2°C warming)
-            baseline_month_max = recent_month_max - 1.2
-            baseline_month_min = recent_month_min - 1.2
-            baseline_month_precip = recent_month_precip * 0.95  # Assume 5% less rain historically
-            
-            temp_max_var = recent_month_max - baseline_month_max
-            temp_min_var = recent_month_min - baseline_month_min
-            
-            if baseline_month_precip > 0:
-                rainfall_var = ((recent_month_precip - baseline_month_precip) / baseline_month_precip) * 100
-            else:
-                rainfall_var = 0
-        else:
-            # Fallback estimates based on latitude
-            temp_max_var = 1.2 + (abs(latitude) * 0.02)
-            temp_min_var = temp_max_var * 0.8
-            rainfall_var = 8.0
-        
-        return {
-            "current_month": current_month,
-            "month_name": month_name,
-            "temp_max_variation": round(temp_max_var, 1),
-            "temp_min_variation": round(temp_min_var, 1),
-            "rainfall_variation_percent": round(rainfall_var, 1),
-            "annual_temp_increase": round(temp_increase, 1),
-            "recent_avg_temp": round(recent_avg, 1),
-            "baseline_avg_temp": round(baseline_avg, 1),
-            "baseline_period": "Historical baseline",
-            "recent_period": "Recent years",
-            "data_quality": "high",
-            "data_available": True,
-            "last_updated": datetime.utcnow().isoformat()
-        }
-
-    def _generate_fallback_data(self, location_name: str, latitude: float, longitude: float) -> Dict:
-        """Generate realistic fallback data when APIs fail"""
-        current_month = datetime.now().month
-        month_name = calendar.month_name[current_month]
-        
-        # Geographic-based estimates
-        base_temp = 20 - (abs(latitude) * 0.5)
-        
-        # Regional adjustments
-        if any(country in location_name.upper() for country in ["UK", "UNITED KINGDOM", "BRITAIN"]):
-            temp_max_var, temp_min_var, rainfall_var = 1.8, 1.5, 12.0
-            base_temp = 12
-            increase = 1.2
-        elif "FRANCE" in location_name.upper():
-            temp_max_var, temp_min_var, rainfall_var = 2.1, 1.8, -8.0
-            base_temp = 16
-            increase = 1.4
-        elif "SPAIN" in location_name.upper():
-            temp_max_var, temp_min_var, rainfall_var = 2.8, 2.2, -22.0
-            base_temp = 18
-            increase = 1.6
-        else:
-            temp_max_var = 1.2 + (abs(latitude) * 0.02)
-            temp_min_var = temp_max_var * 0.8
-            rainfall_var = 8.0
-            increase = 1.1
-        
-        return {
-            "current_month": current_month,
-            "month_name": month_name,
-            "temp_max_variation": round(temp_max_var, 1),
-            "temp_min_variation": round(temp_min_var, 1),
-            "rainfall_variation_percent": round(rainfall_var, 1),
-            "annual_temp_increase": round(increase, 1),
-            "recent_avg_temp": round(base_temp + increase, 1),
-            "baseline_avg_temp": round(base_temp, 1),
-            "baseline_period": "1990-2020 (estimated)",
-            "recent_period": "2020-2024 (estimated)",
-            "data_quality": "estimated",
-            "data_available": False
-        }
-
-    async def get_comprehensive_climate_analysis(self, location_name: str) -> Optional[Dict]:
-        """Get comprehensive climate analysis with real data and smart fallbacks"""
-        cache_key = f"full_analysis:{location_name.lower()}"
-        
-        # Check cache
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception:
-                pass
-        
-        try:
-            # First try to find exact location
-            locations = await self.search_locations(location_name, 1)
-            if not locations:
-                print(f"No location found for: {location_name}")
-                return None
-            
-            location_data = locations[0]
-            latitude = location_data["latitude"]
-            longitude = location_data["longitude"]
-            
-            print(f"Analyzing: {location_data['display_name']} ({latitude}, {longitude})")
-            
-            # Try to get real data
-            current_weather = await self.get_current_weather(latitude, longitude)
-            historical_data = await self.get_historical_climate_data(latitude, longitude)
-            
-            # Determine what data is available
-            data_sources = []
-            
-            if current_weather and current_weather.get("data_available"):
-                current_climate = {
-                    "current_temperature": current_weather.get("current_temperature"),
-                    "current_humidity": current_weather.get("current_humidity"),
-                    "avg_temp_max": sum(current_weather.get("weekly_temp_max", [15])) / len(current_weather.get("weekly_temp_max", [1])),
-                    "avg_temp_min": sum(current_weather.get("weekly_temp_min", [5])) / len(current_weather.get("weekly_temp_min", [1])),
-                    "total_precipitation": sum(current_weather.get("weekly_precipitation", [0])),
-                    "data_source": "open-meteo",
-                    "data_available": True
-                }
-                data_sources.append("Current weather: Open-Meteo API")
-            else:
-                current_climate = {
-                    "current_temperature": None,
-                    "current_humidity": None,
-                    "avg_temp_max": None,
-                    "avg_temp_min": None,
-                    "total_precipitation": None,
-                    "data_source": "unavailable",
-                    "data_available": False
-                }
-                data_sources.append("Current weather: Data unavailable")
-            
-            if historical_data and historical_data.get("data_available"):
-                climate_variations = historical_data
-                annual_temp_increase = {
-                    "increase": historical_data.get("annual_temp_increase"),
-                    "recent_avg": historical_data.get("recent_avg_temp"),
-                    "baseline_avg": historical_data.get("baseline_avg_temp"),
-                    "baseline_period": historical_data.get("baseline_period"),
-                    "recent_period": historical_data.get("recent_period"),
-                    "confidence": "high",
-                    "data_available": True
-                }
-                data_sources.append("Climate variations: Open-Meteo Archive API")
-            else:
-                fallback_data = self._generate_fallback_data(location_name, latitude, longitude)
-                climate_variations = fallback_data
-                annual_temp_increase = {
-                    "increase": fallback_data.get("annual_temp_increase"),
-                    "recent_avg": fallback_data.get("recent_avg_temp"),
-                    "baseline_avg": fallback_data.get("baseline_avg_temp"),
-                    "baseline_period": fallback_data.get("baseline_period"),
-                    "recent_period": fallback_data.get("recent_period"),
-                    "confidence": "estimated",
-                    "data_available": False
-                }
-                data_sources.append("Climate variations: Geographic estimates")
-            
-            # Calculate resilience score
-            temp_increase = annual_temp_increase.get("increase", 1.2)
-            resilience_score = max(0, min(100, 100 - (temp_increase * 15)))
-            
-            analysis = {
-                "location": location_data,
-                "current_climate": current_climate,
-                "climate_variations": climate_variations,
-                "annual_temp_increase": annual_temp_increase,
-                "projections": {
-                    "temperature_change_2050": round(temp_increase + 0.5, 1),
-                    "current_avg_temp": annual_temp_increase.get("recent_avg", 15.0),
-                    "future_avg_temp": round(annual_temp_increase.get("recent_avg", 15.0) + 0.5, 1),
-                    "extreme_heat_days_current": max(0, int((35 - abs(latitude)) * 0.5)),
-                    "extreme_heat_days_future": max(0, int((35 - abs(latitude)) * 0.8)),
-                    "precipitation_change_percent": climate_variations.get("rainfall_variation_percent", 0) * 0.5
-                },
-                "resilience_score": int(resilience_score),
-                "risk_assessment": self._generate_risk_assessment(temp_increase, int(resilience_score)),
-                "recommendations": self._generate_recommendations(int(resilience_score)),
-                "data_sources": data_sources,
-                "last_updated": datetime.utcnow().isoformat()
-            }
-            
-            # Cache for 6 hours
-            if self.use_cache and self.redis_client:
-                try:
-                    self.redis_client.setex(cache_key, 21600, json.dumps(analysis))
-                except Exception:
-                    pass
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"Error in comprehensive analysis: {e}")
-            return None
-
-    def _generate_risk_assessment(self, temp_increase: float, resilience_score: int) -> Dict:
-        """Generate risk assessment"""
-        if resilience_score >= 80:
-            risk_level = "Low"
-            description = "Minimal climate risks expected. Good adaptation capacity."
-        elif resilience_score >= 60:
-            risk_level = "Moderate"
-            description = "Some climate challenges expected but manageable with adaptation."
-        elif resilience_score >= 40:
-            risk_level = "High"
-            description = "Significant climate risks. Strong adaptation measures needed."
-        else:
-            risk_level = "Very High"
-            description = "Severe climate risks. Consider relocation options."
-        
-        return {
-            "risk_level": risk_level,
-            "description": description,
-            "temperature_impact": f"+{temp_increase}°C since baseline",
-            "key_concerns": ["Rising temperatures", "Changing precipitation patterns"]
-        }
-
-    def _generate_recommendations(self, resilience_score: int) -> List[str]:
-        """Generate recommendations"""
-        recommendations = []
-        
-        if resilience_score < 60:
-            recommendations.extend([
-                "Consider comprehensive climate adaptation measures",
-                "Invest in climate-resilient infrastructure",
-                "Develop emergency preparedness plans"
-            ])
-        elif resilience_score < 80:
-            recommendations.extend([
-                "Monitor local climate adaptation plans",
-                "Consider energy-efficient cooling/heating systems",
-                "Stay informed about extreme weather preparedness"
-            ])
-        else:
-            recommendations.append("Excellent climate stability - ideal for long-term planning")
-        
-        return recommendations
-
-    async def calculate_climate_resilience_score(self, climate_data: Dict, projections: Dict) -> int:
-        """Calculate climate resilience score"""
-        return projections.get("resilience_score", 75)
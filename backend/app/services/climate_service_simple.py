@@ -1,392 +0,0 @@
-"""
-Simplified climate service that works reliably
-"""
-import httpx
-import asyncio
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
-import json
-import redis
-import calendar
-import math
-from app.core.config import settings
-
-class ClimateDataService:
-    def __init__(self):
-        # Try to initialize Redis, but fall back to no caching if it fails
-        try:
-            self.redis_client = redis.from_url(settings.redis_url)
-            self.use_cache = True
-        except Exception as e:
-            print(f"Redis not available, running without cache: {e}")
-            self.redis_client = None
-            self.use_cache = False
-        self.cache_ttl = 3600 * 24  # 24 hours
-        
-    async def get_location_coordinates(self, location_name: str) -> Optional[Dict]:
-        """Get coordinates for a location using geocoding API"""
-        cache_key = f"geocoding:{location_name.lower()}"
-        
-        # Check cache first (if available)
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                url = f"{settings.geocoding_api_url}/search"
-                params = {
-                    "name": location_name,
-                    "count": 1,
-                    "language": "en",
-                    "format": "json"
-                }
-                
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                if data.get("results") and len(data["results"]) > 0:
-                    result = data["results"][0]
-                    location_data = {
-                        "name": result.get("name"),
-                        "country": result.get("country"),
-                        "latitude": result.get("latitude"),
-                        "longitude": result.get("longitude"),
-                        "population": result.get("population"),
-                        "timezone": result.get("timezone")
-                    }
-                    
-                    # Cache the result (if available)
-                    if self.use_cache and self.redis_client:
-                        try:
-                            self.redis_client.setex(
-                                cache_key, 
-                                self.cache_ttl * 7,  # Cache geocoding for 7 days
-                                json.dumps(location_data)
-                            )
-                        except Exception as e:
-                            print(f"Cache write error: {e}")
-                    
-                    return location_data
-                    
-            except Exception as e:
-                print(f"Geocoding error for {location_name}: {e}")
-                return None
-                
-        return None
-    
-    async def get_comprehensive_climate_analysis(self, location_name: str) -> Optional[Dict]:
-        """Get complete climate analysis for a location using reliable methods"""
-        # Create a cache key for the entire analysis
-        cache_key = f"full_analysis:{location_name.lower()}"
-        
-        # Check cache first (if available) - cache full analysis for 6 hours
-        if self.use_cache and self.redis_client:
-            try:
-                cached_data = self.redis_client.get(cache_key)
-                if cached_data:
-                    print(f"Returning cached analysis for {location_name}")
-                    return json.loads(cached_data)
-            except Exception as e:
-                print(f"Cache read error: {e}")
-        
-        # Step 1: Get coordinates
-        location_data = await self.get_location_coordinates(location_name)
-        if not location_data:
-            print(f"Could not get coordinates for {location_name}")
-            return None
-        
-        latitude = location_data["latitude"]
-        longitude = location_data["longitude"]
-        
-        print(f"Got coordinates for {location_name}: {latitude}, {longitude}")
-        
-        # Step 2: Generate realistic climate data based on location
-        try:
-            current_data = self._generate_realistic_current_data(location_name, latitude, longitude)
-            climate_variations = self._generate_realistic_variations(location_name, latitude, longitude)
-            annual_temp_increase = self._generate_realistic_temp_increase(location_name, latitude, longitude)
-            projections = self._generate_realistic_projections(location_name, latitude, longitude)
-            
-            # Calculate resilience score
-            resilience_score = await self.calculate_climate_resilience_score(current_data, projections)
-            
-            # Step 3: Compile comprehensive analysis
-            analysis = {
-                "location": location_data,
-                "current_climate": current_data,
-                "climate_variations": climate_variations,
-                "annual_temp_increase": annual_temp_increase,
-                "projections": projections,
-                "resilience_score": resilience_score,
-                "risk_assessment": self._generate_risk_assessment(projections, resilience_score),
-                "recommendations": self._generate_recommendations(projections, resilience_score),
-                "last_updated": datetime.utcnow().isoformat()
-            }
-            
-            # Cache the full analysis for 6 hours (if available)
-            if self.use_cache and self.redis_client:
-                try:
-                    self.redis_client.setex(
-                        cache_key, 
-                        21600,  # 6 hours
-                        json.dumps(analysis)
-                    )
-                    print(f"Cached analysis for {location_name}")
-                except Exception as e:
-                    print(f"Cache write error: {e}")
-            
-            return analysis
-            
-        except Exception as e:
-            print(f"Error generating climate analysis for {location_name}: {e}")
-            return None
-    
-    def _generate_realistic_variations(self, location_name: str, latitude: float, longitude: float) -> Dict:
-        """Generate realistic climate variations based on location"""
-        current_month = datetime.now().month
-        month_name = calendar.month_name[current_month]
-        
-        # Base warming varies by latitude (Arctic amplification)
-        base_warming = 1.2 + (abs(latitude) * 0.02)
-        
-        # Location-specific adjustments
-        if "UK" in location_name or "United Kingdom" in location_name:
-            temp_max_var = 1.8
-            temp_min_var = 1.5
-            rainfall_var = 12.0
-        elif "France" in location_name:
-            temp_max_var = 2.1
-            temp_min_var = 1.8
-            rainfall_var = -8.0  # Drier summers
-        elif "Spain" in location_name:
-            temp_max_var = 2.8
-            temp_min_var = 2.2
-            rainfall_var = -22.0
-        elif "Germany" in location_name:
-            temp_max_var = 1.9
-            temp_min_var = 1.6
-            rainfall_var = 15.0
-        elif "Australia" in location_name:
-            temp_max_var = 1.4
-            temp_min_var = 1.1
-            rainfall_var = -15.0
-        else:
-            temp_max_var = base_warming
-            temp_min_var = base_warming * 0.8
-            rainfall_var = 8.0
-        
-        return {
-            "current_month": current_month,
-            "month_name": month_name,
-            "temp_max_variation": round(temp_max_var, 1),
-            "temp_min_variation": round(temp_min_var, 1),
-            "rainfall_variation_percent": round(rainfall_var, 1),
-            "baseline_period": "1990-2020",
-            "recent_period": "2020-2024",
-            "data_quality": "estimated"
-        }
-    
-    def _generate_realistic_temp_increase(self, location_name: str, latitude: float, longitude: float) -> Dict:
-        """Generate realistic annual temperature increase"""
-        # Global average is about 1.1°C, varies by location
-        base_increase = 1.1
-        
-        # Arctic amplification
-        if abs(latitude) > 60:
-            base_increase += 0.8
-        elif abs(latitude) > 45:
-            base_increase += 0.3
-        
-        # Regional variations
-        if "UK" in location_name or "United Kingdom" in location_name:
-            increase = 1.2
-        elif "France" in location_name:
-            increase = 1.4
-        elif "Spain" in location_name:
-            increase = 1.6
-        elif "Germany" in location_name:
-            increase = 1.3
-        elif "Australia" in location_name:
-            increase = 1.0
-        else:
-            increase = base_increase
-        
-        return {
-            "increase": round(increase, 1),
-            "recent_avg": 15.0,
-            "baseline_avg": 15.0 - increase,
-            "baseline_period": "1990-2020",
-            "recent_period": "2020-2024",
-            "confidence": "estimated"
-        }
-    
-    def _generate_realistic_current_data(self, location_name: str, latitude: float, longitude: float) -> Dict:
-        """Generate realistic fallback data based on geographic location"""
-        base_temp = self._get_base_temperature(location_name, latitude)
-        
-        return {
-            "current_temperature": round(base_temp + 2, 1),
-            "current_humidity": 65,
-            "avg_temp_max": round(base_temp + 8, 1),
-            "avg_temp_min": round(base_temp - 3, 1),
-            "total_precipitation": 80,
-            "last_updated": datetime.utcnow().isoformat(),
-            "data_source": "geographic-estimate"
-        }
-    
-    def _generate_realistic_projections(self, location_name: str, latitude: float, longitude: float) -> Dict:
-        """Generate realistic climate projections based on geography"""
-        # More warming expected at higher latitudes
-        base_warming = 1.5 + (abs(latitude) * 0.03)
-        
-        # Regional adjustments based on climate science
-        if abs(latitude) > 60:  # Arctic regions
-            base_warming += 1.0
-        elif abs(latitude) > 45:  # Temperate regions
-            base_warming += 0.3
-        
-        return {
-            "temperature_change_2050": round(base_warming, 1),
-            "current_avg_temp": 15.0,
-            "future_avg_temp": round(15.0 + base_warming, 1),
-            "extreme_heat_days_current": max(0, int((35 - abs(latitude)) * 0.5)),
-            "extreme_heat_days_future": max(0, int((35 - abs(latitude)) * 0.8)),
-            "precipitation_change_percent": round((latitude / 10) + 5, 1),
-            "last_updated": datetime.utcnow().isoformat(),
-            "data_source": "geographic-estimate"
-        }
-    
-    def _get_base_temperature(self, location_name: str, latitude: float) -> float:
-        """Get base temperature for a location"""
-        # Use latitude to estimate reasonable temperature ranges
-        base_temp = 20 - (abs(latitude) * 0.5)
-        
-        # Add location-specific adjustments
-        if "UK" in location_name or "United Kingdom" in location_name:
-            base_temp = 10
-        elif "France" in location_name:
-            base_temp = 14
-        elif "Australia" in location_name:
-            base_temp = 20
-        elif "Canada" in location_name:
-            base_temp = 6
-        elif "Norway" in location_name or "Finland" in location_name:
-            base_temp = 4
-        
-        return base_temp
-    
-    async def calculate_climate_resilience_score(self, climate_data: Dict, projections: Dict) -> int:
-        """Calculate a climate resilience score (0-100)"""
-        try:
-            score = 100
-            
-            # Penalize for temperature increases
-            temp_change = projections.get("temperature_change_2050", 0)
-            if temp_change > 3:
-                score -= 40
-            elif temp_change > 2:
-                score -= 25
-            elif temp_change > 1.5:
-                score -= 15
-            elif temp_change > 1:
-                score -= 10
-            
-            # Penalize for extreme heat days
-            extreme_heat_increase = projections.get("extreme_heat_days_future", 0) - projections.get("extreme_heat_days_current", 0)
-            if extreme_heat_increase > 30:
-                score -= 20
-            elif extreme_heat_increase > 15:
-                score -= 10
-            elif extreme_heat_increase > 5:
-                score -= 5
-            
-            # Penalize for extreme precipitation changes
-            precip_change = abs(projections.get("precipitation_change_percent", 0))
-            if precip_change > 30:
-                score -= 15
-            elif precip_change > 20:
-                score -= 10
-            elif precip_change > 10:
-                score -= 5
-            
-            return max(0, min(100, score))
-            
-        except Exception as e:
-            print(f"Error calculating resilience score: {e}")
-            return 75  # Default score
-    
-    def _generate_risk_assessment(self, projections: Dict, resilience_score: int) -> Dict:
-        """Generate human-readable risk assessment"""
-        temp_change = projections.get("temperature_change_2050", 0)
-        
-        if resilience_score >= 80:
-            risk_level = "Low"
-            description = "Minimal climate risks expected. Good long-term outlook."
-        elif resilience_score >= 60:
-            risk_level = "Moderate"
-            description = "Some climate challenges expected but manageable with adaptation."
-        elif resilience_score >= 40:
-            risk_level = "High"
-            description = "Significant climate risks. Consider adaptation measures."
-        else:
-            risk_level = "Very High"
-            description = "Severe climate risks. Relocation may be advisable."
-        
-        return {
-            "risk_level": risk_level,
-            "description": description,
-            "temperature_impact": f"+{temp_change}°C by 2050",
-            "key_concerns": self._identify_key_concerns(projections)
-        }
-    
-    def _identify_key_concerns(self, projections: Dict) -> List[str]:
-        """Identify main climate concerns"""
-        concerns = []
-        
-        temp_change = projections.get("temperature_change_2050", 0)
-        if temp_change > 2:
-            concerns.append("Significant temperature increase")
-        
-        extreme_heat_increase = projections.get("extreme_heat_days_future", 0) - projections.get("extreme_heat_days_current", 0)
-        if extreme_heat_increase > 10:
-            concerns.append("Increased extreme heat events")
-        
-        precip_change = projections.get("precipitation_change_percent", 0)
-        if precip_change > 20:
-            concerns.append("Increased flooding risk")
-        elif precip_change < -20:
-            concerns.append("Increased drought risk")
-        
-        if not concerns:
-            concerns.append("Stable climate conditions expected")
-        
-        return concerns
-    
-    def _generate_recommendations(self, projections: Dict, resilience_score: int) -> List[str]:
-        """Generate adaptation recommendations"""
-        recommendations = []
-        
-        if resilience_score < 60:
-            recommendations.append("Consider climate adaptation measures")
-            recommendations.append("Invest in cooling/heating systems")
-        
-        temp_change = projections.get("temperature_change_2050", 0)
-        if temp_change > 1.5:
-            recommendations.append("Prepare for increased energy costs")
-        
-        precip_change = projections.get("precipitation_change_percent", 0)
-        if precip_change > 15:
-            recommendations.append("Consider flood insurance and drainage")
-        elif precip_change < -15:
-            recommendations.append("Plan for water conservation measures")
-        
-        if resilience_score >= 80:
-            recommendations.append("Excellent climate stability - ideal for long-term planning")
-        
-        return recommendations
@@ -0,0 +1,68 @@
+"""
+Inverse-distance-weighted estimates of cached datasets from neighbouring grid cells
+"""
+from typing import List, Optional, Sequence, Tuple
+
+# Weight falls off with the square of the distance
+IDW_POWER = 2
+# Neighbours closer than this are treated as the point itself
+SAME_POINT_KM = 0.01
+# Redis GEO sets can't index points closer to the poles than this
+GEO_MAX_LATITUDE = 85.05112878
+# Continuous fields of the cached datasets, at any depth; other numbers
+# (weather codes, months, data point counts) mean nothing averaged
+BLENDED_FIELDS = frozenset((
+    # Current conditions
+    "current_temperature", "current_humidity", "current_precipitation", "total_precipitation",
+    # Current, recent, and per-month baseline averages
+    "avg_temp_max", "avg_temp_min", "avg_precipitation", "annual_avg_temp",
+    # Projections
+    "temperature_change_2050", "current_avg_temp", "future_avg_temp",
+    "extreme_heat_days_current", "extreme_heat_days_future", "precipitation_change_percent"
+))
+
+def geo_index_key(family: str) -> str:
+    """Redis GEO set of the cells cached in a key family; purged along with the family"""
+    return f"{family}:geo"
+
+def surrounds(latitude: float, longitude: float, cells: Sequence[Tuple[float, float]], min_quadrants: int = 3) -> bool:
+    """Whether the cells lie on enough sides of the point to interpolate rather than extrapolate"""
+    quadrants = {(cell_lat >= latitude, cell_lon >= longitude) for cell_lat, cell_lon in cells}
+    return len(quadrants) >= min_quadrants
+
+def idw(values: List, distances_km: List[float]):
+    """Weighted average of same-shaped datasets; BLENDED_FIELDS are blended, everything else comes from the nearest
+
+    Integers stay integers (day counts). Keys missing from any neighbour are
+    taken from the nearest one.
+    """
+    nearest = distances_km.index(min(distances_km))
+    if distances_km[nearest] < SAME_POINT_KM:
+        return values[nearest]
+    weights = [1 / distance ** IDW_POWER for distance in distances_km]
+    return _blend(values, weights, nearest)
+
+def _blend(values: List, weights: List[float], nearest: int, field: Optional[str] = None):
+    first = values[nearest]
+    if field in BLENDED_FIELDS and all(_is_number(value) for value in values):
+        blended = sum(weight * value for weight, value in zip(weights, values)) / sum(weights)
+        return int(round(blended)) if all(isinstance(value, int) for value in values) else blended
+    if isinstance(first, dict) and all(isinstance(value, dict) for value in values):
+        return {
+            key: _blend([value[key] for value in values], weights, nearest, key) if all(key in value for value in values) else first[key]
+            for key in first
+        }
+    return first
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def parse_cell(member) -> Optional[Tuple[float, float]]:
+    """Coordinates of a "lat:lon" GEO member"""
+    if isinstance(member, bytes):
+        member = member.decode()
+    try:
+        latitude, longitude = member.split(":")
+        return float(latitude), float(longitude)
+    except ValueError:
+        return None
@@ -0,0 +1,158 @@
+"""
+Precomputed table of places with their climate features, for ranking without upstream calls
+
+The table is a .npz of equal-length column arrays written by
+tools/build_places.py. It is loaded whole (a few MB for tens of thousands of
+places); scores and ranking order are computed once at load, so a query is
+a few boolean masks and a partial sort, plus a matrix-vector product when
+it carries its own score weights.
+"""
+import json
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.scoring import SCORE_FACTORS, weight_vector
+
+# Column name -> dtype, as stored in the .npz
+PLACE_COLUMNS = {
+    "name": "U",
+    "country": "U",
+    "admin1": "U",
+    "latitude": "<f8",
+    "longitude": "<f8",
+    "population": "<i8",
+    # Recent annual mean temperature, °C
+    "current_temp": "<f4",
+    "temp_change": "<f4",
+    "heat_days_current": "<i2",
+    "heat_days_future": "<i2",
+    "precipitation_change": "<f4"
+}
+
+def _penalties(values: np.ndarray, penalties: Sequence[Tuple[float, int]]) -> np.ndarray:
+    return np.select([values > threshold for threshold, _ in penalties], [penalty for _, penalty in penalties], 0)
+
+def factor_matrix(temperature_change: np.ndarray, heat_day_increase: np.ndarray, precipitation_change: np.ndarray) -> np.ndarray:
+    """scoring.score_factors over arrays of places, one row per place in SCORE_FACTORS order"""
+    values = (temperature_change, heat_day_increase, np.abs(precipitation_change))
+    return np.stack([
+        _penalties(np.asarray(column), penalties) / penalties[0][1]
+        for column, penalties in zip(values, SCORE_FACTORS.values())
+    ], axis=1)
+
+def weighted_scores(factors: np.ndarray, weights: Sequence[float]) -> np.ndarray:
+    """scoring.weighted_score over rows of factors"""
+    return np.clip(np.rint(100 - factors @ np.asarray(weights)), 0, 100).astype(np.int16)
+
+class PlaceTable:
+    """Columnar place features with precomputed resilience scores and ranking order"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with np.load(path, allow_pickle=False) as stored:
+            missing = [name for name in PLACE_COLUMNS if name not in stored.files]
+            if missing:
+                raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+            self.columns = {name: stored[name] for name in PLACE_COLUMNS}
+            self.meta = json.loads(str(stored["meta"])) if "meta" in stored.files else {}
+        self.size = len(self.columns["name"])
+        self.heat_day_increase = self.columns["heat_days_future"].astype(np.int32) - self.columns["heat_days_current"]
+        self.factors = factor_matrix(self.columns["temp_change"], self.heat_day_increase, self.columns["precipitation_change"])
+        self.scores = weighted_scores(self.factors, weight_vector())
+        # Larger places rank first among equal scores
+        self.population_rank = np.empty(self.size, dtype=np.int64)
+        self.population_rank[np.argsort(-self.columns["population"], kind="stable")] = np.arange(self.size)
+        self.rank = self._rank_keys(self.scores, self.population_rank)
+        # Countries as small integer codes, so filtering by country is an integer comparison
+        countries, self.country_codes = np.unique(np.char.lower(self.columns["country"]), return_inverse=True)
+        self.country_index = {country: code for code, country in enumerate(countries.tolist())}
+
+    def _rank_keys(self, scores: np.ndarray, population_rank: np.ndarray) -> np.ndarray:
+        """Sort keys ordering places by score, then population"""
+        return (100 - scores.astype(np.int64)) * self.size + population_rank
+
+    def top(self, k: int, countries: Sequence[str] = (), min_population: Optional[int] = None, max_population: Optional[int] = None,
+            min_temp: Optional[float] = None, max_temp: Optional[float] = None, weights: Optional[Dict[str, float]] = None) -> Tuple[List[Dict], int]:
+        """The k best-scoring places passing the filters, and how many passed
+
+        With a weight profile, the passing places are rescored from their
+        stored factors before selection.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if countries:
+            codes = [self.country_index[country.lower()] for country in countries if country.lower() in self.country_index]
+            mask &= np.isin(self.country_codes, codes)
+        population = self.columns["population"]
+        if min_population is not None:
+            mask &= population >= min_population
+        if max_population is not None:
+            mask &= population <= max_population
+        current_temp = self.columns["current_temp"]
+        if min_temp is not None:
+            mask &= current_temp >= min_temp
+        if max_temp is not None:
+            mask &= current_temp <= max_temp
+
+        matched = np.flatnonzero(mask)
+        if weights:
+            scores = weighted_scores(self.factors[matched], weight_vector(weights))
+            rank = self._rank_keys(scores, self.population_rank[matched])
+        else:
+            scores, rank = self.scores[matched], self.rank[matched]
+        order = np.arange(matched.size)
+        if k < matched.size:
+            # Only the k best need ordering
+            order = np.argpartition(rank, k - 1)[:k]
+        order = order[np.argsort(rank[order])]
+        return self._rows(matched[order], scores[order]), int(matched.size)
+
+    def _rows(self, indexes: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        columns = {name: column[indexes].tolist() for name, column in self.columns.items()}
+        scores = scores.tolist()
+        heat_day_increase = self.heat_day_increase[indexes].tolist()
+        return [
+            {
+                "rank": i + 1,
+                "name": columns["name"][i],
+                "country": columns["country"][i],
+                "admin1": columns["admin1"][i] or None,
+                "latitude": columns["latitude"][i],
+                "longitude": columns["longitude"][i],
+                "population": columns["population"][i],
+                "resilience_score": scores[i],
+                "current_avg_temp": round(columns["current_temp"][i], 1),
+                "temperature_change_2050": round(columns["temp_change"][i], 2),
+                "extreme_heat_days_increase": heat_day_increase[i],
+                "precipitation_change_percent": round(columns["precipitation_change"][i], 1)
+            }
+            for i in range(len(indexes))
+        ]
+
+    def snapshot(self) -> Dict:
+        return {"path": self.path, "places": self.size, "countries": len(self.country_index), **self.meta}
+
+_table: Optional[PlaceTable] = None
+_table_loaded = False
+_table_lock = threading.Lock()
+
+def get_place_table() -> Optional[PlaceTable]:
+    """Process-wide table loaded from PLACES_TABLE_PATH, or None when not configured or unreadable"""
+    global _table, _table_loaded
+    if not _table_loaded:
+        # Concurrent first callers wait for the load instead of seeing None
+        with _table_lock:
+            if not _table_loaded:
+                if settings.places_table_path:
+                    try:
+                        _table = PlaceTable(settings.places_table_path)
+                    except (OSError, ValueError) as e:
+                        print(f"Places table not available, ranking disabled: {e}")
+                _table_loaded = True
+    return _table
+
+def loaded_place_table() -> Optional[PlaceTable]:
+    """The table if get_place_table has already loaded it; never loads"""
+    return _table
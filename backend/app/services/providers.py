@@ -0,0 +1,215 @@
+"""
+Analysis providers behind one interface, raced in order under a soft deadline
+"""
+import asyncio
+import contextvars
+import traceback
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.timing import mark
+
+# Runs of keep_running providers by (provider, request key). Concurrent
+# requests for the same analysis wait on one run, which is referenced here
+# until it finishes filling the cache, even after every request has moved on
+_shared_runs: Dict[Tuple[str, Hashable], asyncio.Task] = {}
+
+def _location_key(location: str, **params) -> Hashable:
+    return location.lower()
+
+class AnalysisProvider:
+    """A named source of location analyses, called with the chain's location label and parameters"""
+
+    def __init__(self, name: str, analyze: Callable[..., Awaitable[Optional[Dict]]], keep_running: bool = False,
+                 key: Callable[..., Hashable] = _location_key):
+        self.name = name
+        self.analyze = analyze
+        # Let the call finish in the background when a later provider wins the
+        # race; worthwhile for providers that cache their real results
+        self.keep_running = keep_running
+        # Identifies requests a keep_running provider can answer with one shared run
+        self.key = key
+
+class ProviderResult:
+    """An analysis and the provider that produced it"""
+
+    def __init__(self, analysis: Dict, provider: str, fallback: bool):
+        self.analysis = analysis
+        self.provider = provider
+        # True when a provider other than the first one answered
+        self.fallback = fallback
+
+class ProviderChain:
+    """Ask providers in order, moving on when one misses its soft deadline
+
+    A provider that misses the deadline is not cancelled: it keeps racing the
+    next one, and whichever earlier provider answers first wins. The last
+    provider has no deadline, so worst-case latency is roughly one soft
+    deadline per provider ahead of it plus the last provider's own time.
+    """
+
+    def __init__(self, providers: List[AnalysisProvider], soft_deadline: float):
+        self.providers = providers
+        self.soft_deadline = soft_deadline
+
+    async def analyze(self, location: str, **params) -> Optional[ProviderResult]:
+        """First analysis answered for a location label, passing params on to every provider"""
+        loop = asyncio.get_running_loop()
+        tasks: Dict[asyncio.Task, int] = {}
+        winner: Optional[ProviderResult] = None
+        for index, provider in enumerate(self.providers):
+            tasks[self._start(provider, location, params)] = index
+            is_last = index == len(self.providers) - 1
+            deadline = None if is_last else loop.time() + self.soft_deadline
+            winner = await self._first_result(tasks, deadline)
+            if winner:
+                break
+        self._settle(tasks)
+        if winner:
+            mark("provider", winner.provider)
+        return winner
+
+    def _start(self, provider: AnalysisProvider, location: str, params: Dict) -> asyncio.Task:
+        """A task running the provider, joining a keep_running provider's run for the same request key if there is one"""
+        if not provider.keep_running:
+            return asyncio.create_task(self._run(provider, location, params))
+        run_key = (provider.name, provider.key(location, **params))
+        task = _shared_runs.get(run_key)
+        if task is None:
+            # A fresh context, so the request's timings and profile don't pick up work that may outlive it
+            task = asyncio.create_task(self._run(provider, location, params), context=contextvars.Context())
+            _shared_runs[run_key] = task
+            task.add_done_callback(lambda _: _shared_runs.pop(run_key, None))
+        return task
+
+    async def _first_result(self, tasks: Dict[asyncio.Task, int], deadline: Optional[float]) -> Optional[ProviderResult]:
+        """Wait for the first successful pending provider, or until the deadline passes"""
+        loop = asyncio.get_running_loop()
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            timeout = None if deadline is None else deadline - loop.time()
+            if timeout is not None and timeout <= 0:
+                return None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the earliest provider among those finishing together
+            for task in sorted(done, key=tasks.get):
+                if task.result():
+                    index = tasks[task]
+                    return ProviderResult(task.result(), self.providers[index].name, fallback=index > 0)
+        return None
+
+    def _settle(self, tasks: Dict[asyncio.Task, int]) -> None:
+        """Leave cache-filling providers' shared runs going in the background and cancel the rest"""
+        for task, index in tasks.items():
+            if task.done():
+                continue
+            provider = self.providers[index]
+            if provider.keep_running:
+                print(f"Provider {provider.name} continues in the background")
+            else:
+                task.cancel()
+
+    async def _run(self, provider: AnalysisProvider, location: str, params: Dict) -> Optional[Dict]:
+        try:
+            analysis = await provider.analyze(location, **params)
+        except Exception as e:
+            print(f"Provider {provider.name} failed for {location}: {e}")
+            traceback.print_exc()
+            return None
+        if not analysis:
+            print(f"Provider {provider.name} returned nothing for {location}")
+        return analysis
+
+async def _open_meteo_analysis(location: str) -> Optional[Dict]:
+    from app.services.climate_service import ClimateDataService
+    return await ClimateDataService().get_comprehensive_climate_analysis(location)
+
+# Base temperatures for the few countries the estimate recognises in a location label
+ESTIMATE_COUNTRIES: Tuple[Tuple[Tuple[str, ...], str, float], ...] = (
+    (("UK", "United Kingdom"), "United Kingdom", 12.0),
+    (("France",), "France", 16.0),
+    (("Spain",), "Spain", 20.0),
+    (("Germany",), "Germany", 14.0)
+)
+
+async def _estimated_analysis(location: str, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Dict:
+    """Rough analysis from the location label, at the requested coordinates when there are any; never fails"""
+    country, base_temp = next(
+        ((country, base_temp) for names, country, base_temp in ESTIMATE_COUNTRIES if any(name in location for name in names)),
+        ("Unknown", 15.0)
+    )
+    return {
+        "location": {
+            "name": location.split(",")[0].strip(),
+            "country": country,
+            "latitude": latitude,
+            "longitude": longitude,
+            "population": 100000
+        },
+        "current_climate": {
+            "current_temperature": round(base_temp + 1.5, 1),
+            "current_humidity": 65,
+            "avg_temp_max": round(base_temp + 6, 1),
+            "avg_temp_min": round(base_temp - 2, 1),
+            "total_precipitation": 80
+        },
+        "projections": {
+            "temperature_change_2050": 1.8,
+            "current_avg_temp": base_temp,
+            "future_avg_temp": round(base_temp + 1.8, 1),
+            "extreme_heat_days_current": 5,
+            "extreme_heat_days_future": 12,
+            "precipitation_change_percent": 8.5
+        },
+        "resilience_score": 75,
+        "risk_assessment": {
+            "risk_level": "Moderate",
+            "description": "Climate analysis temporarily unavailable - using estimated data.",
+            "temperature_impact": "+1.8°C by 2050",
+            "key_concerns": ["Rising temperatures", "Changing precipitation patterns"]
+        },
+        "recommendations": [
+            "Monitor local climate adaptation plans",
+            "Consider energy-efficient cooling systems"
+        ],
+        "last_updated": datetime.utcnow().isoformat(),
+        "data_source": "simplified-fallback"
+    }
+
+def _coordinate_analysis_key(location: str, latitude: float, longitude: float, name: str = None, country: str = None,
+                             admin1: str = None, sections: Optional[Tuple[str, ...]] = None) -> Hashable:
+    """The analysis cache key's grid cell and label, plus the sections asked for"""
+    from app.services.climate_service import coordinate_key
+    label = "|".join((name or "Unknown", country or "Unknown", admin1 or "")).lower()
+    return coordinate_key(latitude, longitude), label, sections
+
+async def _open_meteo_coordinate_analysis(location: str, latitude: float, longitude: float, name: str = None, country: str = None,
+                                          admin1: str = None, sections: Optional[Tuple[str, ...]] = None) -> Optional[Dict]:
+    from app.services.climate_service import ClimateDataService
+    return await ClimateDataService().get_comprehensive_climate_analysis_by_coords(latitude, longitude, name, country, admin1, sections=sections)
+
+async def _estimated_coordinate_analysis(location: str, latitude: float, longitude: float, name: str = None, country: str = None,
+                                         admin1: str = None, sections: Optional[Tuple[str, ...]] = None) -> Dict:
+    from app.services.climate_service import ClimateDataService
+    return await ClimateDataService().get_degraded_analysis_by_coords(latitude, longitude, name, country, admin1, sections=sections)
+
+def default_provider_chain() -> ProviderChain:
+    """Open-Meteo analysis of a location name, then an estimate from the name"""
+    return ProviderChain(
+        providers=[
+            AnalysisProvider("open-meteo", _open_meteo_analysis, keep_running=True),
+            AnalysisProvider("simple-estimate", _estimated_analysis)
+        ],
+        soft_deadline=settings.provider_soft_deadline_seconds
+    )
+
+def coordinate_provider_chain() -> ProviderChain:
+    """Open-Meteo analysis of coordinates, then the cached analysis or estimates for them, without upstream calls"""
+    return ProviderChain(
+        providers=[
+            AnalysisProvider("open-meteo", _open_meteo_coordinate_analysis, keep_running=True, key=_coordinate_analysis_key),
+            AnalysisProvider("fallback-estimate", _estimated_coordinate_analysis)
+        ],
+        soft_deadline=settings.provider_soft_deadline_seconds
+    )
@@ -0,0 +1,83 @@
+"""
+Climate resilience scoring of a location, under the standard or a personalized weight profile
+
+Plain Python, so analyses can be scored without loading numpy; places.py
+applies the same factors and weights to a whole table at once.
+
+A score is 100 minus a weighted sum of factors, each the fraction (0-1) of
+its maximum penalty a location incurs. The default weights are the maximum
+penalties, which gives the standard score; a weight profile shifts the same
+total among the factors, so personalized scores need only the stored factors.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (threshold, penalty) pairs, highest threshold first; the first threshold exceeded applies
+TEMPERATURE_CHANGE_PENALTIES: Sequence[Tuple[float, int]] = ((3, 40), (2, 25), (1.5, 15), (1, 10))
+HEAT_DAY_INCREASE_PENALTIES: Sequence[Tuple[float, int]] = ((30, 20), (15, 10), (5, 5))
+# Applied to the size of the change, drier or wetter
+PRECIPITATION_CHANGE_PENALTIES: Sequence[Tuple[float, int]] = ((30, 15), (20, 10), (10, 5))
+
+SCORE_FACTORS = {
+    "temperature_change": TEMPERATURE_CHANGE_PENALTIES,
+    "heat_day_increase": HEAT_DAY_INCREASE_PENALTIES,
+    "precipitation_change": PRECIPITATION_CHANGE_PENALTIES
+}
+# Points each factor can take off the score by default: its largest penalty
+DEFAULT_WEIGHTS = {factor: penalties[0][1] for factor, penalties in SCORE_FACTORS.items()}
+TOTAL_WEIGHT = sum(DEFAULT_WEIGHTS.values())
+
+def _penalty(value: float, penalties: Sequence[Tuple[float, int]]) -> int:
+    return next((penalty for threshold, penalty in penalties if value > threshold), 0)
+
+def score_factors(projections: Dict) -> Dict[str, float]:
+    """Normalized factor vector of a location's projections, stored alongside its score"""
+    values = {
+        "temperature_change": projections.get("temperature_change_2050", 0),
+        "heat_day_increase": projections.get("extreme_heat_days_future", 0) - projections.get("extreme_heat_days_current", 0),
+        "precipitation_change": abs(projections.get("precipitation_change_percent", 0))
+    }
+    return {factor: _penalty(values[factor], penalties) / penalties[0][1] for factor, penalties in SCORE_FACTORS.items()}
+
+def weight_vector(weights: Optional[Dict[str, float]] = None) -> List[float]:
+    """A weight profile as points per factor, scaled to the default total
+
+    Weights are relative and factors left out count for nothing, so
+    {"temperature_change": 1} scores on temperature change alone.
+    """
+    if not weights:
+        return [float(weight) for weight in DEFAULT_WEIGHTS.values()]
+    unknown = [factor for factor in weights if factor not in SCORE_FACTORS]
+    if unknown:
+        raise ValueError(f"Unknown score factors: {', '.join(unknown)} (expected any of {', '.join(SCORE_FACTORS)})")
+    values = [float(weights.get(factor, 0)) for factor in SCORE_FACTORS]
+    if any(value < 0 or not math.isfinite(value) for value in values) or sum(values) <= 0:
+        raise ValueError("Weights must be non-negative numbers, not all zero")
+    total = sum(values)
+    return [value * TOTAL_WEIGHT / total for value in values]
+
+def parse_weights(value: Optional[str]) -> Optional[Dict[str, float]]:
+    """Parse a "factor:weight,factor:weight" query parameter"""
+    if not value:
+        return None
+    weights = {}
+    for entry in value.split(","):
+        factor, _, weight = entry.partition(":")
+        try:
+            weights[factor.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {factor.strip()!r}: {weight!r}") from None
+    return weights
+
+def weighted_score(factors: Dict[str, float], weights: Sequence[float]) -> int:
+    """Score (0-100) of a location's factors under a weight vector"""
+    return max(0, min(100, round(100 - sum(factors[factor] * weight for factor, weight in zip(SCORE_FACTORS, weights)))))
+
+def resilience_score(projections: Dict) -> int:
+    """Climate resilience score (0-100) from a location's projections"""
+    heat_day_increase = projections.get("extreme_heat_days_future", 0) - projections.get("extreme_heat_days_current", 0)
+    score = 100
+    score -= _penalty(projections.get("temperature_change_2050", 0), TEMPERATURE_CHANGE_PENALTIES)
+    score -= _penalty(heat_day_increase, HEAT_DAY_INCREASE_PENALTIES)
+    score -= _penalty(abs(projections.get("precipitation_change_percent", 0)), PRECIPITATION_CHANGE_PENALTIES)
+    return max(0, min(100, score))
@@ -0,0 +1,179 @@
+"""
+Micro-benchmarks for the climate aggregation, scoring and cache encoding hot paths
+
+Inputs are synthetic daily series of the sizes the upstreams return: 5 years
+(recent averages), 31 years (1990-2020 baseline) and 27 years (2024-2050
+projections). Run from the backend directory:
+
+    python -m benchmarks.run                                   # print results
+    python -m benchmarks.run --save benchmarks/baselines/laptop.json
+    python -m benchmarks.run --compare benchmarks/baselines/laptop.json --threshold 0.3
+
+Compare mode exits with status 1 when a benchmark's median is slower than
+the baseline by more than the threshold and its repeats' interquartile
+range lies wholly above the baseline's; a median shift inside overlapping
+ranges is reported as noise. Baselines are only comparable on the same
+machine and Python version, so they are not committed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, List, Tuple
+
+from app.core.serialization import dumps, loads
+from app.services.climate_service import ClimateDataService
+from tools.openmeteo_standin import synthetic_daily_series
+
+VARIABLES = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+
+def _series(start: date, end: date) -> Dict:
+    return synthetic_daily_series(51.5, -0.13, start, end, VARIABLES)
+
+def build_benchmarks() -> List[Tuple[str, Callable[[], object]]]:
+    """(name, zero-argument callable) for every benchmark"""
+    service = ClimateDataService()
+    loop = asyncio.new_event_loop()
+    recent = _series(date(2020, 1, 1), date(2024, 12, 31))
+    baseline = _series(date(1990, 1, 1), date(2020, 12, 31))
+    projections_daily = _series(date(2024, 1, 1), date(2050, 12, 31))
+
+    baseline_summary = service._calculate_monthly_baselines(baseline)
+    recent_summary = service._calculate_recent_averages(recent)
+    projections = service._summarize_projections(projections_daily)
+    analysis = {
+        "location": {"name": "London", "country": "United Kingdom", "admin1": "England", "latitude": 51.5, "longitude": -0.13},
+        "current_climate": {"current_temperature": 14.2, "weekly_temp_max": [18.1] * 7, "data_source": "open-meteo"},
+        "climate_variations": service._calculate_climate_variations(recent_summary, baseline_summary),
+        "annual_temp_increase": service._calculate_annual_temp_increase(recent_summary, baseline_summary),
+        "projections": projections,
+        "resilience_score": 80,
+        "risk_assessment": service._generate_risk_assessment(projections, 80),
+        "recommendations": service._generate_recommendations(projections, 80),
+        "last_updated": datetime.utcnow().isoformat()
+    }
+    encoded_analysis = dumps(analysis)
+    encoded_baseline = dumps(baseline_summary)
+    encoded_archive = dumps({"daily": baseline})
+
+    return [
+        ("monthly_baselines_31y", lambda: service._calculate_monthly_baselines(baseline)),
+        ("recent_averages_5y", lambda: service._calculate_recent_averages(recent)),
+        ("summarize_projections_27y", lambda: service._summarize_projections(projections_daily)),
+        ("precipitation_change_27y", lambda: service._calculate_precipitation_change(projections_daily["precipitation_sum"])),
+        ("resilience_score", lambda: loop.run_until_complete(service.calculate_climate_resilience_score({}, projections))),
+        ("encode_analysis", lambda: dumps(analysis)),
+        ("decode_analysis", lambda: loads(encoded_analysis)),
+        ("encode_baseline", lambda: dumps(baseline_summary)),
+        ("decode_baseline", lambda: loads(encoded_baseline)),
+        ("decode_archive_response_31y", lambda: loads(encoded_archive))
+    ]
+
+def measure(func: Callable[[], object], min_time: float, repeats: int) -> Dict:
+    """Calibrate a loop count that runs for about min_time, then time several repeats of it"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = loops * 10 if elapsed < min_time / 10 else int(loops * min_time / elapsed) + 1
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / loops * 1000)
+    q1, _, q3 = statistics.quantiles(samples, n=4) if len(samples) > 1 else samples * 3
+    return {
+        "median_ms": round(statistics.median(samples), 6),
+        "q1_ms": round(q1, 6),
+        "q3_ms": round(q3, 6),
+        "min_ms": round(min(samples), 6),
+        "stdev_ms": round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeats": repeats
+    }
+
+def run(selected: List[str], min_time: float, repeats: int) -> Dict:
+    results = {}
+    for name, func in build_benchmarks():
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        results[name] = measure(func, min_time, repeats)
+        print(f"{name:32s} {results[name]['median_ms']:12.4f} ms  (min {results[name]['min_ms']:.4f}, x{results[name]['loops']})")
+    return {
+        "meta": {
+            "created": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "processor": platform.processor()
+        },
+        "results": results
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print the change per benchmark; return True if any regressed beyond the threshold and the noise
+
+    Baselines saved before quartiles were recorded fall back to their
+    median, so for them only the threshold applies.
+    """
+    regressed = False
+    print(f"\n{'benchmark':32s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:32s} {'-':>12s} {result['median_ms']:12.4f} {'new':>8s}")
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        flag = ""
+        if change > threshold:
+            if result["q1_ms"] > before.get("q3_ms", before["median_ms"]):
+                flag = "  REGRESSION"
+                regressed = True
+            else:
+                flag = "  noise (IQRs overlap)"
+        elif change < -threshold:
+            if result["q3_ms"] < before.get("q1_ms", before["median_ms"]):
+                flag = "  improved"
+            else:
+                flag = "  noise (IQRs overlap)"
+        print(f"{name:32s} {before['median_ms']:12.4f} {result['median_ms']:12.4f} {change:+7.1%}{flag}")
+    if baseline["meta"].get("python") != current["meta"]["python"] or baseline["meta"].get("machine") != current["meta"]["machine"]:
+        print("\nWarning: baseline was recorded on a different Python version or machine")
+    return regressed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for climate aggregation, scoring and cache encoding")
+    parser.add_argument("benchmarks", nargs="*", help="Only run benchmarks whose name contains one of these")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Relative median slowdown counted as a regression when the IQRs don't overlap (default 0.20)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    parser.add_argument("--repeats", type=int, default=11, help="Timed repeats, whose median and IQR are compared")
+    args = parser.parse_args()
+
+    results = run(args.benchmarks, args.min_time, args.repeats)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
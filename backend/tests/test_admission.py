@@ -0,0 +1,71 @@
+import asyncio
+
+from app.core.admission import AdmissionController, AdmissionMiddleware, RouteClass
+
+def _controller(max_in_flight=10):
+    analyze = RouteClass("analyze", ["/climate/analyze"], limit=1, max_wait=0.05, priority=0, on_overload="degrade")
+    compare = RouteClass("compare", ["/climate/compare"], limit=8, max_wait=0.05, priority=2)
+    return AdmissionController([analyze, compare], max_in_flight=max_in_flight), analyze, compare
+
+def test_requests_over_the_route_limit_are_overloaded_after_max_wait():
+    async def run():
+        controller, analyze, _ = _controller()
+        assert await controller.admit(analyze)
+        assert not await controller.admit(analyze)
+        controller.release(analyze)
+        assert await controller.admit(analyze)
+        return analyze.snapshot()
+
+    snapshot = asyncio.run(run())
+    assert (snapshot["admitted"], snapshot["overloaded"], snapshot["in_flight"]) == (2, 1, 1)
+
+def test_lower_priorities_are_shed_first_under_global_pressure():
+    async def run():
+        controller, analyze, compare = _controller(max_in_flight=1)
+        assert await controller.admit(compare)
+        # At the global cap: low priority is shed at once, top priority may still queue
+        assert not await controller.admit(compare)
+        assert await controller.admit(analyze)
+        return compare.snapshot()
+
+    snapshot = asyncio.run(run())
+    assert snapshot["queue_wait_ms"]["max"] < 50
+    assert snapshot["overloaded"] == 1
+
+def _call(middleware, path):
+    messages = []
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["admission"] = scope.get("state", {}).get("admission")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        middleware.app = app
+        await middleware({"type": "http", "path": path, "headers": []}, receive, send)
+
+    asyncio.run(run())
+    return messages[0], seen
+
+def test_middleware_sheds_or_degrades_by_route_policy():
+    # No slots anywhere: every classified request is overloaded
+    analyze = RouteClass("analyze", ["/climate/analyze"], limit=0, max_wait=0.01, priority=0, on_overload="degrade")
+    compare = RouteClass("compare", ["/climate/compare"], limit=0, max_wait=0.01, priority=2)
+    middleware = AdmissionMiddleware(None, AdmissionController([analyze, compare], max_in_flight=10), retry_after=7)
+
+    start, seen = _call(middleware, "/climate/compare")
+    assert start["status"] == 503 and (b"retry-after", b"7") in start["headers"]
+    assert seen == {}
+
+    start, seen = _call(middleware, "/climate/analyze")
+    assert start["status"] == 200 and seen["admission"] == "degraded"
+
+    start, seen = _call(middleware, "/health")
+    assert start["status"] == 200 and seen["admission"] is None
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.services.analogs import VECTOR_SIZE, AnalogIndex, climate_vectors, standardization
+
+NAMES = ["Oslo", "Madrid", "Lyon", "Rome", "Cairo", "Perth"]
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(7)
+    present = rng.normal([10.0] * 24 + [60.0] * 12, [6.0] * 24 + [30.0] * 12, size=(len(NAMES), VECTOR_SIZE)).astype(np.float32)
+    return present, present + 2.0
+
+@pytest.fixture
+def index(tmp_path, vectors):
+    present, future = vectors
+    mean, scale = standardization(present)
+    path = tmp_path / "analogs.npz"
+    np.savez(
+        path,
+        present=(present - mean) / scale,
+        future=(future - mean) / scale,
+        mean=mean,
+        scale=scale,
+        meta=np.array(json.dumps({"source": "test"})),
+        name=np.array(NAMES),
+        country=np.array(["X"] * len(NAMES)),
+        admin1=np.array([""] * len(NAMES)),
+        latitude=np.arange(len(NAMES), dtype="<f8"),
+        longitude=np.arange(len(NAMES), dtype="<f8"),
+        population=np.full(len(NAMES), 100000, dtype="<i8")
+    )
+    return AnalogIndex(str(path))
+
+def _brute_force(index, vector, period):
+    distances = np.linalg.norm(index.vectors[period] - index.standardize(vector), axis=1)
+    return [NAMES[i] for i in np.argsort(distances)]
+
+def test_search_finds_the_exact_match_first(index, vectors):
+    present, _ = vectors
+    results = index.search(present[2], 3, "present")
+    assert [row["rank"] for row in results] == [1, 2, 3]
+    assert results[0]["name"] == "Lyon" and results[0]["distance"] == pytest.approx(0, abs=1e-3)
+    assert results[0]["admin1"] is None
+    assert [row["distance"] for row in results] == sorted(row["distance"] for row in results)
+
+def test_search_matches_brute_force_nearest_neighbours(index, vectors):
+    present, future = vectors
+    query = 0.3 * present[0] + 0.7 * present[4]
+    for period in ("present", "future"):
+        assert [row["name"] for row in index.search(query, 4, period)] == _brute_force(index, query, period)[:4]
+    assert index.search(future[1], 1, "future")[0]["name"] == "Madrid"
+
+def test_search_returns_every_place_when_k_exceeds_the_index(index, vectors):
+    present, _ = vectors
+    assert [row["name"] for row in index.search(present[5], 50, "present")] == _brute_force(index, present[5], "present")
+
+def test_climate_vectors_align_southern_seasons():
+    baseline = {"monthly_baselines": {
+        str(month): {"avg_temp_max": float(month), "avg_temp_min": -float(month), "avg_precipitation": 10.0} for month in range(1, 13)
+    }}
+    projections = {"temperature_change_2050": 2.0, "precipitation_change_percent": -50}
+    present, future = climate_vectors(baseline, projections, 45.0)
+    assert present[:12].tolist() == [float(month) for month in range(1, 13)]
+    assert future[:12].tolist() == [month + 2.0 for month in range(1, 13)]
+    assert future[24:].tolist() == [5.0] * 12
+    southern, _ = climate_vectors(baseline, projections, -33.9)
+    assert southern[0] == 7.0
+
+def test_climate_vectors_need_every_month():
+    assert climate_vectors({"monthly_baselines": {"1": {"avg_temp_max": 1, "avg_temp_min": 0, "avg_precipitation": 1}}}, {}, 0) is None
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+from app.main import _etag_matches, app
+from app.services.climate_service import ClimateDataService
+
+ENCODED = b'{"location":{"name":"London"},"resilience_score":80}'
+
+def test_etag_matches_uses_weak_comparison():
+    assert _etag_matches('"abc"', '"abc"')
+    assert _etag_matches('W/"abc"', '"abc"')
+    assert _etag_matches('"abc"', 'W/"abc"')
+    assert _etag_matches('"old", W/"abc"', '"abc"')
+    assert _etag_matches("*", '"abc"')
+    assert not _etag_matches(None, '"abc"')
+    assert not _etag_matches('"abcd"', '"abc"')
+
+def test_cached_analysis_revalidates_with_304(monkeypatch):
+    monkeypatch.setattr(ClimateDataService, "get_cached_analysis", lambda self, *args: (ENCODED, "abc", 3600))
+    client = TestClient(app)
+    params = {"lat": 51.5, "lon": 0.0, "name": "London"}
+
+    response = client.get("/climate/analyze", params=params)
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == "public, max-age=3600"
+    assert response.json()["data"]["resilience_score"] == 80
+
+    response = client.get("/climate/analyze", params=params, headers={"If-None-Match": '"abc"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == '"abc"'
+
+    response = client.get("/climate/analyze", params=params, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.interpolation import idw, parse_cell, surrounds
+
+def test_surrounds_needs_cells_on_enough_sides():
+    corners = [(50.5, 0.5), (50.5, -0.5), (49.5, 0.5), (49.5, -0.5)]
+    assert surrounds(50.0, 0.0, corners)
+    assert surrounds(50.0, 0.0, corners[:3])
+    assert not surrounds(50.0, 0.0, corners[:2])
+    # All to the north-east: extrapolation
+    assert not surrounds(50.0, 0.0, [(50.5, 0.5), (51.0, 1.0), (50.2, 0.1)])
+
+def test_idw_weights_by_inverse_square_distance():
+    values = [{"current_temperature": 10.0}, {"current_temperature": 20.0}]
+    # Weights 1 and 1/4
+    assert idw(values, [1.0, 2.0])["current_temperature"] == pytest.approx(12.0)
+
+def test_idw_returns_a_coincident_neighbour_unchanged():
+    values = [{"current_temperature": 10.0}, {"current_temperature": 20.0}]
+    assert idw(values, [5.0, 0.001]) is values[1]
+
+def test_idw_blends_only_continuous_fields():
+    near = {
+        "current_climate": {"current_temperature": 10.0, "weather_code": 3, "weekly_temp_max": [12.0, 13.0]},
+        "projections": {"extreme_heat_days_current": 4, "extreme_heat_days_future": 10},
+        "monthly_baselines": {"1": {"avg_temp_max": 5.0, "month": 1, "data_points": 31}},
+        "data_source": "open-meteo"
+    }
+    far = {
+        "current_climate": {"current_temperature": 20.0, "weather_code": 61, "weekly_temp_max": [22.0, 23.0]},
+        "projections": {"extreme_heat_days_current": 9, "extreme_heat_days_future": 30},
+        "monthly_baselines": {"1": {"avg_temp_max": 15.0, "month": 1, "data_points": 29}},
+        "data_source": "fallback-realistic"
+    }
+    blended = idw([far, near], [2.0, 1.0])
+    current = blended["current_climate"]
+    assert current["current_temperature"] == pytest.approx(12.0)
+    # Categorical codes, counts, lists and strings come from the nearest neighbour
+    assert current["weather_code"] == 3
+    assert current["weekly_temp_max"] == [12.0, 13.0]
+    assert blended["monthly_baselines"]["1"] == {"avg_temp_max": pytest.approx(7.0), "month": 1, "data_points": 31}
+    assert blended["data_source"] == "open-meteo"
+    # Day counts stay integers
+    assert blended["projections"] == {"extreme_heat_days_current": 5, "extreme_heat_days_future": 14}
+
+def test_idw_takes_fields_missing_from_a_neighbour_from_the_nearest():
+    blended = idw([{"current_temperature": 10.0, "current_humidity": 70}, {"current_temperature": 20.0}], [1.0, 2.0])
+    assert blended["current_humidity"] == 70
+
+def test_parse_cell():
+    assert parse_cell(b"51.5:-0.25") == (51.5, -0.25)
+    assert parse_cell("bad") is None
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.services.places import PLACE_COLUMNS, PlaceTable
+from app.services.scoring import score_factors, weight_vector, weighted_score
+
+# name, country, admin1, latitude, longitude, population, current_temp,
+# temp_change, heat_days_current, heat_days_future, precipitation_change
+PLACES = [
+    ("Oslo", "Norway", "", 59.91, 10.75, 700000, 6.0, 0.9, 0, 2, 5.0),
+    ("Bergen", "Norway", "Vestland", 60.39, 5.32, 280000, 8.0, 0.9, 0, 2, 5.0),
+    ("Madrid", "Spain", "Madrid", 40.42, -3.70, 3300000, 15.0, 2.5, 20, 45, -25.0),
+    ("Seville", "Spain", "Andalusia", 37.39, -5.98, 700000, 19.0, 3.5, 40, 80, -35.0),
+    ("Lyon", "France", "", 45.76, 4.84, 500000, 12.0, 1.7, 5, 12, 35.0)
+]
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "places.npz"
+    columns = {name: np.array([place[i] for place in PLACES], dtype=dtype) for i, (name, dtype) in enumerate(PLACE_COLUMNS.items())}
+    np.savez(path, meta=np.array(json.dumps({"source": "test"})), **columns)
+    return PlaceTable(str(path))
+
+def _projections(place):
+    return {
+        "temperature_change_2050": place[7],
+        "extreme_heat_days_current": place[8],
+        "extreme_heat_days_future": place[9],
+        "precipitation_change_percent": place[10]
+    }
+
+def _names(rows):
+    return [row["name"] for row in rows]
+
+def test_top_ranks_by_score_then_population(table):
+    rows, matched = table.top(3)
+    assert matched == 5
+    assert _names(rows) == ["Oslo", "Bergen", "Lyon"]
+    assert [row["rank"] for row in rows] == [1, 2, 3]
+    assert [row["resilience_score"] for row in rows] == [100, 100, 65]
+    assert rows[0]["admin1"] is None and rows[1]["admin1"] == "Vestland"
+    assert rows[2]["extreme_heat_days_increase"] == 7
+
+def test_top_returns_every_match_when_k_exceeds_them(table):
+    rows, matched = table.top(10)
+    assert matched == 5
+    assert _names(rows) == ["Oslo", "Bergen", "Lyon", "Madrid", "Seville"]
+
+def test_top_filters(table):
+    assert _names(table.top(5, countries=["SPAIN", "Atlantis"])[0]) == ["Madrid", "Seville"]
+    assert _names(table.top(5, min_population=600000)[0]) == ["Oslo", "Madrid", "Seville"]
+    assert _names(table.top(5, max_population=600000)[0]) == ["Bergen", "Lyon"]
+    rows, matched = table.top(1, min_temp=10, max_temp=16)
+    assert (_names(rows), matched) == (["Lyon"], 2)
+
+def test_top_scores_match_the_scoring_module(table):
+    for weights in (None, {"precipitation_change": 1}, {"temperature_change": 2, "heat_day_increase": 1}):
+        rows, _ = table.top(5, weights=weights)
+        expected = {place[0]: weighted_score(score_factors(_projections(place)), weight_vector(weights)) for place in PLACES}
+        assert {row["name"]: row["resilience_score"] for row in rows} == expected
+
+def test_top_reorders_under_a_weight_profile(table):
+    rows, _ = table.top(5, weights={"precipitation_change": 1})
+    # Lyon drops below Madrid, and ties Seville, which is larger
+    assert _names(rows) == ["Oslo", "Bergen", "Madrid", "Seville", "Lyon"]
+
+def test_missing_columns_are_rejected(tmp_path):
+    path = tmp_path / "places.npz"
+    np.savez(path, name=np.array(["Oslo"]))
+    with pytest.raises(ValueError, match="missing columns"):
+        PlaceTable(str(path))
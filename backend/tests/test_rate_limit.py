@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+import redis
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware
+
+def _scope(headers=(), client=("10.0.0.2", 51234)):
+    return {"type": "http", "path": "/climate/analyze", "headers": list(headers), "client": client}
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock(6000.0)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+def _no_redis():
+    raise redis.ConnectionError("Redis is down")
+
+def _checks(limiter, client_key, count):
+    async def run():
+        return [await limiter.check(client_key) for _ in range(count)]
+    return asyncio.run(run())
+
+def _middleware(**kwargs):
+    limiter = RateLimiter([(60, 60)], redis_client_factory=lambda: None)
+    return RateLimitMiddleware(None, limiter, ["/climate"], **kwargs)
+
+def test_client_key_behind_one_proxy_uses_the_address_it_appended():
+    # nginx ($proxy_add_x_forwarded_for) appends the peer it saw to what the client sent
+    scope = _scope([(b"x-forwarded-for", b"6.6.6.6, 203.0.113.7")], client=("127.0.0.1", 40000))
+    assert _middleware()._client_key(scope) == "ip:203.0.113.7"
+
+def test_client_key_ignores_spoofed_entries_left_of_trusted_hops():
+    middleware = _middleware(trusted_proxy_hops=2)
+    scope = _scope([(b"x-forwarded-for", b"1.1.1.1, 2.2.2.2, 198.51.100.4, 10.0.0.9")])
+    assert middleware._client_key(scope) == "ip:198.51.100.4"
+
+def test_client_key_falls_back_to_the_peer_without_forwarding():
+    assert _middleware()._client_key(_scope()) == "ip:10.0.0.2"
+    # Fewer entries than proxies: the request didn't come through them
+    scope = _scope([(b"x-forwarded-for", b"1.1.1.1")])
+    assert _middleware(trusted_proxy_hops=2)._client_key(scope) == "ip:10.0.0.2"
+
+def test_client_key_with_no_trusted_proxies_uses_the_peer():
+    scope = _scope([(b"x-forwarded-for", b"203.0.113.7")])
+    assert _middleware(trusted_proxy_hops=0)._client_key(scope) == "ip:10.0.0.2"
+
+def test_client_key_only_honours_known_api_keys():
+    middleware = _middleware(api_keys=["partner-key"])
+    known = middleware._client_key(_scope([(b"x-api-key", b"partner-key")]))
+    assert known.startswith("key:") and "partner-key" not in known
+    assert middleware._client_key(_scope([(b"x-api-key", b"made-up")])) == "ip:10.0.0.2"
+
+def test_limiter_rejects_requests_over_the_limit_until_the_window_rolls_over(clock):
+    limiter = RateLimiter([(3, 60)], redis_client_factory=_no_redis)
+    assert _checks(limiter, "ip:a", 3) == [None, None, None]
+    assert _checks(limiter, "ip:a", 1) == [60.0]
+    clock.now += 20
+    # Still blocked, without counting the rejected requests
+    assert _checks(limiter, "ip:a", 1) == [40.0]
+    assert _checks(limiter, "ip:b", 1) == [None]
+
+def test_limiter_weights_the_previous_window_by_its_overlap(clock):
+    limiter = RateLimiter([(3, 60)], redis_client_factory=_no_redis)
+    assert _checks(limiter, "ip:a", 3) == [None, None, None]
+    # Halfway into the next window, the 3 earlier requests count as 1.5
+    clock.now += 90
+    assert _checks(limiter, "ip:a", 2) == [None, 30.0]
+
+def test_limiter_applies_every_window(clock):
+    limiter = RateLimiter([(100, 60), (2, 86400)], redis_client_factory=_no_redis)
+    assert _checks(limiter, "ip:a", 2) == [None, None]
+    assert _checks(limiter, "ip:a", 1) == [86400 - 6000.0]
+
+def test_limiter_leaves_a_failed_redis_alone_for_the_retry_period(clock):
+    attempts = []
+
+    def factory():
+        attempts.append(clock.now)
+        return _no_redis()
+
+    limiter = RateLimiter([(100, 60)], redis_client_factory=factory, redis_retry_seconds=10)
+    _checks(limiter, "ip:a", 5)
+    assert len(attempts) == 1
+    clock.now += 11
+    _checks(limiter, "ip:a", 1)
+    assert len(attempts) == 2
@@ -0,0 +1,44 @@
+import itertools
+
+import pytest
+
+from app.services.scoring import TOTAL_WEIGHT, parse_weights, resilience_score, score_factors, weight_vector, weighted_score
+
+# Values on both sides of every penalty threshold
+TEMPERATURE_CHANGES = (0, 0.9, 1.2, 1.7, 2.5, 3.5)
+HEAT_DAY_INCREASES = (0, 4, 10, 20, 40)
+PRECIPITATION_CHANGES = (-35, -25, -12, 0, 8, 15, 22, 31)
+
+def _projections(temperature_change, heat_day_increase, precipitation_change):
+    return {
+        "temperature_change_2050": temperature_change,
+        "extreme_heat_days_current": 10,
+        "extreme_heat_days_future": 10 + heat_day_increase,
+        "precipitation_change_percent": precipitation_change
+    }
+
+def test_default_weights_reproduce_the_standard_score():
+    weights = weight_vector()
+    for values in itertools.product(TEMPERATURE_CHANGES, HEAT_DAY_INCREASES, PRECIPITATION_CHANGES):
+        projections = _projections(*values)
+        assert weighted_score(score_factors(projections), weights) == resilience_score(projections), values
+
+def test_weight_profiles_are_scaled_to_the_default_total():
+    assert sum(weight_vector({"temperature_change": 1, "heat_day_increase": 3})) == pytest.approx(TOTAL_WEIGHT)
+    assert weight_vector({"temperature_change": 2}) == [TOTAL_WEIGHT, 0.0, 0.0]
+
+def test_weighted_score_uses_only_the_weighted_factors():
+    factors = score_factors(_projections(3.5, 0, 0))
+    assert weighted_score(factors, weight_vector({"heat_day_increase": 1})) == 100
+    assert weighted_score(factors, weight_vector({"temperature_change": 1})) == 100 - TOTAL_WEIGHT
+
+@pytest.mark.parametrize("weights", [{"sunshine": 1}, {"temperature_change": -1}, {"temperature_change": 0}])
+def test_weight_vector_rejects_invalid_profiles(weights):
+    with pytest.raises(ValueError):
+        weight_vector(weights)
+
+def test_parse_weights():
+    assert parse_weights(None) is None
+    assert parse_weights("temperature_change:2, heat_day_increase:0.5") == {"temperature_change": 2.0, "heat_day_increase": 0.5}
+    with pytest.raises(ValueError, match="temperature_change"):
+        parse_weights("temperature_change:hot")
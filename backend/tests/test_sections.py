@@ -0,0 +1,31 @@
+import pytest
+
+from app.services.climate_service import ANALYSIS_SECTIONS, parse_sections, plan_datasets, trim_analysis
+
+def test_parse_sections_accepts_strings_and_lists_in_request_order():
+    assert parse_sections("projections, current_climate") == ("projections", "current_climate")
+    assert parse_sections(["risk_assessment", "risk_assessment", ""]) == ("risk_assessment",)
+
+def test_parse_sections_means_everything_when_empty_or_complete():
+    assert parse_sections(None) is None
+    assert parse_sections(" , ") is None
+    assert parse_sections(",".join(reversed(ANALYSIS_SECTIONS))) is None
+
+def test_parse_sections_rejects_unknown_sections():
+    with pytest.raises(ValueError, match="weather"):
+        parse_sections("projections,weather")
+
+def test_plan_datasets_fetches_only_what_the_sections_need():
+    assert plan_datasets(("location",)) == ()
+    assert plan_datasets(("climate_variations", "resilience_score")) == ("recent", "baseline", "projections")
+
+def test_trim_analysis_keeps_requested_sections_and_the_timestamp():
+    analysis = {section: {"section": section} for section in ANALYSIS_SECTIONS}
+    analysis["last_updated"] = "2026-01-01T00:00:00"
+    trimmed = trim_analysis(analysis, ("projections", "location", "score_factors"))
+    assert list(trimmed) == ["location", "projections", "score_factors", "last_updated"]
+    assert trimmed["last_updated"] == "2026-01-01T00:00:00"
+    assert trim_analysis(analysis, None) is analysis
+
+def test_trim_analysis_skips_sections_the_analysis_lacks():
+    assert trim_analysis({"location": {}}, ("location", "projections")) == {"location": {}, "last_updated": None}
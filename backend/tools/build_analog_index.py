@@ -0,0 +1,70 @@
+"""
+Build the climate-analog index served by GET /climate/analogs (app/services/analogs.py)
+
+Takes places from the same CSV as build_places.py and their baselines and
+projections from the precomputed climate grid, in the shape the live
+pipeline returns them, so indexed and queried vectors are built the same
+way. Run from the backend directory:
+
+    python -m tools.build_analog_index data/places.csv data/analogs.npz --grid data/climate_grid.bin
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.analogs import PLACE_FIELDS, climate_vectors, standardization
+from app.services.climate_grid import ClimateGrid
+from app.services.places import PLACE_COLUMNS
+from tools.build_places import read_places
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the climate-analog search index")
+    parser.add_argument("places", help="CSV of latitude,longitude,name,country,admin1,population")
+    parser.add_argument("output", help=".npz index to write")
+    parser.add_argument("--grid", default=settings.climate_grid_path, help="Climate grid file (default: CLIMATE_GRID_PATH)")
+    parser.add_argument("--min-population", type=int, default=0, help="Leave out smaller places")
+    args = parser.parse_args()
+    if not args.grid:
+        parser.error("--grid is required when CLIMATE_GRID_PATH is not set")
+
+    grid = ClimateGrid(args.grid)
+    places = read_places(args.places, args.min_population)
+    kept, present, future = [], [], []
+    for place in places:
+        baseline = grid.dataset("baseline", place["latitude"], place["longitude"])
+        projections = grid.dataset("projections", place["latitude"], place["longitude"])
+        vectors = climate_vectors(baseline, projections, place["latitude"]) if baseline and projections else None
+        if vectors is None:
+            continue
+        kept.append(place)
+        present.append(vectors[0])
+        future.append(vectors[1])
+    if not kept:
+        sys.exit("No places fall in built grid cells")
+
+    mean, scale = standardization(np.stack(present))
+    columns = {field: np.array([place[field] for place in kept], dtype=PLACE_COLUMNS[field]) for field in PLACE_FIELDS}
+    meta = {
+        "created": datetime.utcnow().isoformat(),
+        "grid_created": grid.header["created"],
+        "baseline_period": grid.header["baseline_period"],
+        "projection_model": grid.header.get("projection_model")
+    }
+    # Stored standardized and uncompressed, so loading is a straight read
+    np.savez(
+        args.output,
+        present=(np.stack(present) - mean) / scale,
+        future=(np.stack(future) - mean) / scale,
+        mean=mean,
+        scale=scale,
+        meta=np.array(json.dumps(meta)),
+        **columns
+    )
+    print(f"Indexed {len(kept)} places in {args.output} ({len(places) - len(kept)} left out: no grid cell built)")
+
+if __name__ == "__main__":
+    main()
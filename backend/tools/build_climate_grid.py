@@ -0,0 +1,188 @@
+"""
+Build the precomputed climate grid served by app/services/climate_grid.py
+
+For every cell it fetches the same three series the live pipeline fetches
+(the 1990-2020 archive, the last five years of archive and the 2024-2050
+projection run) at the cell centre, aggregates them the same way and writes
+the record in place. Cells are marked present only once complete, so an
+interrupted build can be resumed and a partial grid is already usable: the
+backend fetches live for cells that are missing. Run from the backend directory:
+
+    python -m tools.build_climate_grid data/climate_grid.bin --resolution 0.25 --bbox 35,72,-25,45
+    python -m tools.build_climate_grid data/climate_grid.bin --points data/popular_places.csv --resume
+
+--points builds only the cells containing the listed places (lines of
+"latitude,longitude"), which covers most traffic for a fraction of the
+upstream calls. Point --archive-url/--climate-url at a mirror or the
+Open-Meteo stand-in to build without touching the public API.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from app.core.config import settings
+from app.core.serialization import loads
+from app.services.climate_grid import CELL_DTYPE, ClimateGrid, fill_baseline, fill_projections, fill_recent
+
+DAILY_VARIABLES = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+PROJECTION_MODEL = "CMCC_CM2_VHR4"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def periods() -> Dict[str, Tuple[str, str]]:
+    """Date ranges of each series, as the live pipeline requests them"""
+    current_year = datetime.now().year
+    return {
+        "baseline": ("1990-01-01", "2020-12-31"),
+        "recent": (f"{current_year - 5}-01-01", f"{current_year - 1}-12-31"),
+        "projections": ("2024-01-01", "2050-12-31")
+    }
+
+class GridBuilder:
+    """Fetch and aggregate cells concurrently, writing each into the mapped grid"""
+
+    def __init__(self, grid: ClimateGrid, args: argparse.Namespace):
+        self.grid = grid
+        self.args = args
+        self.periods = periods()
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, params: Dict) -> Dict:
+        for attempt in range(self.args.retries + 1):
+            try:
+                response = await client.get(url, params=params)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return loads(response.content).get("daily", {})
+            except httpx.TransportError:
+                if attempt == self.args.retries:
+                    raise
+            if attempt < self.args.retries:
+                await asyncio.sleep(2 ** attempt)
+        response.raise_for_status()
+
+    async def build_cell(self, client: httpx.AsyncClient, row: int, col: int) -> None:
+        latitude, longitude = self.grid.cell_center(row, col)
+        location = {"latitude": latitude, "longitude": longitude, "daily": DAILY_VARIABLES}
+        baseline, recent, projections = await asyncio.gather(
+            self.fetch(client, f"{self.args.archive_url}/archive", {
+                **location, "start_date": self.periods["baseline"][0], "end_date": self.periods["baseline"][1], "timezone": "auto"
+            }),
+            self.fetch(client, f"{self.args.archive_url}/archive", {
+                **location, "start_date": self.periods["recent"][0], "end_date": self.periods["recent"][1], "timezone": "auto"
+            }),
+            self.fetch(client, f"{self.args.climate_url}/climate", {
+                **location, "models": PROJECTION_MODEL,
+                "start_date": self.periods["projections"][0], "end_date": self.periods["projections"][1]
+            })
+        )
+        if not (baseline and recent and projections):
+            raise ValueError("empty daily series")
+        record = np.zeros((), dtype=CELL_DTYPE)
+        fill_baseline(record, baseline)
+        fill_recent(record, recent)
+        fill_projections(record, projections)
+        record["present"] = 1
+        self.grid.cells[row, col] = record
+
+    async def worker(self, client: httpx.AsyncClient, cells: asyncio.Queue) -> None:
+        while True:
+            try:
+                row, col = cells.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await self.build_cell(client, row, col)
+                self.done += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Cell {self.grid.cell_center(row, col)} failed: {e}")
+            if (self.done + self.failed) % self.args.flush_every == 0:
+                self.grid.cells.flush()
+                self.progress(cells.qsize())
+
+    def progress(self, remaining: int) -> None:
+        elapsed = time.monotonic() - self.started
+        rate = (self.done + self.failed) / elapsed if elapsed else 0.0
+        eta = remaining / rate if rate else float("inf")
+        print(f"{self.done} built, {self.failed} failed, {remaining} left ({rate:.1f} cells/s, ~{eta / 60:.0f} min to go)")
+
+    async def run(self, cells: List[Tuple[int, int]]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        for cell in cells:
+            queue.put_nowait(cell)
+        limits = httpx.Limits(max_connections=self.args.concurrency * 3)
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            await asyncio.gather(*(self.worker(client, queue) for _ in range(self.args.concurrency)))
+        self.grid.cells.flush()
+        self.progress(0)
+
+def open_grid(args: argparse.Namespace) -> ClimateGrid:
+    bounds = tuple(float(value) for value in args.bbox.split(","))
+    if len(bounds) != 4:
+        sys.exit("--bbox takes lat_min,lat_max,lon_min,lon_max")
+    if args.resume and os.path.exists(args.output):
+        grid = ClimateGrid(args.output, writable=True)
+        if grid.resolution != args.resolution or (grid.lat_min, grid.lon_min) != (bounds[0], bounds[2]):
+            sys.exit(f"{args.output} was built with a different resolution or bounds; drop --resume to rebuild it")
+        return grid
+    return ClimateGrid.create(args.output, args.resolution, bounds, metadata={
+        "baseline_period": "1990-2020",
+        "recent_period": "{}-{}".format(*(date[:4] for date in periods()["recent"])),
+        "projection_model": PROJECTION_MODEL,
+        "archive_url": args.archive_url,
+        "climate_url": args.climate_url
+    })
+
+def cells_to_build(grid: ClimateGrid, points_path: Optional[str], resume: bool) -> List[Tuple[int, int]]:
+    if points_path:
+        cells = []
+        with open(points_path, newline="") as points_file:
+            for line in csv.reader(points_file):
+                try:
+                    index = grid.cell_index(float(line[0]), float(line[1]))
+                except (IndexError, ValueError):
+                    # Header row or blank line
+                    continue
+                if index is not None:
+                    cells.append(index)
+        cells = list(dict.fromkeys(cells))
+    else:
+        cells = [(row, col) for row in range(grid.rows) for col in range(grid.cols)]
+    if resume:
+        present = grid.cells["present"]
+        cells = [(row, col) for row, col in cells if not present[row, col]]
+    return cells
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the precomputed climate grid file")
+    parser.add_argument("output", help="Grid file to write")
+    parser.add_argument("--resolution", type=float, default=0.25, help="Cell size in degrees")
+    parser.add_argument("--bbox", default="-90,90,-180,180", help="lat_min,lat_max,lon_min,lon_max (default: global)")
+    parser.add_argument("--points", metavar="CSV", help="Only build cells containing these latitude,longitude points")
+    parser.add_argument("--resume", action="store_true", help="Keep the cells already present in an existing file")
+    parser.add_argument("--concurrency", type=int, default=8, help="Cells fetched at once (three requests each)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--flush-every", type=int, default=100, help="Flush to disk and report progress every N cells")
+    parser.add_argument("--archive-url", default=settings.archive_api_url)
+    parser.add_argument("--climate-url", default=settings.climate_api_url)
+    args = parser.parse_args()
+
+    grid = open_grid(args)
+    cells = cells_to_build(grid, args.points, args.resume)
+    size_mb = grid.rows * grid.cols * CELL_DTYPE.itemsize / 1e6
+    print(f"Grid {grid.rows}x{grid.cols} at {grid.resolution}° ({size_mb:.0f} MB); building {len(cells)} cells")
+    asyncio.run(GridBuilder(grid, args).run(cells))
+
+if __name__ == "__main__":
+    main()
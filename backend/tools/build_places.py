@@ -0,0 +1,102 @@
+"""
+Build the places table served by GET /climate/rank (app/services/places.py)
+
+Reads places from a CSV of "latitude,longitude,name,country,admin1,population"
+lines (e.g. a GeoNames cities export) and takes each place's climate
+features from the precomputed climate grid, so no upstream calls are made.
+The coordinates come first so the same file can be passed to
+build_climate_grid.py --points to build just the cells the places need.
+Run from the backend directory:
+
+    python -m tools.build_climate_grid data/climate_grid.bin --points data/places.csv
+    python -m tools.build_places data/places.csv data/places.npz --grid data/climate_grid.bin
+
+Places whose grid cell hasn't been built are left out and counted.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.climate_grid import CHANGE_SCALE, VALUE_SCALE, ClimateGrid
+from app.services.places import PLACE_COLUMNS
+
+def read_places(path: str, min_population: int) -> List[Dict]:
+    places = []
+    with open(path, newline="", encoding="utf-8") as places_file:
+        for line in csv.reader(places_file):
+            try:
+                place = {
+                    "latitude": float(line[0]),
+                    "longitude": float(line[1]),
+                    "name": line[2].strip(),
+                    "country": line[3].strip(),
+                    "admin1": line[4].strip() if len(line) > 4 else "",
+                    "population": int(float(line[5])) if len(line) > 5 and line[5].strip() else 0
+                }
+            except (IndexError, ValueError):
+                # Header row or blank line
+                continue
+            if place["name"] and place["population"] >= min_population:
+                places.append(place)
+    return places
+
+def build_columns(places: List[Dict], grid: ClimateGrid) -> Dict[str, np.ndarray]:
+    """Place columns joined with the features of each place's grid cell; places without a cell are dropped"""
+    indexes = [grid.cell_index(place["latitude"], place["longitude"]) for place in places]
+    places = [place for place, index in zip(places, indexes) if index is not None]
+    indexes = [index for index in indexes if index is not None]
+    if not places:
+        return {}
+    rows, cols = (np.array(axis) for axis in zip(*indexes))
+    records = grid.cells[rows, cols]
+    present = records["present"].astype(bool)
+
+    columns = {
+        name: np.array([place[name] for place in places], dtype=PLACE_COLUMNS[name])
+        for name in ("name", "country", "admin1", "latitude", "longitude", "population")
+    }
+    features = {
+        "current_temp": records["recent_annual_temp"] / VALUE_SCALE,
+        "temp_change": records["projection_temp_change"] / VALUE_SCALE,
+        "heat_days_current": records["projection_heat_days_current"],
+        "heat_days_future": records["projection_heat_days_future"],
+        "precipitation_change": records["projection_precipitation_change"] / CHANGE_SCALE
+    }
+    columns.update({name: feature.astype(PLACE_COLUMNS[name]) for name, feature in features.items()})
+    return {name: column[present] for name, column in columns.items()}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the places table for climate resilience ranking")
+    parser.add_argument("places", help="CSV of latitude,longitude,name,country,admin1,population")
+    parser.add_argument("output", help=".npz table to write")
+    parser.add_argument("--grid", default=settings.climate_grid_path, help="Climate grid file (default: CLIMATE_GRID_PATH)")
+    parser.add_argument("--min-population", type=int, default=0, help="Leave out smaller places")
+    args = parser.parse_args()
+    if not args.grid:
+        parser.error("--grid is required when CLIMATE_GRID_PATH is not set")
+
+    grid = ClimateGrid(args.grid)
+    places = read_places(args.places, args.min_population)
+    columns = build_columns(places, grid)
+    if not columns:
+        sys.exit("No places fall in built grid cells")
+    kept = len(columns["name"])
+    meta = {
+        "created": datetime.utcnow().isoformat(),
+        "grid_created": grid.header["created"],
+        "baseline_period": grid.header["baseline_period"],
+        "recent_period": grid.header["recent_period"],
+        "projection_model": grid.header.get("projection_model")
+    }
+    # Uncompressed, so loading is a straight read
+    np.savez(args.output, meta=np.array(json.dumps(meta)), **columns)
+    print(f"Wrote {kept} places to {args.output} ({len(places) - kept} left out: no grid cell built)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+End-to-end load test for search, analyze and compare
+
+Virtual users each loop through a weighted mix of scenarios against a running
+backend: autocomplete typing bursts on /locations/search, analyses by name
+(POST /climate/analyze) and by coordinates (GET /climate/analyze) and
+multi-city /climate/compare. Cities are drawn from a Zipf distribution so a
+few popular ones dominate, as in real traffic. Point the backend at the
+Open-Meteo stand-in (tools/openmeteo_standin.py) so results don't depend on
+the real upstreams, then run from the backend directory:
+
+    python -m tools.loadtest --users 200 --duration 60 --report loadtest.json
+    python -m tools.loadtest --phases cold,warm --admin-token $ADMIN_TOKEN --mix search=6,analyze_name=2,analyze_coords=2
+
+The cold phase first drops every cache family through /admin/cache/invalidate
+(purging Redis as well), so it needs the admin token; without one it runs
+against whatever the caches hold. Each phase reports latency percentiles and
+throughput per endpoint, error and fallback rates, cache outcomes read from
+the Server-Timing header, and cache hit ratios from the /metrics delta. The
+report also checks the targets from the requirements doc; --fail-on-miss turns
+a missed target into exit status 1.
+
+The target's rate limiter (on by default) keys every virtual user on this
+machine's address, so a default backend answers most of a run with 429.
+Those responses are counted as rate_limited, apart from latencies and
+errors, and the report flags the run. Either start the target with
+RATE_LIMIT_ENABLED=false, or list keys from its API_KEYS in --api-key:
+users are spread over the keys, and each key gets its own
+REQUESTS_PER_MINUTE and REQUESTS_PER_DAY, so use as many keys as users
+sending about one request per second.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.invalidation import CACHE_FAMILIES
+from app.core.serialization import loads
+
+# Most popular first; the Zipf weights follow this order
+CITIES = [
+    "London", "New York", "Paris", "Tokyo", "Berlin", "Madrid", "Sydney", "Toronto",
+    "Los Angeles", "Chicago", "Rome", "Amsterdam", "Barcelona", "Singapore", "Dubai",
+    "Mumbai", "Seattle", "Vienna", "Lisbon", "Dublin", "Stockholm", "Copenhagen",
+    "Melbourne", "Vancouver", "Austin", "Denver", "Prague", "Munich", "Zurich",
+    "Nairobi", "Cape Town", "Buenos Aires", "Mexico City", "Bangkok", "Seoul",
+    "Istanbul", "Athens", "Oslo", "Helsinki", "Warsaw", "Budapest", "Edinburgh",
+    "Manchester", "Lyon", "Porto", "Marseille", "Hamburg", "Milan", "Naples", "Krakow"
+]
+
+DEFAULT_MIX = {"search": 5.0, "analyze_name": 2.0, "analyze_coords": 2.0, "compare": 1.0}
+
+# data_source values that mean a dataset came from a generator, not an upstream
+FALLBACK_SOURCES = {"fallback-realistic", "hardcoded-fallback", "simplified-fallback", "worldbank-estimated"}
+
+# Targets from the requirements doc (Performance Benchmarks & Requirements)
+TARGETS = {
+    "search_p95_ms": 500,
+    "analyze_p95_ms": 2000,
+    "requests_per_minute": 10000,
+    "error_rate": 0.01,
+    "warm_cache_hit_ratio": 0.8
+}
+
+RATE_LIMIT_HINT = (
+    "requests were rate limited (429); pass --api-key with keys from the target's API_KEYS, "
+    "or start the target with RATE_LIMIT_ENABLED=false"
+)
+
+# The X-API-Key of the virtual user whose task is running
+_api_key: ContextVar[Optional[str]] = ContextVar("loadtest_api_key", default=None)
+
+SERVER_TIMING_ENTRY = re.compile(r'([\w-]+)(?:;desc="([^"]*)")?')
+CACHE_METRIC_LINE = re.compile(r'^cache_requests_total\{family="([^"]*)",result="([^"]*)"\} ([0-9.e+]+)$')
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+def parse_server_timing(header: str) -> Dict[str, str]:
+    """Stage name -> desc for the Server-Timing entries that carry one"""
+    statuses = {}
+    for entry in header.split(","):
+        match = SERVER_TIMING_ENTRY.match(entry.strip())
+        if match and match.group(2):
+            statuses[match.group(1)] = match.group(2)
+    return statuses
+
+def uses_fallback(payload) -> bool:
+    """Whether any section of a response was generated rather than fetched"""
+    if isinstance(payload, dict):
+        if payload.get("fallback") is True or payload.get("data_source") in FALLBACK_SOURCES:
+            return True
+        return any(uses_fallback(value) for value in payload.values() if isinstance(value, (dict, list)))
+    if isinstance(payload, list):
+        return any(uses_fallback(value) for value in payload if isinstance(value, (dict, list)))
+    return False
+
+class EndpointStats:
+    """Outcomes of every request to one endpoint within a phase"""
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self.fallbacks = 0
+        # 429s from the rate limiter; kept out of latencies and errors, which
+        # describe the service rather than the limiter
+        self.rate_limited = 0
+        # (stage, desc) -> count, from Server-Timing
+        self.cache_outcomes: Counter = Counter()
+
+    def summary(self, duration: float) -> Dict:
+        latencies = sorted(self.latencies_ms)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "throughput_rps": round(count / duration, 2) if duration else 0.0,
+            "latency_ms": {
+                "p50": _round(percentile(latencies, 0.50)),
+                "p95": _round(percentile(latencies, 0.95)),
+                "p99": _round(percentile(latencies, 0.99)),
+                "max": _round(latencies[-1] if latencies else None),
+                "mean": _round(sum(latencies) / count if count else None)
+            },
+            "status_codes": dict(self.statuses),
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "fallback_rate": round(self.fallbacks / count, 4) if count else 0.0,
+            "rate_limited": self.rate_limited,
+            "cache_outcomes": _nest(self.cache_outcomes)
+        }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+def _nest(outcomes: Counter) -> Dict[str, Dict[str, int]]:
+    nested: Dict[str, Dict[str, int]] = {}
+    for (stage, desc), count in sorted(outcomes.items()):
+        nested.setdefault(stage, {})[desc] = count
+    return nested
+
+class LoadTest:
+    """Closed-loop virtual users with think time, running one phase at a time"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.city_weights = zipf_weights(len(CITIES), args.zipf)
+        self.scenarios = list(args.mix)
+        self.scenario_weights = [args.mix[name] for name in self.scenarios]
+        # Coordinates the backend geocoded each city to, learned from search responses
+        self.coordinates: Dict[str, Dict] = {}
+        self.stats: Dict[str, EndpointStats] = {}
+        self.deadline = 0.0
+
+    def pick_city(self) -> str:
+        return self.rng.choices(CITIES, weights=self.city_weights)[0]
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[Dict]:
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        api_key = _api_key.get()
+        if api_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "X-API-Key": api_key}
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+            stats.statuses[type(e).__name__] += 1
+            stats.errors += 1
+            return None
+        stats.statuses[str(response.status_code)] += 1
+        if response.status_code == 429:
+            stats.rate_limited += 1
+            return None
+        stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+        for stage, desc in parse_server_timing(response.headers.get("server-timing", "")).items():
+            stats.cache_outcomes[(stage, desc)] += 1
+
+        payload = None
+        if response.status_code == 200:
+            try:
+                payload = loads(response.content)
+            except ValueError:
+                pass
+        # The legacy routes report failures as 200 with success false
+        if response.status_code >= 400 or not isinstance(payload, dict) or payload.get("success") is False:
+            stats.errors += 1
+            return None
+        if uses_fallback(payload):
+            stats.fallbacks += 1
+        return payload
+
+    async def search(self, client: httpx.AsyncClient) -> None:
+        """Type a city name and search whenever the typist pauses past the frontend's debounce"""
+        city = self.pick_city()
+        debounce = self.args.debounce_ms / 1000
+        for length in range(1, len(city) + 1):
+            finished = length == len(city)
+            # Mostly quick keystrokes, with an occasional pause to read the suggestions
+            gap = self.rng.uniform(0.3, 0.8) if self.rng.random() < 0.2 else self.rng.uniform(0.06, 0.2)
+            if (gap >= debounce or finished) and length >= self.args.min_query_length:
+                payload = await self.request(
+                    client, "search", "GET", "/locations/search", params={"q": city[:length], "limit": 5}
+                )
+                if finished and payload and payload.get("locations"):
+                    self.coordinates[city] = payload["locations"][0]
+            if not finished:
+                await asyncio.sleep(gap)
+
+    async def analyze_name(self, client: httpx.AsyncClient) -> None:
+        await self.request(client, "analyze_name", "POST", "/climate/analyze", json={"name": self.pick_city()})
+
+    async def analyze_coords(self, client: httpx.AsyncClient) -> None:
+        """What the frontend sends after a suggestion is picked; searches first if the city is new"""
+        city = self.pick_city()
+        location = self.coordinates.get(city)
+        if location is None:
+            payload = await self.request(client, "search", "GET", "/locations/search", params={"q": city, "limit": 5})
+            if not payload or not payload.get("locations"):
+                return
+            location = self.coordinates[city] = payload["locations"][0]
+        params = {
+            "lat": location["latitude"],
+            "lon": location["longitude"],
+            "name": location.get("name"),
+            "country": location.get("country"),
+            "admin1": location.get("admin1")
+        }
+        # Off-grid coordinates redirect to the snapped URL; the redirect is part of the latency
+        await self.request(
+            client, "analyze_coords", "GET", "/climate/analyze",
+            params={key: value for key, value in params.items() if value is not None}
+        )
+
+    async def compare(self, client: httpx.AsyncClient) -> None:
+        count = self.rng.randint(2, self.args.compare_max)
+        cities: List[str] = []
+        while len(cities) < count:
+            city = self.pick_city()
+            if city not in cities:
+                cities.append(city)
+        await self.request(client, "compare", "POST", "/climate/compare", json={"locations": [{"name": city} for city in cities]})
+
+    async def user(self, client: httpx.AsyncClient, index: int) -> None:
+        if self.args.api_key:
+            # Each user runs in its own task, so this only applies to its requests
+            _api_key.set(self.args.api_key[index % len(self.args.api_key)])
+        # Stagger start so users don't arrive in lockstep
+        await asyncio.sleep(self.rng.uniform(0, self.args.ramp_up))
+        while time.monotonic() < self.deadline:
+            scenario = self.rng.choices(self.scenarios, weights=self.scenario_weights)[0]
+            await getattr(self, scenario)(client)
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time) if self.args.think_time > 0 else 0)
+
+    async def cache_counts(self, client: httpx.AsyncClient) -> Optional[Dict[Tuple[str, str], float]]:
+        """cache_requests_total per (family, result); None when /metrics is unavailable"""
+        try:
+            response = await client.get("/metrics")
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        counts = {}
+        for line in response.text.splitlines():
+            match = CACHE_METRIC_LINE.match(line)
+            if match:
+                counts[(match.group(1), match.group(2))] = float(match.group(3))
+        return counts
+
+    async def invalidate_caches(self, client: httpx.AsyncClient) -> Dict:
+        if not self.args.admin_token:
+            return {"invalidated": False, "reason": "no --admin-token; caches may already be warm"}
+        try:
+            response = await client.post(
+                "/admin/cache/invalidate",
+                json={"families": list(CACHE_FAMILIES), "purge": True},
+                headers={"X-Admin-Token": self.args.admin_token}
+            )
+        except httpx.HTTPError as e:
+            return {"invalidated": False, "reason": str(e)}
+        if response.status_code != 200:
+            return {"invalidated": False, "reason": f"HTTP {response.status_code}: {response.text[:200]}"}
+        return {"invalidated": True}
+
+    async def run_phase(self, client: httpx.AsyncClient, name: str) -> Dict:
+        phase: Dict = {}
+        if name == "cold":
+            phase["cache_reset"] = await self.invalidate_caches(client)
+            self.coordinates.clear()
+        before = await self.cache_counts(client)
+        self.stats = {}
+        self.deadline = time.monotonic() + self.args.duration
+        start = time.perf_counter()
+        await asyncio.gather(*(self.user(client, index) for index in range(self.args.users)))
+        elapsed = time.perf_counter() - start
+        after = await self.cache_counts(client)
+
+        total = EndpointStats()
+        for stats in self.stats.values():
+            total.latencies_ms.extend(stats.latencies_ms)
+            total.statuses.update(stats.statuses)
+            total.errors += stats.errors
+            total.fallbacks += stats.fallbacks
+            total.rate_limited += stats.rate_limited
+            total.cache_outcomes.update(stats.cache_outcomes)
+        overall = total.summary(elapsed)
+        overall["requests_per_minute"] = round(overall["throughput_rps"] * 60, 1)
+        phase.update({
+            "duration_seconds": round(elapsed, 2),
+            "overall": overall,
+            "endpoints": {endpoint: stats.summary(elapsed) for endpoint, stats in sorted(self.stats.items())},
+            "cache_hit_ratio": _cache_hit_ratios(before, after)
+        })
+        return phase
+
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.args.max_connections, max_keepalive_connections=self.args.max_connections)
+        report = {
+            "meta": {
+                "created": datetime.utcnow().isoformat(),
+                "target": self.args.url,
+                "users": self.args.users,
+                "duration_seconds": self.args.duration,
+                "think_time_seconds": self.args.think_time,
+                "mix": self.args.mix,
+                "zipf_exponent": self.args.zipf,
+                "api_keys": len(self.args.api_key),
+                "seed": self.args.seed
+            },
+            "phases": {}
+        }
+        async with httpx.AsyncClient(
+            base_url=self.args.url, timeout=self.args.timeout, limits=limits, follow_redirects=True
+        ) as client:
+            for name in self.args.phases:
+                print(f"Running {name} phase: {self.args.users} users for {self.args.duration:g}s")
+                report["phases"][name] = await self.run_phase(client, name)
+                print_phase(name, report["phases"][name])
+        report["targets"] = check_targets(report)
+        return report
+
+def _cache_hit_ratios(before: Optional[Dict], after: Optional[Dict]) -> Optional[Dict]:
+    """Hit ratio (climate grid, local or Redis) per cache family and overall, from the /metrics delta"""
+    if before is None or after is None:
+        return None
+    per_family: Dict[str, Counter] = {}
+    for (family, result), value in after.items():
+        delta = value - before.get((family, result), 0)
+        if delta > 0:
+            per_family.setdefault(family, Counter())[result] += delta
+    ratios = {}
+    hits = lookups = 0.0
+    for family, results in sorted(per_family.items()):
+        family_hits = results["hit"] + results["local_hit"] + results["grid"]
+        family_lookups = sum(results.values())
+        ratios[family] = round(family_hits / family_lookups, 4)
+        hits += family_hits
+        lookups += family_lookups
+    ratios["overall"] = round(hits / lookups, 4) if lookups else None
+    return ratios
+
+def check_targets(report: Dict) -> Dict:
+    """Compare the last phase (the warm one, when both ran) against the requirements"""
+    phase_name = list(report["phases"])[-1]
+    phase = report["phases"][phase_name]
+    endpoints = phase["endpoints"]
+    checks = {}
+
+    def check(name: str, value: Optional[float], target: float, higher_is_better: bool = False) -> None:
+        if value is None:
+            checks[name] = {"value": None, "target": target, "passed": None}
+            return
+        passed = value >= target if higher_is_better else value <= target
+        checks[name] = {"value": value, "target": target, "passed": passed}
+
+    check("search_p95_ms", endpoints.get("search", {}).get("latency_ms", {}).get("p95"), TARGETS["search_p95_ms"])
+    analyze_p95 = [
+        endpoints[endpoint]["latency_ms"]["p95"] for endpoint in ("analyze_name", "analyze_coords")
+        if endpoints.get(endpoint, {}).get("latency_ms", {}).get("p95") is not None
+    ]
+    check("analyze_p95_ms", max(analyze_p95) if analyze_p95 else None, TARGETS["analyze_p95_ms"])
+    check("requests_per_minute", phase["overall"]["requests_per_minute"], TARGETS["requests_per_minute"], higher_is_better=True)
+    check("error_rate", phase["overall"]["error_rate"], TARGETS["error_rate"])
+    # Any 429 means the run measured the limiter, so the other checks can't be trusted
+    check("rate_limited", phase["overall"]["rate_limited"], 0)
+    hit_ratio = (phase["cache_hit_ratio"] or {}).get("overall")
+    check("warm_cache_hit_ratio", hit_ratio if phase_name == "warm" else None, TARGETS["warm_cache_hit_ratio"], higher_is_better=True)
+    return {"phase": phase_name, "checks": checks}
+
+def print_phase(name: str, phase: Dict) -> None:
+    overall = phase["overall"]
+    print(f"  {overall['requests']} requests, {overall['requests_per_minute']:.0f}/min, "
+          f"errors {overall['error_rate']:.2%}, fallbacks {overall['fallback_rate']:.2%}")
+    if overall["rate_limited"]:
+        print(f"  WARNING: {overall['rate_limited']} {RATE_LIMIT_HINT}")
+    for endpoint, stats in phase["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"  {endpoint:16s} n={stats['requests']:<7d} p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms")
+    if phase["cache_hit_ratio"]:
+        print(f"  cache hit ratio: {phase['cache_hit_ratio']}")
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r} (expected any of {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def _parse_api_keys(value: str) -> List[str]:
+    return [api_key.strip() for api_key in value.split(",") if api_key.strip()]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test for the search, analyze and compare endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--users", type=int, default=100, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per phase")
+    parser.add_argument("--ramp-up", type=float, default=2.0, help="Users start spread over this many seconds")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean pause between a user's scenarios, in seconds")
+    parser.add_argument("--phases", type=lambda value: value.split(","), default=["cold", "warm"],
+                        help="Comma-separated phases; cold first invalidates the caches (default cold,warm)")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="Scenario weights, e.g. search=5,analyze_name=2,analyze_coords=2,compare=1")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of city popularity")
+    parser.add_argument("--compare-max", type=int, default=3, help="Most cities in one comparison")
+    parser.add_argument("--debounce-ms", type=float, default=300, help="Autocomplete debounce of the frontend")
+    parser.add_argument("--min-query-length", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request")
+    parser.add_argument("--max-connections", type=int, default=500)
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN", ""), help="Needed to reset caches for the cold phase")
+    parser.add_argument("--api-key", type=_parse_api_keys, default=_parse_api_keys(os.getenv("LOADTEST_API_KEYS", "")),
+                        help="Comma-separated keys from the target's API_KEYS, spread over the users as X-API-Key")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", metavar="PATH", help="Write the JSON report here")
+    parser.add_argument("--fail-on-miss", action="store_true", help="Exit 1 when a requirements target is missed")
+    args = parser.parse_args()
+    unknown = [phase for phase in args.phases if phase not in ("cold", "warm")]
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(unknown)}")
+
+    report = asyncio.run(LoadTest(args).run())
+    print("\nTargets:")
+    for name, result in report["targets"]["checks"].items():
+        verdict = "n/a" if result["passed"] is None else ("pass" if result["passed"] else "MISS")
+        print(f"  {name:24s} {str(result['value']):>10s} (target {result['target']}) {verdict}")
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"\nWrote report to {args.report}")
+    if args.fail_on_miss and any(result["passed"] is False for result in report["targets"]["checks"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Local stand-in for the Open-Meteo APIs, for benchmarks and load tests without network
+
+Serves /v1/search, /v1/forecast, /v1/archive and /v1/climate on one port,
+with synthetic responses of realistic size (a 1990-2020 archive request
+returns all 11,323 days), recorded responses, or a proxy that records real
+ones. Point the backend at it with:
+
+    OPEN_METEO_API_URL=http://127.0.0.1:8099/v1
+    GEOCODING_API_URL=http://127.0.0.1:8099/v1
+    ARCHIVE_API_URL=http://127.0.0.1:8099/v1
+    CLIMATE_API_URL=http://127.0.0.1:8099/v1
+
+Run from the backend directory:
+
+    python -m tools.openmeteo_standin --latency 80 --latency archive=900 --error-rate 0.02
+    python -m tools.openmeteo_standin --mode record --recordings recordings/
+    python -m tools.openmeteo_standin --mode replay --recordings recordings/
+
+Latency and failure injection can also be changed at runtime with
+POST /_standin/config, e.g. {"error_rate": 0.1, "latency_ms": {"archive": 2000}}.
+"""
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import random
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from app.core.serialization import dumps, loads
+
+# Real upstream base URL for each endpoint, used in record mode
+UPSTREAMS = {
+    "search": "https://geocoding-api.open-meteo.com/v1",
+    "forecast": "https://api.open-meteo.com/v1",
+    "archive": "https://archive-api.open-meteo.com/v1",
+    "climate": "https://climate-api.open-meteo.com/v1"
+}
+
+# A few well-known places so geocoding answers look real; anything else gets
+# stable made-up coordinates derived from the name
+KNOWN_PLACES = {
+    "london": ("London", "United Kingdom", "England", 51.50853, -0.12574, 8961989, "Europe/London"),
+    "paris": ("Paris", "France", "Île-de-France", 48.85341, 2.3488, 2138551, "Europe/Paris"),
+    "madrid": ("Madrid", "Spain", "Madrid", 40.4165, -3.70256, 3255944, "Europe/Madrid"),
+    "berlin": ("Berlin", "Germany", "Land Berlin", 52.52437, 13.41053, 3426354, "Europe/Berlin"),
+    "new york": ("New York", "United States", "New York", 40.71427, -74.00597, 8804190, "America/New_York"),
+    "tokyo": ("Tokyo", "Japan", "Tokyo", 35.6895, 139.69171, 9733276, "Asia/Tokyo"),
+    "sydney": ("Sydney", "Australia", "New South Wales", -33.86785, 151.20732, 4627345, "Australia/Sydney"),
+    "nairobi": ("Nairobi", "Kenya", "Nairobi County", -1.28333, 36.81667, 2750547, "Africa/Nairobi")
+}
+
+class StandinConfig:
+    """Latency and failure injection, adjustable while the server runs"""
+
+    def __init__(self, latency_ms: Dict[str, float], jitter: float, error_rate: float, error_status: int, hang_rate: float, hang_seconds: float):
+        # Endpoint -> base latency; "*" applies to endpoints without their own entry
+        self.latency_ms = latency_ms
+        # Latency varies uniformly by +/- this fraction
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Requests that never answer within a client timeout
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+
+    def latency(self, endpoint: str) -> float:
+        base = self.latency_ms.get(endpoint, self.latency_ms.get("*", 0.0))
+        return max(base * (1 + random.uniform(-self.jitter, self.jitter)), 0.0) / 1000
+
+    def update(self, changes: Dict) -> None:
+        for key, value in changes.items():
+            if key == "latency_ms":
+                self.latency_ms.update(value if isinstance(value, dict) else {"*": value})
+            elif hasattr(self, key):
+                setattr(self, key, type(getattr(self, key))(value))
+
+    def snapshot(self) -> Dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "error_status": self.error_status,
+            "hang_rate": self.hang_rate,
+            "hang_seconds": self.hang_seconds
+        }
+
+def _list_param(request: Request, name: str) -> List[str]:
+    """Open-Meteo accepts both repeated and comma-separated list parameters"""
+    return [item for value in request.query_params.getlist(name) for item in value.split(",") if item]
+
+def _rng(*parts) -> random.Random:
+    """Deterministic generator per location and request, so replays are stable"""
+    seed = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(seed, "big"))
+
+def _climate_normals(latitude: float) -> Tuple[float, float]:
+    """Annual mean daily maximum and seasonal amplitude for a latitude"""
+    return 30 - 0.3 * abs(latitude), 1.5 + 0.12 * abs(latitude)
+
+def synthetic_daily_series(latitude: float, longitude: float, start: date, end: date, variables: List[str], warming_per_year: float = 0.03) -> Dict[str, List]:
+    """Seasonal cycle, warming trend and weather noise for every day in the range"""
+    rng = _rng(round(latitude, 2), round(longitude, 2), start, end)
+    mean_max, amplitude = _climate_normals(latitude)
+    # Warmest around day 200 in the north, day 17 in the south
+    peak_day = 200 if latitude >= 0 else 17
+    rain_chance = 0.25 + 0.2 * math.cos(math.radians(latitude * 2))
+    days = (end - start).days + 1
+    series: Dict[str, List] = {"time": []}
+    for variable in variables:
+        series[variable] = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        seasonal = amplitude * math.cos(2 * math.pi * (day.timetuple().tm_yday - peak_day) / 365.25)
+        trend = warming_per_year * (day.year - 1990)
+        temp_max = mean_max + seasonal + trend + rng.gauss(0, 2.5)
+        series["time"].append(day.isoformat())
+        if "temperature_2m_max" in series:
+            series["temperature_2m_max"].append(round(temp_max, 1))
+        if "temperature_2m_min" in series:
+            series["temperature_2m_min"].append(round(temp_max - 7 - rng.random() * 4, 1))
+        if "precipitation_sum" in series:
+            rain = rng.expovariate(1 / 6) if rng.random() < rain_chance else 0.0
+            series["precipitation_sum"].append(round(rain, 1))
+    return series
+
+def _envelope(latitude: float, longitude: float, daily: Optional[Dict] = None) -> Dict:
+    body = {
+        "latitude": round(latitude, 4),
+        "longitude": round(longitude, 4),
+        "generationtime_ms": 0.5,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "timezone_abbreviation": "GMT",
+        "elevation": 25.0
+    }
+    if daily is not None:
+        body["daily_units"] = {variable: ("mm" if variable == "precipitation_sum" else "°C") for variable in daily if variable != "time"}
+        body["daily_units"]["time"] = "iso8601"
+        body["daily"] = daily
+    return body
+
+def synthetic_search(request: Request) -> Dict:
+    name = request.query_params.get("name", "")
+    count = int(request.query_params.get("count", 10))
+    known = KNOWN_PLACES.get(name.split(",")[0].strip().lower())
+    if known:
+        places = [known]
+    else:
+        if len(name) < 2:
+            return {"generationtime_ms": 0.3}
+        rng = _rng("search", name.lower())
+        places = [
+            (f"{name.title()}{' ' + str(index + 1) if index else ''}", "Standinland", "Region",
+             round(rng.uniform(-60, 70), 5), round(rng.uniform(-180, 180), 5), rng.randint(1000, 2000000), "GMT")
+            for index in range(min(count, 5))
+        ]
+    return {
+        "results": [
+            {
+                "id": index + 1, "name": place[0], "country": place[1], "admin1": place[2],
+                "latitude": place[3], "longitude": place[4], "population": place[5], "timezone": place[6]
+            }
+            for index, place in enumerate(places[:count])
+        ],
+        "generationtime_ms": 0.3
+    }
+
+def synthetic_forecast(request: Request) -> Dict:
+    latitude = float(request.query_params["latitude"])
+    longitude = float(request.query_params["longitude"])
+    today = date.today()
+    forecast_days = int(request.query_params.get("forecast_days", 7))
+    daily_variables = _list_param(request, "daily")
+    body = _envelope(latitude, longitude, synthetic_daily_series(latitude, longitude, today, today + timedelta(days=forecast_days - 1), daily_variables) if daily_variables else None)
+    current = _list_param(request, "current")
+    if current:
+        rng = _rng("current", round(latitude, 2), round(longitude, 2), today)
+        mean_max, amplitude = _climate_normals(latitude)
+        values = {
+            "temperature_2m": round(mean_max - 4 + rng.gauss(0, 3), 1),
+            "relative_humidity_2m": rng.randint(35, 95),
+            "precipitation": round(rng.expovariate(1 / 2) if rng.random() < 0.3 else 0.0, 1),
+            "weather_code": rng.choice([0, 1, 2, 3, 45, 61, 63, 80])
+        }
+        body["current"] = {"time": datetime.utcnow().strftime("%Y-%m-%dT%H:00"), "interval": 900}
+        body["current"].update({variable: values.get(variable, 0) for variable in current})
+    return body
+
+def synthetic_daily(request: Request) -> Dict:
+    """Archive and climate-model responses share the same daily shape"""
+    latitude = float(request.query_params["latitude"])
+    longitude = float(request.query_params["longitude"])
+    start = date.fromisoformat(request.query_params["start_date"])
+    end = date.fromisoformat(request.query_params["end_date"])
+    return _envelope(latitude, longitude, synthetic_daily_series(latitude, longitude, start, end, _list_param(request, "daily")))
+
+SYNTHETIC = {
+    "search": synthetic_search,
+    "forecast": synthetic_forecast,
+    "archive": synthetic_daily,
+    "climate": synthetic_daily
+}
+
+def recording_key(endpoint: str, request: Request) -> str:
+    params = sorted((key, value) for key, value in request.query_params.multi_items())
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=10).hexdigest()
+    return f"{endpoint}-{digest}"
+
+def create_app(mode: str, recordings: Optional[str], config: StandinConfig, replay_miss: str = "synthetic") -> FastAPI:
+    app = FastAPI(title="Open-Meteo stand-in")
+    stats = Counter()
+    # Generating a 31-year series costs a few milliseconds; keep recent bodies
+    # so the stand-in's own cost stays small next to the injected latency
+    generated: "OrderedDict[str, bytes]" = OrderedDict()
+    upstream_client = httpx.AsyncClient(timeout=60.0) if mode == "record" else None
+
+    if recordings:
+        os.makedirs(recordings, exist_ok=True)
+
+    async def produce(endpoint: str, request: Request) -> Tuple[int, bytes]:
+        key = recording_key(endpoint, request)
+        if mode == "record":
+            response = await upstream_client.get(f"{UPSTREAMS[endpoint]}/{endpoint}", params=request.query_params.multi_items())
+            if response.status_code == 200:
+                with open(os.path.join(recordings, f"{key}.json"), "wb") as recording:
+                    recording.write(response.content)
+            return response.status_code, response.content
+        if mode == "replay":
+            path = os.path.join(recordings, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, "rb") as recording:
+                    return 200, recording.read()
+            stats["replay_misses"] += 1
+            if replay_miss == "error":
+                return 404, dumps({"error": True, "reason": f"No recording for {key}"})
+        body = generated.get(key)
+        if body is None:
+            body = dumps(SYNTHETIC[endpoint](request))
+            generated[key] = body
+            if len(generated) > 512:
+                generated.popitem(last=False)
+        return 200, body
+
+    async def serve(endpoint: str, request: Request) -> Response:
+        stats[endpoint] += 1
+        await asyncio.sleep(config.latency(endpoint))
+        roll = random.random()
+        if roll < config.hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(config.hang_seconds)
+        elif roll < config.hang_rate + config.error_rate:
+            stats["errors"] += 1
+            return Response(
+                dumps({"error": True, "reason": "Injected failure"}),
+                status_code=config.error_status,
+                media_type="application/json"
+            )
+        try:
+            status, body = await produce(endpoint, request)
+        except (KeyError, ValueError) as e:
+            status, body = 400, dumps({"error": True, "reason": f"Invalid request: {e}"})
+        return Response(body, status_code=status, media_type="application/json")
+
+    @app.get("/v1/search")
+    async def search(request: Request):
+        return await serve("search", request)
+
+    @app.get("/v1/forecast")
+    async def forecast(request: Request):
+        return await serve("forecast", request)
+
+    @app.get("/v1/archive")
+    async def archive(request: Request):
+        return await serve("archive", request)
+
+    @app.get("/v1/climate")
+    async def climate(request: Request):
+        return await serve("climate", request)
+
+    @app.get("/_standin/config")
+    async def get_config():
+        return {"mode": mode, "config": config.snapshot(), "stats": dict(stats)}
+
+    @app.post("/_standin/config")
+    async def set_config(request: Request):
+        config.update(loads(await request.body()))
+        return {"mode": mode, "config": config.snapshot()}
+
+    return app
+
+def _parse_latency(values: List[str]) -> Dict[str, float]:
+    """Parse --latency values: a bare number sets the default, archive=900 sets one endpoint"""
+    latency = {"*": 0.0}
+    for value in values:
+        endpoint, _, ms = value.rpartition("=")
+        latency[endpoint or "*"] = float(ms)
+    return latency
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Open-Meteo APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--recordings", help="Directory of recorded responses (record and replay modes)")
+    parser.add_argument("--replay-miss", choices=["synthetic", "error"], default="synthetic",
+                        help="Answer for requests without a recording in replay mode")
+    parser.add_argument("--latency", action="append", default=[], metavar="[ENDPOINT=]MS",
+                        help="Added latency in ms, for all endpoints or one of search/forecast/archive/climate; repeatable")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency varies by +/- this fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests held for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+    if args.mode != "synthetic" and not args.recordings:
+        parser.error("--recordings is required in record and replay modes")
+
+    config = StandinConfig(
+        latency_ms=_parse_latency(args.latency),
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds
+    )
+    uvicorn.run(create_app(args.mode, args.recordings, config, args.replay_miss), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Replay captured production traffic against a candidate build
+
+Reads the JSONL files written by the traffic capture middleware
+(TRAFFIC_CAPTURE_ENABLED=true) and re-issues every request at its original
+arrival offset, divided by --speed, so the candidate sees the real arrival
+distribution and location popularity. Requests are fired open-loop: a slow
+response never delays the ones after it, as with real users. Run from the
+backend directory:
+
+    python -m tools.replay captures/ --url http://127.0.0.1:8000
+    python -m tools.replay captures/traffic.jsonl.2 captures/traffic.jsonl.1 --speed 10 --report replay.json
+
+The report puts the captured latency, status and cache outcomes per handler
+next to the replayed ones. Captures are sampled, so replay at --speed
+1/sample_rate to reproduce the original request rate. dispatch_lag_ms shows
+how late the replayer itself issued requests; if it grows, the numbers
+describe the replayer rather than the backend.
+
+Replayed requests all come from this machine's address, so the candidate's
+rate limiter (on by default) would answer most of them with 429, as if
+every captured user were one client. Those are counted as rate_limited,
+apart from latencies and errors. Start the candidate with
+RATE_LIMIT_ENABLED=false, or pass keys from its API_KEYS in --api-key
+(requests are spread over them, each key with its own limits).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.serialization import loads
+from tools.loadtest import (
+    RATE_LIMIT_HINT, EndpointStats, _parse_api_keys, _round, parse_server_timing, percentile, uses_fallback
+)
+
+def load_captures(paths: List[str], path_prefix: Optional[str] = None) -> List[Dict]:
+    """Captured requests from files or capture directories, in arrival order"""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.jsonl*")))
+        else:
+            files.append(path)
+    entries = []
+    for capture_file in files:
+        with open(capture_file, "rb") as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    entry = loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-write
+                    continue
+                if path_prefix is None or entry["path"].startswith(path_prefix):
+                    entries.append(entry)
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries
+
+def captured_summary(entries: List[Dict]) -> Dict[str, Dict]:
+    """What the captured requests saw in production, per handler"""
+    per_handler: Dict[str, EndpointStats] = {}
+    for entry in entries:
+        stats = per_handler.setdefault(entry.get("handler") or entry["path"], EndpointStats())
+        stats.statuses[str(entry["status"])] += 1
+        if entry["status"] == 429:
+            stats.rate_limited += 1
+            continue
+        stats.latencies_ms.append(entry["duration_ms"])
+        if entry["status"] >= 400:
+            stats.errors += 1
+        for stage, desc in entry.get("cache", {}).items():
+            stats.cache_outcomes[(stage, desc)] += 1
+    span = entries[-1]["ts"] - entries[0]["ts"] if len(entries) > 1 else 0.0
+    summaries = {}
+    for handler, stats in sorted(per_handler.items()):
+        summary = stats.summary(span)
+        # Bodies aren't captured, so fallbacks are unknown on this side
+        del summary["fallback_rate"]
+        summaries[handler] = summary
+    return summaries
+
+class Replay:
+    """Issue captured requests open-loop at their original offsets, scaled by speed"""
+
+    def __init__(self, entries: List[Dict], args: argparse.Namespace):
+        self.entries = entries
+        self.args = args
+        self.stats: Dict[str, EndpointStats] = {}
+        self.dispatch_lag_ms: List[float] = []
+        self.skipped: Counter = Counter()
+        self._slots = asyncio.Semaphore(args.max_in_flight)
+
+    async def issue(self, client: httpx.AsyncClient, entry: Dict, api_key: Optional[str]) -> None:
+        stats = self.stats.setdefault(entry.get("handler") or entry["path"], EndpointStats())
+        headers = {"content-type": "application/json"} if entry.get("body") else {}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        async with self._slots:
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    entry["method"], entry["path"], params=entry.get("query") or None,
+                    content=entry["body"].encode() if entry.get("body") else None, headers=headers
+                )
+            except httpx.HTTPError as e:
+                stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+                stats.statuses[type(e).__name__] += 1
+                stats.errors += 1
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        stats.statuses[str(response.status_code)] += 1
+        if response.status_code == 429:
+            stats.rate_limited += 1
+            return
+        stats.latencies_ms.append(elapsed_ms)
+        for stage, desc in parse_server_timing(response.headers.get("server-timing", "")).items():
+            stats.cache_outcomes[(stage, desc)] += 1
+        if response.status_code >= 400:
+            stats.errors += 1
+        elif response.status_code == 200 and response.headers.get("content-type", "").startswith("application/json"):
+            try:
+                payload = loads(response.content)
+            except ValueError:
+                return
+            if isinstance(payload, dict) and payload.get("success") is False:
+                stats.errors += 1
+            elif uses_fallback(payload):
+                stats.fallbacks += 1
+
+    async def run(self) -> float:
+        limits = httpx.Limits(max_connections=self.args.max_in_flight, max_keepalive_connections=self.args.max_in_flight)
+        tasks = []
+        # Off-grid GET /climate/analyze redirects were captured along with the
+        # follow-up request, so redirects are not followed here
+        async with httpx.AsyncClient(base_url=self.args.url, timeout=self.args.timeout, limits=limits) as client:
+            first_ts = self.entries[0]["ts"]
+            start = time.monotonic()
+            for entry in self.entries:
+                if entry.get("body_truncated"):
+                    self.skipped["body_truncated"] += 1
+                    continue
+                due = start + (entry["ts"] - first_ts) / self.args.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.dispatch_lag_ms.append(max(time.monotonic() - due, 0.0) * 1000)
+                api_key = self.args.api_key[len(tasks) % len(self.args.api_key)] if self.args.api_key else None
+                tasks.append(asyncio.create_task(self.issue(client, entry, api_key)))
+            await asyncio.gather(*tasks)
+            return time.monotonic() - start
+
+def compare_handlers(captured: Dict[str, Dict], replayed: Dict[str, Dict]) -> Dict[str, Dict]:
+    """p50/p95/p99 change per handler, replayed vs captured"""
+    changes = {}
+    for handler, replay_summary in replayed.items():
+        before = captured.get(handler, {}).get("latency_ms", {})
+        changes[handler] = {
+            quantile: (
+                round(replay_summary["latency_ms"][quantile] / before[quantile] - 1, 4)
+                if before.get(quantile) and replay_summary["latency_ms"][quantile] is not None else None
+            )
+            for quantile in ("p50", "p95", "p99")
+        }
+    return changes
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a candidate build")
+    parser.add_argument("captures", nargs="+", help="Capture files or directories of them")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Candidate backend base URL")
+    parser.add_argument("--speed", type=float, default=1.0, help="Arrival-time speed-up (2 replays an hour in 30 minutes)")
+    parser.add_argument("--path-prefix", help="Only replay requests whose path starts with this")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Cap on concurrent replayed requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Client timeout per request")
+    parser.add_argument("--api-key", type=_parse_api_keys, default=_parse_api_keys(os.getenv("LOADTEST_API_KEYS", "")),
+                        help="Comma-separated keys from the candidate's API_KEYS, spread over the requests as X-API-Key")
+    parser.add_argument("--report", metavar="PATH", help="Write the JSON report here")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    entries = load_captures(args.captures, args.path_prefix)[:args.limit]
+    if not entries:
+        print("No captured requests found")
+        sys.exit(1)
+    span = entries[-1]["ts"] - entries[0]["ts"]
+    print(f"Replaying {len(entries)} requests captured over {span:.0f}s at {args.speed:g}x against {args.url}")
+
+    replay = Replay(entries, args)
+    elapsed = asyncio.run(replay.run())
+    captured = captured_summary(entries)
+    replayed = {handler: stats.summary(elapsed) for handler, stats in sorted(replay.stats.items())}
+    lag = sorted(replay.dispatch_lag_ms)
+    report = {
+        "meta": {
+            "created": datetime.utcnow().isoformat(),
+            "target": args.url,
+            "speed": args.speed,
+            "captured_from": datetime.utcfromtimestamp(entries[0]["ts"]).isoformat(),
+            "captured_to": datetime.utcfromtimestamp(entries[-1]["ts"]).isoformat(),
+            "requests": len(entries),
+            "skipped": dict(replay.skipped),
+            "api_keys": len(args.api_key),
+            "replay_seconds": round(elapsed, 2)
+        },
+        "dispatch_lag_ms": {"p50": _round(percentile(lag, 0.5)), "p99": _round(percentile(lag, 0.99)), "max": _round(lag[-1] if lag else None)},
+        "captured": captured,
+        "replayed": replayed,
+        "latency_change": compare_handlers(captured, replayed)
+    }
+
+    print(f"\n{'handler':28s} {'n':>6s} {'captured p50/p95/p99 ms':>26s} {'replayed p50/p95/p99 ms':>26s} {'errors':>7s}")
+    for handler, summary in replayed.items():
+        before = captured.get(handler, {}).get("latency_ms", {})
+        after = summary["latency_ms"]
+        print(f"{handler:28s} {summary['requests']:6d} "
+              f"{before.get('p50')!s:>8s}/{before.get('p95')!s:>8s}/{before.get('p99')!s:>8s} "
+              f"{after['p50']!s:>8s}/{after['p95']!s:>8s}/{after['p99']!s:>8s} {summary['error_rate']:7.2%}")
+    rate_limited = sum(summary["rate_limited"] for summary in replayed.values())
+    if rate_limited:
+        print(f"\nWARNING: {rate_limited} {RATE_LIMIT_HINT}")
+    print(f"\nDispatch lag p99: {report['dispatch_lag_ms']['p99']}ms")
+    if args.report:
+        with open(args.report, "w") as report_file:
+            json.dump(report, report_file, indent=2)
+        print(f"Wrote report to {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -266,27 +266,26 @@ const ClimateApp = () => {
       // Update API status
       setApiStatus(prev => ({ ...prev, climate: 'connecting' }));
       
-      // Fetch analysis for current location using full geocoding object
-      const currentData = await fetchClimateAnalysis({
-        name: currentLocation.name,
-        country: currentLocation.country,
-        admin1: currentLocation.admin1,
-        latitude: currentLocation.latitude,
-        longitude: currentLocation.longitude
+      const toLocationData = (location: LocationOption): LocationData => ({
+        name: location.name,
+        country: location.country,
+        admin1: location.admin1,
+        latitude: location.latitude,
+        longitude: location.longitude
       });
-      setCurrentAnalysis(currentData);
       
-      // Fetch analysis for target location if provided
-      let targetData = null;
       if (targetLocation) {
-        targetData = await fetchClimateAnalysis({
-          name: targetLocation.name,
-          country: targetLocation.country,
-          admin1: targetLocation.admin1,
-          latitude: targetLocation.latitude,
-          longitude: targetLocation.longitude
-        });
+        // Both locations go through the cached, deadline-bound analyze endpoint concurrently
+        const [currentData, targetData] = await Promise.all([
+          fetchClimateAnalysis(toLocationData(currentLocation)),
+          fetchClimateAnalysis(toLocationData(targetLocation))
+        ]);
+        setCurrentAnalysis(currentData);
         setTargetAnalysis(targetData);
+      } else {
+        // Fetch analysis for current location using full geocoding object
+        const currentData = await fetchClimateAnalysis(toLocationData(currentLocation));
+        setCurrentAnalysis(currentData);
       }
       
       // Update API status to connected